@@ -0,0 +1,9 @@
+import os
+import sys
+
+# Coletor unificado do pacote core_data (na raiz do repositório), com o perfil do Free5GC como padrão
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))
+from core_data.collector import main
+
+if __name__ == "__main__":
+    main(default_core="free5gc")
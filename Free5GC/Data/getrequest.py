@@ -2,11 +2,18 @@ import pandas as pd
 import seaborn as sns
 import numpy as np
 import matplotlib.pyplot as plt
-from prometheus_pandas import query
+import os
+import sys
+# Pacote core_data (compartilhado pelos dois cores), na raiz do repositório
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))
+from core_data.prometheus_pool import close_clients, stats as prometheus_stats
+from core_data.checkpoint import IntervalCheckpoint
+from core_data.dataset_pack import read_csv
+from core_data.span_fetch import SpanFetcher
+from core_data.query_executor import QueryExecutor, add_executor_arguments, executor_from_args, run_for_directories
 from datetime import datetime
 import re
 import argparse
-import os
 
 # URL do Prometheus
 prometheus_url = "http://localhost:33631"
@@ -24,53 +31,69 @@ def redefine_date(date_str):
         dt = dt.replace(second=0, microsecond=0)
     return dt.timestamp()
 
-# Função para normalizar os resultados da consulta
+# Função para normalizar os resultados da consulta: extrai os valores direto do
+# DataFrame retornado, descartando NaN/Inf (passos sem amostra ou divisão por zero)
 def normalize_result(result):
-    result_str = result.to_string()
-    result_list = re.split(r'[ \n]+', result_str)
-    float_values = [float(value) for value in result_list if value.replace('.', '', 1).isdigit()]
-    return float_values
+    values = np.asarray(result, dtype=float).ravel()
+    return values[np.isfinite(values)]
 
 # Função para calcular o valor máximo de uma lista de floats
 def mean_calc(float_values):
-    if float_values:
-        return sum(float_values)/len(float_values)
+    if len(float_values):
+        return float(np.mean(float_values))
     return None
 
-def get_receive_bytes(start_end_timestamps, output_csv):
+def get_receive_bytes(start_end_timestamps, output_csv, executor=None, bulk=False):
     pastas = ['amf', 'ausf', 'bsf', 'nrf', 'nssf', 'pcf', 'smf', 'udm', 'udr', 'upf']
-    prometheus = query.Prometheus(prometheus_url)
+    # Sem executor, cria um só para esta chamada e encerra o pool dele no final
+    if executor is None:
+        with QueryExecutor(prometheus_url) as executor:
+            return get_receive_bytes(start_end_timestamps, output_csv, executor, bulk)
+    # No modo bulk cada série é buscada uma única vez para a janela de todas as rodadas
+    if bulk:
+        executor = SpanFetcher(executor, [(redefine_date(timestamp_to_datetime(start)), redefine_date(timestamp_to_datetime(end)))
+                                          for start, end in start_end_timestamps])
     
     # DataFrames para somar valores e contar intervalos
     combined_data_sum = pd.DataFrame(index=pastas, columns=pastas, dtype=float).fillna(0.0)
     count_data = pd.DataFrame(index=pastas, columns=pastas, dtype=float).fillna(0.0)
 
+    # Intervalos já concluídos em uma execução anterior são lidos do checkpoint
+    checkpoint = IntervalCheckpoint(output_csv)
+
+    # Dispara as consultas de todos os intervalos de uma vez; o executor limita quantas rodam em paralelo
+    interval_futures = []
     for start, end in start_end_timestamps:
         start = redefine_date(timestamp_to_datetime(start))
         end = redefine_date(timestamp_to_datetime(end))
-        
-        data = pd.DataFrame(index=pastas, columns=pastas, dtype=object)  # Mudança aqui
-
-        for i, source_app in enumerate(pastas):
-            for j, dest_app in enumerate(pastas):
-                query_string = (
-                    f'increase(istio_request_duration_milliseconds_sum{{namespace="free5gc", source_app="free5gc-{pastas[i]}", reporter="destination", destination_app="free5gc-{pastas[j]}"}}[1m0s])/'
-                    f'increase(istio_request_duration_milliseconds_count{{namespace="free5gc", source_app="free5gc-{pastas[i]}", reporter="destination", destination_app="free5gc-{pastas[j]}"}}[1m0s])'
-                )
-                result = prometheus.query_range(query_string, start, end, "30s")
+
+        saved = checkpoint.load(start, end)
+        futures = {}
+        if saved is None:
+            for i, source_app in enumerate(pastas):
+                for j, dest_app in enumerate(pastas):
+                    query_string = (
+                        f'increase(istio_request_duration_milliseconds_sum{{namespace="free5gc", source_app="free5gc-{pastas[i]}", reporter="destination", destination_app="free5gc-{pastas[j]}"}}[1m0s])/'
+                        f'increase(istio_request_duration_milliseconds_count{{namespace="free5gc", source_app="free5gc-{pastas[i]}", reporter="destination", destination_app="free5gc-{pastas[j]}"}}[1m0s])'
+                    )
+                    futures[(i, j)] = executor.query_range(query_string, start, end, "30s")
+        interval_futures.append((start, end, saved, futures))
+
+    for start, end, saved, futures in interval_futures:
+        if saved is not None:
+            print(f"Retomando o intervalo {int(start)}-{int(end)} do checkpoint de {output_csv}")
+            means = saved["data"].to_numpy(dtype=float)
+        else:
+            means = np.zeros((len(pastas), len(pastas)))
+            for (i, j), future in futures.items():
+                result = future.result()
                 normalized_values = normalize_result(result)
-                
-                mean_value = mean_calc(normalized_values) if normalized_values else 0
-                if source_app == 'bsf' or dest_app == 'bsf':
-                    data.iloc[i, j] = '-'    
-                else:    
-                    data.iloc[i, j] = mean_value
-
-                # Acumular os somatórios
-                combined_data_sum.iloc[i, j] += mean_value if mean_value > 0 else 0
-                # Contar intervalos onde há dados
-                if mean_value > 0:
-                    count_data.iloc[i, j] += 1
+                means[i, j] = mean_calc(normalized_values) if len(normalized_values) else 0
+            checkpoint.save(start, end, {"data": pd.DataFrame(means, index=combined_data_sum.index, columns=combined_data_sum.columns)})
+
+        # Acumular os somatórios e contar intervalos onde há dados
+        combined_data_sum += np.where(means > 0, means, 0.0)
+        count_data += (means > 0).astype(float)
 
     # Calcular a média dividindo os somatórios pelo número de intervalos
     combined_data = combined_data_sum.copy()
@@ -90,9 +113,10 @@ def get_receive_bytes(start_end_timestamps, output_csv):
     combined_data.iloc[:, bsf_index] = '-'  # Coluna bsf
 
     combined_data.to_csv(output_csv)
+    checkpoint.clear()
     return combined_data
 
-def generate_heatmaps_for_directories(directories, output_image="Heatmap_Duration_Free5GC.png"):
+def generate_heatmaps_for_directories(directories, output_image="Heatmap_Duration_Free5GC.png", csv_name="output_req.csv"):
     num_dirs = len(directories)
     # Configurar o gráfico para 2 linhas e 2 colunas
     fig, axs = plt.subplots(2, 2, figsize=(10, 10), squeeze=False)  # 2 linhas, 2 colunas
@@ -108,8 +132,8 @@ def generate_heatmaps_for_directories(directories, output_image="Heatmap_Duratio
     all_data = []  # Para armazenar todos os DataFrames
     for directory in directories:
         # Lê os dados do CSV correspondente ao diretório
-        csv_file = f"{directory}/output_req.csv"  # Ajuste conforme necessário
-        data = pd.read_csv(csv_file, index_col=0)
+        csv_file = f"{directory}/{csv_name}"  # Ajuste conforme necessário
+        data = read_csv(csv_file, index_col=0)
 
         # Converte os valores '-' para NaN para o heatmap principal
         data_numeric = data.replace('-', np.nan).astype(float)
@@ -171,27 +195,37 @@ def get_timestamps_from_file(filepath):
     return start_end_timestamps
 
 def get_timestamps_from_directory(directory):
-    # Caminho do arquivo timestamps.txt
-    filepath = os.path.join(directory, 'timestamps.txt')
-    
-    # Verifica se o arquivo existe no diretório
-    if os.path.exists(filepath):
-        return get_timestamps_from_file(filepath)
-    else:
-        raise FileNotFoundError(f"O arquivo 'timestamps.txt' não foi encontrado no diretório: {directory}")
+    # O connection_test.sh (e o Dataset) usa timestamp.txt; timestamps.txt é o nome que os scripts sempre procuraram
+    for filename in ('timestamps.txt', 'timestamp.txt'):
+        filepath = os.path.join(directory, filename)
+        if os.path.exists(filepath):
+            return get_timestamps_from_file(filepath)
+    raise FileNotFoundError(f"Nenhum arquivo 'timestamps.txt' ou 'timestamp.txt' foi encontrado no diretório: {directory}")
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Fetch and visualize metrics from Prometheus.")
     parser.add_argument("directories", nargs='+', type=str, help="List of directories containing the CSV files.")
     parser.add_argument("--output_csv", type=str, default="output_req.csv", help="Output CSV file name")
     parser.add_argument("--output_image", type=str, default="Heatmap_Duration_Free5GC.png", help="Output image file name")
+    parser.add_argument("--bulk", action="store_true", help="Fetch each series once for the whole experiment and slice the rounds locally")
+    add_executor_arguments(parser)
 
     args = parser.parse_args()
 
-    for directory in args.directories:
+    executor = executor_from_args(prometheus_url, args)
+
+    def coletar(directory):
         start_end_timestamps = get_timestamps_from_directory(directory)
         output_csv = f"{directory}/output_req.csv"  # Salva o CSV em cada diretório
-        data = get_receive_bytes(start_end_timestamps, output_csv)
+        return get_receive_bytes(start_end_timestamps, output_csv, executor, args.bulk)
+
+    # Coleta os diretórios em paralelo, compartilhando o mesmo limite de consultas
+    try:
+        run_for_directories(coletar, args.directories, args.workers)
+    finally:
+        executor.shutdown()
+    print(f"Prometheus: {prometheus_stats}")
+    close_clients()
     
     # Gera os heatmaps para todos os diretórios
     generate_heatmaps_for_directories(args.directories, args.output_image)
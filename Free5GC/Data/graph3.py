@@ -1,10 +1,56 @@
 import os
-import pandas as pd
+import sys
+import numpy as np
 import matplotlib.pyplot as plt
+from matplotlib.colors import to_rgba
 import argparse
 
-# Função que realiza a leitura, concatenação e plotagem dos CSVs
-def gerar_scatter_plot(pasta, column_names):
+# Pacote core_data (compartilhado pelos dois cores), na raiz do repositório
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))
+from core_data.dataset_pack import listdir
+from core_data.tester_loader import load_tester_csv
+
+# Acima deste número de pontos em um subplot (somando as colunas) o modo automático troca o
+# scatter pela densidade: o tempo de desenho do scatter cresce com o número de UEs
+DENSITY_THRESHOLD = 200_000
+# Resolução da grade de densidade (tempo x tempo até a conexão)
+DENSITY_BINS = (600, 400)
+
+# Camada RGBA de uma coluna: a cor da coluna com opacidade proporcional ao log da contagem
+# de cada célula (células vazias ficam transparentes, as mais cheias com alpha 0.7 como no scatter)
+def camada_densidade(contagens, cor):
+    camada = np.zeros(contagens.shape + (4,))
+    camada[..., :3] = to_rgba(cor)[:3]
+    if contagens.max() > 0:
+        camada[..., 3] = 0.7 * np.log1p(contagens) / np.log1p(contagens.max())
+    return camada
+
+# Contagem de pontos em cada célula de uma grade bins[0] x bins[1] sobre extent (índices
+# calculados direto e somados com np.bincount, bem mais rápido que np.histogram2d)
+def contar_grade(x, y, bins, extent):
+    x_min, x_max, y_min, y_max = extent
+    xi = np.clip(((x - x_min) * (bins[0] / (x_max - x_min))).astype(np.int64), 0, bins[0] - 1)
+    yi = np.clip(((y - y_min) * (bins[1] / (y_max - y_min))).astype(np.int64), 0, bins[1] - 1)
+    return np.bincount(yi * bins[0] + xi, minlength=bins[0] * bins[1]).reshape(bins[1], bins[0])
+
+# Desenha as colunas como histogramas 2D sobrepostos: o custo depende da grade, não do
+# número de pontos. O scatter vazio de cada coluna mantém a legenda.
+def desenhar_densidade(ax, timestamp, dados, column_names, colors, bins=DENSITY_BINS):
+    valores = [dados[column].to_numpy(dtype=float) for column in column_names]
+    finitos = [np.isfinite(values) for values in valores]
+    y_min = min((values[finite].min() for values, finite in zip(valores, finitos) if finite.any()), default=0.0)
+    y_max = max((values[finite].max() for values, finite in zip(valores, finitos) if finite.any()), default=1.0)
+    x_max = max(timestamp.max(), 1e-9) if len(timestamp) else 1.0
+    extent = [0.0, x_max, y_min, y_max if y_max > y_min else y_min + 1.0]
+    for idx, (column, values, finite) in enumerate(zip(column_names, valores, finitos)):
+        cor = colors[idx % len(colors)]
+        contagens = contar_grade(timestamp[finite], values[finite], bins, extent)
+        ax.imshow(camada_densidade(contagens, cor), extent=extent, origin='lower', aspect='auto', interpolation='nearest')
+        ax.scatter([], [], label=column, color=cor, s=5, alpha=0.7)
+
+# Função que realiza a leitura, concatenação e plotagem dos CSVs.
+# modo: 'scatter' (um ponto por UE), 'density' (histograma 2D) ou 'auto' (density acima de threshold pontos)
+def gerar_scatter_plot(pasta, column_names, modo='auto', threshold=DENSITY_THRESHOLD):
     # Configurações manuais do estilo
     plt.rcParams.update({
         'font.size': 10,          # Tamanho da fonte
@@ -27,7 +73,7 @@ def gerar_scatter_plot(pasta, column_names):
         'Scenario 3',
         'Scenario 4'
     ]
-    arquivos_csv = [arquivo for arquivo in os.listdir(pasta) if arquivo.endswith(".csv")]
+    arquivos_csv = [arquivo for arquivo in listdir(pasta) if arquivo.endswith(".csv")]
     arquivos_csv.sort()
     
     # Criar uma figura com layout 2x2
@@ -41,8 +87,8 @@ def gerar_scatter_plot(pasta, column_names):
         base_filename = os.path.join(pasta, arquivo)
         print(f"Lendo o arquivo: {arquivo}")  # Imprime o nome do arquivo lido
 
-        # Ler o CSV
-        dados = pd.read_csv(base_filename)
+        # Ler só o timestamp e as colunas plotadas (com cache em Feather)
+        dados = load_tester_csv(base_filename, ['timestamp'] + column_names)
 
         # Ordenar os dados pelo timestamp
         dados = dados.sort_values(by='timestamp')
@@ -50,14 +96,18 @@ def gerar_scatter_plot(pasta, column_names):
         # Pegar o primeiro timestamp para normalizar
         timestamp_base = dados['timestamp'].iloc[0]
 
-        # Plotar para cada coluna em column_names no subplot correspondente
-        for idx, column in enumerate(column_names):
-            # Normalizar os timestamps para segundos a partir do primeiro timestamp
-            timestamp = (dados['timestamp'] - timestamp_base) / 1e9  
-            values = dados[column]
-            
-            cor = colors[idx % len(colors)]  # Alternar entre as cores
-            axs[i].scatter(timestamp, values, label=column, color=cor, s=5, alpha=0.7)
+        # Normalizar os timestamps para segundos a partir do primeiro timestamp
+        timestamp = ((dados['timestamp'] - timestamp_base) / 1e9).to_numpy()
+
+        if modo == 'density' or (modo == 'auto' and len(dados) * len(column_names) > threshold):
+            desenhar_densidade(axs[i], timestamp, dados, column_names, colors)
+        else:
+            # Plotar para cada coluna em column_names no subplot correspondente
+            for idx, column in enumerate(column_names):
+                values = dados[column]
+
+                cor = colors[idx % len(colors)]  # Alternar entre as cores
+                axs[i].scatter(timestamp, values, label=column, color=cor, s=5, alpha=0.7)
 
         # Adicionar título e labels ao subplot
         axs[i].set_title(titles[i], fontsize=12)
@@ -86,9 +136,12 @@ def gerar_scatter_plot(pasta, column_names):
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Gerar scatter plot a partir de arquivos CSV em uma pasta.")
     parser.add_argument('pasta', type=str, help='Caminho para a pasta que contém os arquivos CSV')
+    parser.add_argument('--mode', choices=['auto', 'scatter', 'density'], default='auto', help='One point per UE, a 2D density raster, or density only above --threshold points per subplot')
+    parser.add_argument('--threshold', type=int, default=DENSITY_THRESHOLD, help='Points per subplot (all columns) above which the auto mode draws the density')
 
     # Parse dos argumentos da linha de comando
     args = parser.parse_args()
 
     # Chamar a função com os argumentos
-    gerar_scatter_plot(args.pasta, column_names=['MM5G_REGISTERED_INITIATED', 'MM5G_REGISTERED', 'DataPlaneReady'])
+    gerar_scatter_plot(args.pasta, column_names=['MM5G_REGISTERED_INITIATED', 'MM5G_REGISTERED', 'DataPlaneReady'],
+                       modo=args.mode, threshold=args.threshold)
@@ -1,38 +1,46 @@
 import os
-import pandas as pd
+import sys
 import matplotlib.pyplot as plt
 
+# Pacote core_data (compartilhado pelos dois cores), na raiz do repositório
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))
+from core_data.catalog import parse_tester_filename
+from core_data.dataset_pack import listdir
+from core_data.rate_engine import connection_rates
+from core_data.tester_loader import load_tester_csv
+
 folder = os.getcwd()
 
-for file in os.listdir(folder):
+for file in listdir(folder):
     if file.endswith(".csv"):
         nome_arquivo = os.path.join(folder, file)
 
-        data = pd.read_csv(nome_arquivo)
-        timestamp_base = data.iloc[0]['timestamp']
-
-        data['Experiment Time (s)'] = (data['timestamp'] - timestamp_base) / 1000000000
-        data['Experiment Time (s)'] = data['Experiment Time (s)'].round()
+        data = load_tester_csv(nome_arquivo, ['timestamp'])
+        # Conexões iniciadas por segundo desde o primeiro timestamp, com zero nos segundos sem conexão
+        taxas = connection_rates([data])
 
-        connections_per_second = data['Experiment Time (s)'].value_counts().sort_index()
-        
-        times = connections_per_second.index.tolist()
-        num_rows = connections_per_second.values.tolist()
+        times = taxas['time_s'].tolist()
+        num_rows = taxas['offered'].tolist()
 
         plt.figure(figsize=(10, 6))
 
         plt.plot(times, num_rows, linewidth=2)
 
-        # Criar o título baseado no nome do arquivo
-        if "div" in nome_arquivo:
-            title = f'Parallel Connection Test:\nStarting at {nome_arquivo.split("_")[4]}ms, Dividing by {nome_arquivo.split("_")[5]} Every {nome_arquivo.split("_")[6]} Connections'
-            novo_nome_arquivo = f'graph_num_rows_per_second_div_{nome_arquivo.split("_")[4]}_{nome_arquivo.split("_")[5]}_{nome_arquivo.split("_")[6]}.png'
-        elif "dec" in nome_arquivo:
-            title = f'Parallel Connection Test:\nStarting at {nome_arquivo.split("_")[4]}ms, Decreased by {nome_arquivo.split("_")[5]} Every {nome_arquivo.split("_")[6]} Connections'
-            novo_nome_arquivo = f'graph_num_rows_per_second_dec_{nome_arquivo.split("_")[4]}_{nome_arquivo.split("_")[5]}_{nome_arquivo.split("_")[6]}.png'
+        # Criar o título a partir dos parâmetros do teste no nome do arquivo
+        # (my5grantester_<core>_<teste>_<num_ue>_<delay>_<fator>_<intervalo>_0_<repetição>.csv)
+        params = parse_tester_filename(file)
+        if params.get("test") == "division":
+            title = f'Parallel Connection Test:\nStarting at {params["delay"]}ms, Dividing by {params["factor"]} Every {params["interval"]} Connections'
+            novo_nome_arquivo = f'graph_num_rows_per_second_div_{params["delay"]}_{params["factor"]}_{params["interval"]}.png'
+        elif params.get("test") == "decrement":
+            title = f'Parallel Connection Test:\nStarting at {params["delay"]}ms, Decreased by {params["factor"]} Every {params["interval"]} Connections'
+            novo_nome_arquivo = f'graph_num_rows_per_second_dec_{params["delay"]}_{params["factor"]}_{params["interval"]}.png'
+        elif params:
+            title = f'Parallel Connection Test:\n{params["num_ue"]} Connections'
+            novo_nome_arquivo = f'graph_num_rows_per_second_{params["core"]}_{params["num_ue"]}.png'
         else:
-            title = f'Parallel Connection Test:\nInterval of {nome_arquivo.split("_")[3]}ms'
-            novo_nome_arquivo = f'graph_num_rows_per_second_{nome_arquivo.split("_")[1]}_{nome_arquivo.split("_")[3]}.png'
+            title = f'Connection Test:\n{os.path.splitext(file)[0]}'
+            novo_nome_arquivo = f'graph_num_rows_per_second_{os.path.splitext(file)[0]}.png'
 
         # Adicionar título e labels
         plt.title(title, fontsize=14)
@@ -1,12 +1,18 @@
 import os
-import pandas as pd
+import sys
 import matplotlib.pyplot as plt
 import argparse
 
+# Pacote core_data (compartilhado pelos dois cores), na raiz do repositório
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))
+from core_data.dataset_pack import listdir
+from core_data.rate_engine import connection_rates
+from core_data.tester_loader import load_tester_csv
+
 # Função para gerar gráficos a partir de arquivos CSV em uma pasta
 def gerar_graficos(pasta):
     # Criar uma lista para armazenar os arquivos CSV
-    arquivos_csv = [file for file in os.listdir(pasta) if file.endswith(".csv")]
+    arquivos_csv = [file for file in listdir(pasta) if file.endswith(".csv")]
     arquivos_csv.sort()
     plt.rcParams.update({
         'font.size': 10,          # Tamanho da fonte
@@ -38,16 +44,12 @@ def gerar_graficos(pasta):
 
         arquivo_path = os.path.join(pasta, nome_arquivo)
 
-        data = pd.read_csv(arquivo_path)
-        timestamp_base = data.iloc[0]['timestamp']
-
-        data['Experiment Time (s)'] = (data['timestamp'] - timestamp_base) / 1_000_000_000
-        data['Experiment Time (s)'] = data['Experiment Time (s)'].round()
-
-        connections_per_second = data['Experiment Time (s)'].value_counts().sort_index()
+        data = load_tester_csv(arquivo_path, ['timestamp'])
+        # Conexões iniciadas por segundo desde o primeiro timestamp, com zero nos segundos sem conexão
+        taxas = connection_rates([data])
 
-        times = connections_per_second.index.tolist()
-        num_rows = connections_per_second.values.tolist()
+        times = taxas['time_s'].tolist()
+        num_rows = taxas['offered'].tolist()
 
         # Plotar no subplot correspondente
         axs[i // 2, i % 2].plot(times, num_rows, linewidth=2)
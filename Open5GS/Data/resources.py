@@ -2,11 +2,18 @@ import pandas as pd
 import seaborn as sns
 import numpy as np
 import matplotlib.pyplot as plt
-from prometheus_pandas import query
+import os
+import sys
+# Pacote core_data (compartilhado pelos dois cores), na raiz do repositório
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))
+from core_data.prometheus_pool import close_clients, stats as prometheus_stats
+from core_data.checkpoint import IntervalCheckpoint
+from core_data.dataset_pack import read_csv
+from core_data.span_fetch import SpanFetcher
+from core_data.query_executor import QueryExecutor, add_executor_arguments, executor_from_args, run_for_directories
 from datetime import datetime
 import re
 import argparse
-import os
 
 prometheus_url = "http://localhost:37877"
 pastas = ['amf', 'ausf', 'bsf', 'nrf', 'nssf', 'pcf', 'smf', 'udm', 'udr', 'upf-1']
@@ -19,22 +26,14 @@ def redefine_date(date_str):
     dt = dt.replace(second=30 if dt.second >= 30 else 0, microsecond=0)
     return dt.timestamp()
 
+# Função para normalizar os resultados da consulta: extrai os valores direto do
+# DataFrame retornado, descartando NaN/Inf (passos sem amostra ou divisão por zero)
 def normalize_result(result):
-    normalized_result = []
-
-    result_string = result.to_string()
-
-    # Agora você pode usar split() na string
-    separated_data = result_string.split()
-
-    for i in range(3, len(separated_data), 3):
-        #print(separated_data[i])
-        normalized_result.append(float(separated_data[i]))
-    
-    return normalized_result
+    values = np.asarray(result, dtype=float).ravel()
+    return values[np.isfinite(values)]
 
 def mean_calc(float_values):
-    return sum(float_values) / len(float_values) if float_values else 0
+    return float(np.mean(float_values)) if len(float_values) else 0
 
 def calcular_media_por_componente(data):
     # Agrupa os dados pela primeira coluna (nomes dos componentes)
@@ -43,12 +42,7 @@ def calcular_media_por_componente(data):
     # Retorna o DataFrame com as médias calculadas para cada componente
     return media_por_componente
 
-def fetch_metrics(query_string, start, end):
-    prometheus = query.Prometheus(prometheus_url)
-    result = prometheus.query_range(query_string, start, end, "30s")
-    return normalize_result(result)
-
-def get_combined_metrics_data(start_end_timestamps, output_csv="output.csv"):
+def get_combined_metrics_data(start_end_timestamps, output_csv="output.csv", executor=None, bulk=False):
     data = pd.DataFrame(index=pastas, columns=["mean_cpu_usage", "mean_memory_usage", "mean_receive_bytes", "mean_transmit_bytes"])
 
     metrics = {
@@ -58,20 +52,46 @@ def get_combined_metrics_data(start_end_timestamps, output_csv="output.csv"):
         "mean_transmit_bytes": 'sum(rate(container_network_transmit_bytes_total{job="kubelet", metrics_path="/metrics/cadvisor", cluster="", namespace="cemenin"}[2m0s]) * on (namespace,pod) group_left(workload,workload_type)'
     }
 
+    # Sem executor, cria um só para esta chamada e encerra o pool dele no final
+    if executor is None:
+        with QueryExecutor(prometheus_url) as executor:
+            return get_combined_metrics_data(start_end_timestamps, output_csv, executor, bulk)
+    # No modo bulk cada série é buscada uma única vez para a janela de todas as rodadas
+    if bulk:
+        executor = SpanFetcher(executor, [(redefine_date(timestamp_to_datetime(start)), redefine_date(timestamp_to_datetime(end)))
+                                          for start, end in start_end_timestamps])
     combined_data = []
 
+    # Intervalos já concluídos em uma execução anterior são lidos do checkpoint
+    checkpoint = IntervalCheckpoint(output_csv)
+
+    # Dispara as consultas de todos os intervalos de uma vez; o executor limita quantas rodam em paralelo
+    interval_futures = []
     for start, end in start_end_timestamps:
         start, end = redefine_date(timestamp_to_datetime(start)), redefine_date(timestamp_to_datetime(end))
-        interval_data = data.copy()
-    
-        for pasta in pastas:
+        saved = checkpoint.load(start, end)
+        futures = {}
+        for pasta in pastas if saved is None else []:
             for metric_col, query_string in metrics.items():
                 query_string += f' namespace_workload_pod:kube_pod_owner:relabel{{cluster="", namespace="cemenin", workload="open5gs-{pasta}"}}) by (workload)'
-                mean_value = mean_calc(fetch_metrics(query_string, start, end))
-                if pasta == 'upf-1':
-                    interval_data.at['upf', metric_col] = mean_value
-                else:
-                    interval_data.at[pasta, metric_col] = mean_value
+                futures[(pasta, metric_col)] = executor.query_range(query_string, start, end, "30s")
+        interval_futures.append((start, end, saved, futures))
+
+    for start, end, saved, futures in interval_futures:
+        if saved is not None:
+            print(f"Retomando o intervalo {int(start)}-{int(end)} do checkpoint de {output_csv}")
+            combined_data.append(saved["data"])
+            continue
+
+        interval_data = data.copy()
+
+        for (pasta, metric_col), future in futures.items():
+            mean_value = mean_calc(normalize_result(future.result()))
+            if pasta == 'upf-1':
+                interval_data.at['upf', metric_col] = mean_value
+            else:
+                interval_data.at[pasta, metric_col] = mean_value
+        checkpoint.save(start, end, {"data": interval_data})
         #interval_data['interval'] = f"{start}-{end}"
         combined_data.append(interval_data)
 
@@ -83,6 +103,7 @@ def get_combined_metrics_data(start_end_timestamps, output_csv="output.csv"):
 
     # Salvando os resultados em um arquivo CSV
     media_por_componente.to_csv(output_csv)
+    checkpoint.clear()
 
     return media_por_componente
 
@@ -109,7 +130,7 @@ def generate_stacked_barplots_per_component(csv_files, output_image="stacked_bar
 
     # Ler e acumular os dados de todos os arquivos CSV
     for index, csv_file in enumerate(csv_files):
-        df = pd.read_csv(csv_file, index_col=0)
+        df = read_csv(csv_file, index_col=0)
         # Adicionar coluna de cenário
         scenario_name = f'Scenario {index + 1}'
         df['Scenario'] = scenario_name
@@ -184,28 +205,37 @@ def get_timestamps_from_file(filepath):
     return start_end_timestamps
 
 def get_timestamps_from_directory(directory):
-    # Caminho do arquivo timestamps.txt
-    filepath = os.path.join(directory, 'timestamps.txt')
-    
-    # Verifica se o arquivo existe no diretório
-    if os.path.exists(filepath):
-        return get_timestamps_from_file(filepath)
-    else:
-        raise FileNotFoundError(f"O arquivo 'timestamps.txt' não foi encontrado no diretório: {directory}")
+    # O connection_test.sh (e o Dataset) usa timestamp.txt; timestamps.txt é o nome que os scripts sempre procuraram
+    for filename in ('timestamps.txt', 'timestamp.txt'):
+        filepath = os.path.join(directory, filename)
+        if os.path.exists(filepath):
+            return get_timestamps_from_file(filepath)
+    raise FileNotFoundError(f"Nenhum arquivo 'timestamps.txt' ou 'timestamp.txt' foi encontrado no diretório: {directory}")
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Fetch and visualize metrics from Prometheus.")
     parser.add_argument("directories", nargs='+', type=str, help="List of directories containing the CSV files.")
     parser.add_argument("--output_csv", type=str, default="output.csv", help="Output CSV file name")
     parser.add_argument("--output_image", type=str, default="scientific_boxplots.png", help="Output image file name")
+    parser.add_argument("--bulk", action="store_true", help="Fetch each series once for the whole experiment and slice the rounds locally")
+    add_executor_arguments(parser)
 
     args = parser.parse_args()
 
-    outputs = []
-    for directory in args.directories:
+    executor = executor_from_args(prometheus_url, args)
+
+    def coletar(directory):
         start_end_timestamps = get_timestamps_from_directory(directory)
         output_csv = f"{directory}/output.csv"  # Salva o CSV em cada diretório
-        outputs.append(output_csv)
         print(output_csv)
-        get_combined_metrics_data(start_end_timestamps, output_csv)
+        get_combined_metrics_data(start_end_timestamps, output_csv, executor, args.bulk)
+        return output_csv
+
+    # Coleta os diretórios em paralelo, compartilhando o mesmo limite de consultas
+    try:
+        outputs = run_for_directories(coletar, args.directories, args.workers)
+    finally:
+        executor.shutdown()
+    print(f"Prometheus: {prometheus_stats}")
+    close_clients()
     generate_stacked_barplots_per_component(outputs, args.output_image)
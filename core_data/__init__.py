@@ -0,0 +1 @@
+# Ferramentas compartilhadas pelos dois cores: coleta no Prometheus, Dataset, logs do core e do tester
@@ -0,0 +1,188 @@
+import argparse
+import itertools
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import tempfile
+import time
+
+from .bench_common import git_commit
+from .collector import PROFILES, DEFAULT_CORE, STEP_SECONDS
+from .fake_prometheus import SyntheticSource, start_server
+
+# Modos de coleta medidos: uma consulta por par (o getdata.py da árvore do core, só a família rate)
+# e as três formas do collector.py (consultas agrupadas, agregação no servidor e bulk)
+MODES = ["pairwise", "grouped", "server_side", "bulk"]
+
+# Início da primeira rodada sintética (múltiplo do passo, como após redefine_date)
+BENCH_START = 1732815180
+
+# Perfil com as primeiras nf_count NFs do core; acima do tamanho do core entram NFs fictícias (nf11, nf12, ...)
+def bench_profile(profile, nf_count):
+    extra = [f"nf{k}" for k in range(len(profile["nfs"]) + 1, nf_count + 1)]
+    nfs = (profile["nfs"] + extra)[:nf_count]
+    resource_nfs = [nf for nf in nfs if nf in profile["resource_nfs"] or nf in extra]
+    return dict(profile, nfs=nfs, resource_nfs=resource_nfs)
+
+# Grava o timestamps.txt de um experimento com rodadas contíguas de steps passos
+def write_timestamps(directory, rounds, steps):
+    with open(os.path.join(directory, "timestamps.txt"), "w") as f:
+        for k in range(rounds):
+            start = BENCH_START + k * steps * STEP_SECONDS
+            f.write(f"{start}-{start + steps * STEP_SECONDS}\n")
+
+# Executa um caso em um processo novo (spawn), para que o pico de RSS seja só o da coleta. O RSS
+# depois dos imports (pandas, matplotlib, seaborn) é a linha de base; collector_rss_mb é o que a
+# coleta acrescenta a ela, comparável entre commits.
+def run_case(mode, core, profile, directory, prometheus_url, workers, queue):
+    from . import collector
+    from .prometheus_pool import configure_cache, close_clients, stats
+    from .query_executor import QueryExecutor
+
+    getdata = collector.load_core_script(core, "getdata")
+
+    configure_cache(None)
+    with QueryExecutor(prometheus_url, max_workers=workers, max_in_flight=workers) as executor:
+        baseline_rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+        inicio = time.perf_counter()
+        if mode == "pairwise":
+            getdata.get_receive_bytes(getdata.get_timestamps_from_directory(directory), f"{directory}/output_rate.csv",
+                                      executor, pastas=profile["nfs"])
+        else:
+            collector.collect_directory(directory, profile, executor, mode == "server_side", mode == "bulk")
+        wall = time.perf_counter() - inicio
+    close_clients()
+    peak_rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    queue.put(dict(wall_s=wall, baseline_rss_mb=baseline_rss_mb, peak_rss_mb=peak_rss_mb,
+                   collector_rss_mb=peak_rss_mb - baseline_rss_mb, **stats.snapshot()))
+
+# Mede um caso repeat vezes: menor tempo de parede, pico de RSS e contadores do cliente e do servidor
+def measure(mode, core, profile, rounds, steps, server, workers, repeat):
+    context = multiprocessing.get_context("spawn")
+    runs = []
+    with tempfile.TemporaryDirectory() as directory:
+        write_timestamps(directory, rounds, steps)
+        for _ in range(repeat):
+            before = (server.stats.requests, server.stats.errors, server.stats.bytes_sent)
+            queue = context.Queue()
+            process = context.Process(target=run_case, args=(mode, core, profile, directory, server.url, workers, queue))
+            process.start()
+            result = queue.get()
+            process.join()
+            if process.exitcode != 0:
+                raise RuntimeError(f"Caso {mode} terminou com código {process.exitcode}")
+            result["server_requests"] = server.stats.requests - before[0]
+            result["injected_errors"] = server.stats.errors - before[1]
+            result["bytes_sent"] = server.stats.bytes_sent - before[2]
+            runs.append(result)
+
+    best = min(runs, key=lambda run: run["wall_s"])
+    return {
+        "mode": mode,
+        "nfs": len(profile["nfs"]),
+        "rounds": rounds,
+        "steps": steps,
+        "wall_s": best["wall_s"],
+        "wall_runs_s": [run["wall_s"] for run in runs],
+        "requests": best["requests"],
+        "queries_per_s": best["requests"] / best["wall_s"],
+        "bytes_received": best["bytes_received"],
+        "connections": best["connections"],
+        "server_requests": best["server_requests"],
+        "injected_errors": best["injected_errors"],
+        "baseline_rss_mb": max(run["baseline_rss_mb"] for run in runs),
+        "peak_rss_mb": max(run["peak_rss_mb"] for run in runs),
+        "collector_rss_mb": max(run["collector_rss_mb"] for run in runs),
+    }
+
+# Compara os tempos com os de um JSON anterior, caso a caso (razão > 1 = mais lento agora)
+def compare(cases, baseline_path):
+    with open(baseline_path) as f:
+        baseline = {(case["mode"], case["nfs"], case["rounds"], case["steps"]): case for case in json.load(f)["cases"]}
+    print(f"\nComparação com {baseline_path}:")
+    for case in cases:
+        old = baseline.get((case["mode"], case["nfs"], case["rounds"], case["steps"]))
+        if old:
+            print(f"{case['mode']:>11} nfs={case['nfs']:<3} rounds={case['rounds']:<3} steps={case['steps']:<4} "
+                  f"wall {old['wall_s']:.3f} -> {case['wall_s']:.3f} s ({case['wall_s'] / old['wall_s']:.2f}x), "
+                  f"requests {old['requests']} -> {case['requests']}"
+                  + (f", collector RSS +{old['collector_rss_mb']:.1f} -> +{case['collector_rss_mb']:.1f} MB" if "collector_rss_mb" in old else ""))
+
+# Curvas de escala: tempo de parede de cada modo em função de um eixo da grade,
+# com os outros dois eixos no maior valor medido
+def plot_scaling(cases, output_image):
+    import matplotlib.pyplot as plt
+
+    axes_names = ["nfs", "rounds", "steps"]
+    fig, axes = plt.subplots(1, 3, figsize=(15, 4.5))
+    for ax, axis in zip(axes, axes_names):
+        others = {name: max(case[name] for case in cases) for name in axes_names if name != axis}
+        for mode in MODES:
+            points = sorted((case[axis], case["wall_s"]) for case in cases
+                            if case["mode"] == mode and all(case[name] == value for name, value in others.items()))
+            if points:
+                ax.plot(*zip(*points), marker="o", label=mode)
+        ax.set_xlabel(axis)
+        ax.set_ylabel("wall time (s)")
+        ax.set_title(", ".join(f"{name}={value}" for name, value in others.items()))
+        ax.grid(True, alpha=0.3)
+    axes[0].legend()
+    plt.tight_layout()
+    plt.savefig(output_image, dpi=150)
+    plt.close(fig)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the collectors against a local synthetic Prometheus over a grid of NF counts, rounds and steps.")
+    parser.add_argument("--core", choices=sorted(PROFILES), default=DEFAULT_CORE, help="Core network profile (namespace, NF list, renames)")
+    parser.add_argument("--modes", nargs='+', choices=MODES, default=MODES, help="Collection modes to measure")
+    parser.add_argument("--nfs", nargs='+', type=int, default=[5, 10, 20], help="NF counts (at least 3)")
+    parser.add_argument("--rounds", nargs='+', type=int, default=[1, 5, 10], help="Number of rounds per experiment")
+    parser.add_argument("--steps", nargs='+', type=int, default=[20, 40], help=f"Number of {STEP_SECONDS}s steps per round")
+    parser.add_argument("--repeat", type=int, default=1, help="Runs per case (the fastest one is reported)")
+    parser.add_argument("--workers", type=int, default=8, help="Threads and maximum in-flight queries of the collectors")
+    parser.add_argument("--latency_ms", type=float, default=0.0, help="Latency added by the server to every request, in ms")
+    parser.add_argument("--error_rate", type=float, default=0.0, help="Fraction of requests answered with a 503 error")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the synthetic series")
+    parser.add_argument("--output", type=str, default="bench_collector.json", help="JSON file with the results")
+    parser.add_argument("--compare", type=str, default=None, help="JSON of a previous run to compare against")
+    parser.add_argument("--plot", type=str, default=None, help="Also save the scaling curves to this image")
+    args = parser.parse_args()
+    if min(args.nfs) < 3:
+        parser.error("--nfs must be at least 3 (the per-pair collector masks bsf, the third NF)")
+
+    base_profile = PROFILES[args.core]
+    server = start_server(None, latency=args.latency_ms / 1000, error_rate=args.error_rate, seed=args.seed)
+    cases = []
+    for nf_count in args.nfs:
+        profile = bench_profile(base_profile, nf_count)
+        server.source = SyntheticSource(profile, args.seed)
+        for rounds, steps, mode in itertools.product(args.rounds, args.steps, args.modes):
+            case = measure(mode, args.core, profile, rounds, steps, server, args.workers, args.repeat)
+            cases.append(case)
+            print(f"{mode:>11} nfs={nf_count:<3} rounds={rounds:<3} steps={steps:<4} {case['wall_s']:8.3f} s "
+                  f"{case['requests']:6d} req {case['queries_per_s']:8.1f} q/s {case['bytes_received'] / 1024:9.1f} KiB "
+                  f"+{case['collector_rss_mb']:6.1f} MB (base {case['baseline_rss_mb']:.0f} MB)")
+    server.shutdown()
+    server.server_close()
+
+    report = {
+        "commit": git_commit(),
+        "core": args.core,
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "grid": {"modes": args.modes, "nfs": args.nfs, "rounds": args.rounds, "steps": args.steps,
+                 "workers": args.workers, "latency_ms": args.latency_ms, "error_rate": args.error_rate,
+                 "seed": args.seed, "repeat": args.repeat},
+        "cases": cases,
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Resultados gravados em {args.output}")
+
+    if args.compare:
+        compare(cases, args.compare)
+    if args.plot:
+        plot_scaling(cases, args.plot)
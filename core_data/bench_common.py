@@ -0,0 +1,8 @@
+import subprocess
+
+# Commit atual do repositório (None fora de um checkout git), gravado nos JSONs dos benchmarks
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
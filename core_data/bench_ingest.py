@@ -0,0 +1,61 @@
+import argparse
+import json
+import os
+import platform
+import tempfile
+
+from .bench_common import git_commit
+from .dataset_pack import getsize, open_file
+from .ingest_logs import find_jobs, ingest
+
+# Números de processos medidos por padrão: 1, 2, 4, ... até o número de CPUs
+def default_process_counts():
+    counts = [1]
+    while counts[-1] * 2 <= (os.cpu_count() or 1):
+        counts.append(counts[-1] * 2)
+    if counts[-1] != os.cpu_count():
+        counts.append(os.cpu_count())
+    return counts
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the parallel log ingestion (wall time and speedup per number of processes).")
+    parser.add_argument("roots", nargs='+', type=str, help="Dataset directories to walk (e.g. Free5GC/Dataset Open5GS/Dataset)")
+    parser.add_argument("--processes", nargs='+', type=int, default=None, help="Process counts to measure (default: 1, 2, 4, ... up to the CPU count)")
+    parser.add_argument("--max_files", type=int, default=None, help="Only ingest this many logs (the largest ones)")
+    parser.add_argument("--repeat", type=int, default=1, help="Runs per process count (the fastest one is reported)")
+    parser.add_argument("--output", type=str, default="bench_ingest.json", help="JSON file with the results")
+    args = parser.parse_args()
+
+    jobs = find_jobs(args.roots)[:args.max_files]
+    # Uma leitura prévia deixa os logs no cache de páginas, para que todas as medidas partam do mesmo estado
+    for job in jobs:
+        with open_file(job[3], "rb") as f:
+            while f.read(1 << 24):
+                pass
+
+    cases = []
+    for processes in args.processes or default_process_counts():
+        runs = []
+        for _ in range(args.repeat):
+            with tempfile.TemporaryDirectory() as output_dir:
+                runs.append(ingest(jobs, output_dir, processes))
+        best = min(runs, key=lambda run: run["wall_s"])
+        case = dict(best, processes=processes, mib_per_s=best["bytes"] / 1024 ** 2 / best["wall_s"])
+        case["speedup"] = cases[0]["wall_s"] / case["wall_s"] if cases else 1.0
+        case["efficiency"] = case["speedup"] / processes * (cases[0]["processes"] if cases else 1)
+        cases.append(case)
+        print(f"{processes:3d} processos: {case['wall_s']:7.2f} s {case['mib_per_s']:7.1f} MiB/s "
+              f"speedup {case['speedup']:.2f}x eficiência {case['efficiency']:.0%}")
+
+    report = {
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "files": len(jobs),
+        "bytes": sum(getsize(job[3]) for job in jobs),
+        "cases": cases,
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Resultados gravados em {args.output}")
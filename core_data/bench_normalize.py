@@ -0,0 +1,69 @@
+import timeit
+import argparse
+import re
+
+import numpy as np
+import pandas as pd
+
+from .collector import PROFILES, DEFAULT_CORE, normalize_result
+
+# Implementação antiga (conversão para texto + regex), mantida aqui só para comparação
+def normalize_result_texto(result):
+    result_str = result.to_string()
+    result_list = re.split(r'[ \n]+', result_str)
+    return [float(value) for value in result_list if value.replace('.', '', 1).isdigit()]
+
+# Gera um resultado no formato do prometheus_pandas para uma série de 10 rodadas
+# (uma coluna por variante de response_code, passo de 30s). Os valores têm 3 casas decimais,
+# que o to_string imprime sem arredondar; com pequenos=True alguns passos ficam na ordem de 1e-9
+def gerar_serie(rounds=10, round_seconds=1600, columns=3, seed=0, profile=PROFILES[DEFAULT_CORE], pequenos=False):
+    rng = np.random.default_rng(seed)
+    steps = rounds * round_seconds // 30 + 1
+    index = pd.to_datetime(1732735410 + 30 * np.arange(steps), unit='s')
+    data = {}
+    for k, code in enumerate(["200", "201", "503"][:columns]):
+        values = np.round(rng.gamma(2.0, 10.0, steps), 3)
+        values[rng.random(steps) < 0.2] = np.nan  # passos sem amostra
+        if pequenos:
+            values[::97] *= 1e-9  # valores pequenos: o DataFrame inteiro passa a ser impresso em notação científica
+        data[f'{{response_code="{code}",source_app="{profile["app_prefix"]}amf"}}'] = values
+    return pd.DataFrame(data, index=index)
+
+# Valores válidos da série, na ordem em que as duas implementações os extraem (linha a linha)
+def valores_esperados(result):
+    values = result.to_numpy().ravel()
+    return values[np.isfinite(values)]
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Micro-benchmark of normalize_result on a 10-round series.")
+    parser.add_argument("--core", choices=sorted(PROFILES), default=DEFAULT_CORE, help="Core network profile (app prefix of the series labels)")
+    parser.add_argument("--rounds", type=int, default=10, help="Number of rounds in the series")
+    parser.add_argument("--columns", type=int, default=3, help="Number of label columns in the result")
+    parser.add_argument("--repeat", type=int, default=20, help="Number of timed runs")
+    args = parser.parse_args()
+
+    # Tempo medido numa série em que as duas implementações extraem os mesmos valores
+    result = gerar_serie(args.rounds, columns=args.columns, profile=PROFILES[args.core])
+    expected = valores_esperados(result)
+    antigo = normalize_result_texto(result)
+    novo = normalize_result(result)
+    if not (np.array_equal(antigo, expected) and np.array_equal(novo, expected)):
+        raise SystemExit("As implementações não extraem os mesmos valores da série de referência")
+
+    tempo_antigo = min(timeit.repeat(lambda: normalize_result_texto(result), number=1, repeat=args.repeat))
+    tempo_novo = min(timeit.repeat(lambda: normalize_result(result), number=1, repeat=args.repeat))
+
+    print(f"Série: {result.shape[0]} passos x {result.shape[1]} colunas, {expected.size} valores válidos")
+    print(f"Texto + regex: {tempo_antigo * 1e3:8.3f} ms, {len(antigo)} valores extraídos")
+    print(f"Vetorizado:    {tempo_novo * 1e3:8.3f} ms, {len(novo)} valores extraídos")
+    print(f"Speedup: {tempo_antigo / tempo_novo:.1f}x (mesmos valores nas duas)")
+
+    # Diferença de correção, medida à parte: com valores pequenos o to_string usa notação científica
+    # e a regex do caminho antigo deixa de reconhecer os números
+    pequenos = gerar_serie(args.rounds, columns=args.columns, profile=PROFILES[args.core], pequenos=True)
+    expected = valores_esperados(pequenos)
+    antigo = normalize_result_texto(pequenos)
+    novo = normalize_result(pequenos)
+    media_antiga = np.mean(antigo) if antigo else float('nan')
+    print(f"Com valores ~1e-9: esperados {expected.size}, texto + regex {len(antigo)}, vetorizado {len(novo)}")
+    print(f"Média texto: {media_antiga:.6f}  vetorizado: {np.mean(novo):.6f}  esperada: {np.mean(expected):.6f}")
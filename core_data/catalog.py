@@ -0,0 +1,238 @@
+import argparse
+import os
+import re
+import sqlite3
+import time
+from collections import Counter
+
+from .collector import PROFILES
+from .dataset_loader import EXPORTS, FILE_PATTERN
+from .dataset_pack import PACKED_SUFFIX, getsize, logical_names, resolve
+from .ingest_logs import core_of_log
+from .log_index import log_span
+from .log_parser import NS, ROUND_DIR_PATTERN, nf_from_filename, round_windows
+
+DEFAULT_DATABASE = "dataset_catalog.sqlite"
+
+# Colunas do catálogo (um arquivo do Dataset por linha). path é relativo ao diretório do
+# catálogo e sem o sufixo .zst; start/end são o intervalo coberto pelo arquivo (s desde a época)
+COLUMNS = [
+    ("path", "TEXT PRIMARY KEY"),
+    ("core", "TEXT"),
+    ("scenario", "TEXT"),
+    ("round", "INTEGER"),
+    ("kind", "TEXT"),           # log, rate, req, error, tester, timestamps, output
+    ("nf", "TEXT"),
+    ("source", "TEXT"),
+    ("destination", "TEXT"),
+    ("size", "INTEGER"),        # bytes descompactados
+    ("stored_size", "INTEGER"), # bytes em disco
+    ("packed", "INTEGER"),
+    ("mtime", "REAL"),
+    ("start", "REAL"),
+    ("end", "REAL"),
+    ("round_start", "INTEGER"),
+    ("round_end", "INTEGER"),
+    ("test", "TEXT"),           # parallel, division, decrement
+    ("num_ue", "INTEGER"),
+    ("delay", "INTEGER"),       # ms
+    ("factor", "INTEGER"),
+    ("interval", "INTEGER"),    # conexões
+    ("repetition", "INTEGER"),
+]
+INDEXED = [("core", "scenario", "round"), ("kind",), ("nf",), ("test",)]
+
+# Diretório de cenário do connection_test.sh: Parallel_<delay>, Division_<delay>, Decrement_<delay>
+# (no Dataset: Parallel_Test_100, Division_Test, ...)
+SCENARIO_PATTERN = re.compile(r"^(Parallel|Division|Decrement)(?:_Test)?(?:_(\d+))?$", re.I)
+# Saída do my5G-RANTester gravada pelo connection_test.sh:
+# my5grantester_<core>_parallel_<num_ue>_0_<repetição>.csv
+# my5grantester_<core>_<division|decrement>_<num_ue>_<delay>_<fator>_<intervalo>_0_<repetição>.csv
+TESTER_PATTERN = re.compile(r"^my5grantester_([a-z0-9]+)_(parallel|division|decrement)_(\d+)_(?:(\d+)_(\d+)_(\d+)_)?\d+_(\d+)\.csv$")
+TIMESTAMP_FILES = ("timestamps.txt", "timestamp.txt")
+
+# Nomes de colunas entre aspas para o SQL (end é palavra reservada)
+def quoted(names):
+    return ", ".join(f'"{name}"' for name in names)
+
+# Parâmetros do teste pelo nome do diretório do cenário ({} se o nome não segue o padrão)
+def parse_scenario_name(name):
+    match = SCENARIO_PATTERN.match(name)
+    if not match:
+        return {}
+    return {"test": match.group(1).lower(), "delay": int(match.group(2)) if match.group(2) else None}
+
+# Parâmetros do teste pelo nome de um CSV do tester ({} se o nome não segue o padrão)
+def parse_tester_filename(filename):
+    match = TESTER_PATTERN.match(os.path.basename(filename))
+    if not match:
+        return {}
+    core, test, num_ue, delay, factor, interval, repetition = match.groups()
+    return {"core": core, "test": test, "num_ue": int(num_ue), "delay": int(delay) if delay else None,
+            "factor": int(factor) if factor else None, "interval": int(interval) if interval else None,
+            "repetition": int(repetition)}
+
+# Intervalo (s) coberto por um CSV do tester: coluna timestamp, em ns
+def tester_span(path):
+    from .dataset_pack import read_csv
+
+    timestamps = read_csv(path, usecols=["timestamp"])["timestamp"]
+    if timestamps.empty:
+        return None, None
+    return timestamps.min() / NS, timestamps.max() / NS
+
+# Core de um cenário: o dos logs das rodadas ou, sem logs, o do diretório <core>/Dataset
+def scenario_core(scenario_dir, names_by_round):
+    cores = Counter(core_of_log(name) for names in names_by_round.values() for name in names if name.endswith(".log"))
+    cores.pop(None, None)
+    if cores:
+        return cores.most_common(1)[0][0]
+    tree = os.path.basename(os.path.dirname(os.path.dirname(os.path.abspath(scenario_dir)))).lower()
+    return tree if tree in PROFILES else None
+
+# Entrada de um arquivo com os campos comuns preenchidos
+def file_entry(path, relative_to, fields):
+    stored = resolve(path)
+    entry = dict.fromkeys(name for name, _ in COLUMNS)
+    entry.update(path=os.path.relpath(path, relative_to), size=getsize(path), stored_size=os.path.getsize(stored),
+                 packed=int(stored.endswith(PACKED_SUFFIX)), mtime=os.path.getmtime(stored))
+    entry.update(fields)
+    return entry
+
+# Entradas dos arquivos de um cenário (logs das rodadas, exportações, timestamps e CSVs soltos).
+# O intervalo dos logs vem do .idx do log_index.py quando ele existe; com write_index os índices
+# que faltam são gravados ao lado dos logs (senão o Dataset não é alterado).
+def scan_scenario(scenario_dir, relative_to, write_index=False):
+    scenario = os.path.basename(os.path.normpath(scenario_dir))
+    windows = round_windows(scenario_dir)
+    workload = parse_scenario_name(scenario)
+    names = {}
+    for name in os.listdir(scenario_dir):
+        match = ROUND_DIR_PATTERN.match(name)
+        if match and os.path.isdir(os.path.join(scenario_dir, name)):
+            names[int(match.group(1))] = sorted(logical_names(os.listdir(os.path.join(scenario_dir, name))))
+    core = scenario_core(scenario_dir, names)
+    scenario_span = (min(start for start, _ in windows.values()), max(end for _, end in windows.values())) if windows else (None, None)
+    common = dict(workload, core=core, scenario=scenario)
+
+    entries = []
+    for round_id in sorted(names):
+        round_start, round_end = windows.get(round_id, (None, None))
+        for name in names[round_id]:
+            path = os.path.join(scenario_dir, f"test_{round_id}", name)
+            if not name.endswith(".log") or not core_of_log(name):
+                continue
+            log_core = core_of_log(name)
+            first_ns, last_ns = log_span(path, log_core, round_start * NS if round_start is not None else None, write_index)
+            entries.append(file_entry(path, relative_to, dict(common, core=log_core, round=round_id, kind="log",
+                                      nf=nf_from_filename(name, PROFILES[log_core]),
+                                      start=first_ns / NS if first_ns is not None else None,
+                                      end=last_ns / NS if last_ns is not None else None,
+                                      round_start=round_start, round_end=round_end)))
+
+    for subdir, suffix, _ in EXPORTS.values():
+        directory = os.path.join(scenario_dir, subdir)
+        if not os.path.isdir(directory):
+            continue
+        for name in sorted(logical_names(os.listdir(directory))):
+            match = FILE_PATTERN.match(name)
+            if match and match.group(3) == suffix:
+                entries.append(file_entry(os.path.join(directory, name), relative_to, dict(common, kind=subdir,
+                                          source=match.group(1), destination=match.group(2),
+                                          start=scenario_span[0], end=scenario_span[1])))
+
+    for name in sorted(logical_names(os.listdir(scenario_dir))):
+        path = os.path.join(scenario_dir, name)
+        if os.path.isdir(path):
+            continue
+        if name in TIMESTAMP_FILES:
+            entries.append(file_entry(path, relative_to, dict(common, kind="timestamps", start=scenario_span[0], end=scenario_span[1])))
+        elif TESTER_PATTERN.match(name):
+            start, end = tester_span(path)
+            entries.append(file_entry(path, relative_to, dict(common, **parse_tester_filename(name), kind="tester", start=start, end=end)))
+        elif name.startswith("output_") and name.endswith(".csv"):
+            entries.append(file_entry(path, relative_to, dict(common, kind="output", start=scenario_span[0], end=scenario_span[1])))
+    return entries
+
+# Percorre os diretórios Dataset (uma única vez) e grava o catálogo, substituindo o anterior.
+# Retorna o número de arquivos catalogados.
+def build_catalog(roots, database=DEFAULT_DATABASE, write_index=False):
+    relative_to = os.path.dirname(os.path.abspath(database))
+    entries = []
+    for root in roots:
+        for name in sorted(os.listdir(root)):
+            if os.path.isdir(os.path.join(root, name)):
+                entries += scan_scenario(os.path.join(root, name), relative_to, write_index)
+
+    names = [name for name, _ in COLUMNS]
+    with sqlite3.connect(database) as connection:
+        connection.execute("DROP TABLE IF EXISTS files")
+        connection.execute(f"CREATE TABLE files ({', '.join(f'{quoted([name])} {kind}' for name, kind in COLUMNS)})")
+        for columns in INDEXED:
+            connection.execute(f"CREATE INDEX files_{'_'.join(columns)} ON files ({quoted(columns)})")
+        connection.executemany(f"INSERT INTO files VALUES ({', '.join('?' * len(names))})",
+                               [tuple(entry[name] for name in names) for entry in entries])
+    connection.close()
+    return len(entries)
+
+# Consulta o catálogo com filtros de igualdade (listas viram IN) e devolve um DataFrame com o
+# caminho de cada arquivo já relativo ao diretório atual
+# (ex.: read_catalog(kind="log", core="free5gc", nf=["pcf", "nssf"], round=3))
+def read_catalog(database=DEFAULT_DATABASE, columns=None, **predicates):
+    import pandas as pd
+
+    names = [name for name, _ in COLUMNS]
+    for name in list(predicates) + list(columns or []):
+        if name not in names:
+            raise ValueError(f"Coluna desconhecida no catálogo: {name}")
+    conditions, parameters = [], []
+    for name, value in predicates.items():
+        if isinstance(value, (list, tuple, set)):
+            conditions.append(f"{quoted([name])} IN ({', '.join('?' * len(value))})")
+            parameters += list(value)
+        else:
+            conditions.append(f"{quoted([name])} = ?")
+            parameters.append(value)
+    selected = ["path"] + [name for name in columns if name != "path"] if columns else names
+    query = f"SELECT {quoted(selected)} FROM files" + (f" WHERE {' AND '.join(conditions)}" if conditions else "") + " ORDER BY path"
+    with sqlite3.connect(f"file:{database}?mode=ro", uri=True) as connection:
+        data = pd.read_sql_query(query, connection, params=parameters)
+    connection.close()
+    base = os.path.relpath(os.path.dirname(os.path.abspath(database)))
+    data["path"] = [os.path.normpath(os.path.join(base, path)) for path in data["path"]]
+    return data
+
+# Caminhos dos arquivos que atendem aos filtros
+def find_paths(database=DEFAULT_DATABASE, **predicates):
+    return read_catalog(database, ["path"], **predicates)["path"].tolist()
+
+# Converte "chave=valor[,valor...]" da linha de comando em um filtro, com inteiros nas colunas numéricas
+def parse_predicate(text):
+    name, _, value = text.partition("=")
+    values = [int(item) if dict(COLUMNS).get(name, "").startswith("INTEGER") else item for item in value.split(",")]
+    return name, values if len(values) > 1 else values[0]
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build a SQLite catalog of every Dataset file (core, scenario, round, NF, kind, size, time span, workload parameters) and query it.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    build = subparsers.add_parser("build", help="Scan the Dataset directories once and (re)write the catalog")
+    build.add_argument("roots", nargs='+', type=str, help="Dataset directories (e.g. Free5GC/Dataset Open5GS/Dataset)")
+    build.add_argument("--database", type=str, default=DEFAULT_DATABASE, help="SQLite file")
+    build.add_argument("--write_index", action="store_true", help="Also save the log_index.py sidecar (.log.idx) of every log that lacks an up-to-date one")
+
+    query = subparsers.add_parser("query", help="List the catalogued files that match the filters")
+    query.add_argument("--database", type=str, default=DEFAULT_DATABASE, help="SQLite file")
+    query.add_argument("--where", nargs='*', default=[], help="Equality filters, e.g. kind=log nf=pcf,nssf round=3 scenario=Division_Test")
+    query.add_argument("--columns", nargs='*', default=None, help="Columns to print (default: all)")
+
+    args = parser.parse_args()
+
+    inicio = time.perf_counter()
+    if args.command == "build":
+        count = build_catalog(args.roots, args.database, args.write_index)
+        print(f"{count} arquivos catalogados em {args.database} em {time.perf_counter() - inicio:.2f} s")
+    else:
+        data = read_catalog(args.database, args.columns, **dict(parse_predicate(text) for text in args.where))
+        print(data.to_string(index=False))
+        print(f"{len(data)} arquivos em {(time.perf_counter() - inicio) * 1e3:.1f} ms")
@@ -0,0 +1,44 @@
+import os
+import shutil
+import threading
+
+import pandas as pd
+
+# Checkpoint em disco dos resultados parciais de cada intervalo de uma coleta.
+# Cada intervalo concluído é gravado em <output_csv>.checkpoint/<start>-<end>/,
+# de forma atômica, e é reaproveitado quando a coleta é reiniciada.
+class IntervalCheckpoint:
+    def __init__(self, output_csv):
+        self.directory = f"{output_csv}.checkpoint"
+
+    def _path(self, start, end):
+        return os.path.join(self.directory, f"{int(start)}-{int(end)}")
+
+    # Retorna {nome: DataFrame} do intervalo, ou None se ele ainda não foi concluído
+    def load(self, start, end):
+        path = self._path(start, end)
+        if not os.path.isdir(path):
+            return None
+        return {name[:-len(".csv")]: pd.read_csv(os.path.join(path, name), index_col=0, float_precision="round_trip")
+                for name in os.listdir(path) if name.endswith(".csv")}
+
+    # Grava os DataFrames do intervalo; o diretório só aparece quando está completo
+    def save(self, start, end, frames):
+        path = self._path(start, end)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        os.makedirs(tmp_path, exist_ok=True)
+        for name, data in frames.items():
+            data.to_csv(os.path.join(tmp_path, f"{name}.csv"))
+        shutil.rmtree(path, ignore_errors=True)
+        os.replace(tmp_path, path)
+
+    # Lista os intervalos já concluídos
+    def completed(self):
+        if not os.path.isdir(self.directory):
+            return []
+        return sorted(tuple(int(value) for value in name.split("-"))
+                      for name in os.listdir(self.directory) if not name.endswith(".tmp"))
+
+    # Remove o checkpoint depois que o CSV final foi gravado
+    def clear(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
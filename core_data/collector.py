@@ -0,0 +1,284 @@
+import argparse
+import importlib.util
+import os
+import re
+
+import numpy as np
+import pandas as pd
+
+from .checkpoint import IntervalCheckpoint
+from .intervals import timestamp_to_datetime, redefine_date, get_timestamps_from_directory
+from .prometheus_pool import close_clients, stats as prometheus_stats
+from .query_executor import add_executor_arguments, executor_from_args, run_for_directories
+from .span_fetch import SpanFetcher
+
+# Raiz do repositório: o pacote core_data fica ao lado das árvores Free5GC/ e Open5GS/
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Perfil de cada core: árvore no repositório, namespace, prefixo dos apps, NFs e renomeações
+# (nome no Prometheus -> nome no CSV)
+PROFILES = {
+    "free5gc": {
+        "tree": "Free5GC",
+        "prometheus_url": "http://localhost:37877",
+        "namespace": "free5gc",
+        "app_prefix": "free5gc-",
+        "nfs": ['amf', 'ausf', 'bsf', 'nrf', 'nssf', 'pcf', 'smf', 'udm', 'udr', 'upf'],
+        "resource_nfs": ['amf', 'ausf', 'nrf', 'nssf', 'pcf', 'smf', 'udm', 'udr', 'upf'],
+        "renames": {},
+        # NFs que não existem no core e aparecem como '-' nas matrizes
+        "masked": ['bsf'],
+    },
+    "open5gs": {
+        "tree": "Open5GS",
+        "prometheus_url": "http://localhost:37877",
+        "namespace": "cemenin",
+        "app_prefix": "open5gs-",
+        "nfs": ['amf', 'ausf', 'bsf', 'nrf', 'nssf', 'pcf', 'smf', 'udm', 'udr', 'upf'],
+        "resource_nfs": ['amf', 'ausf', 'bsf', 'nrf', 'nssf', 'pcf', 'smf', 'udm', 'udr', 'upf'],
+        "renames": {'upf-1': 'upf'},
+        "masked": [],
+    },
+}
+
+DEFAULT_CORE = "free5gc"
+
+# Famílias de métricas NF x NF e o CSV gerado para cada uma
+MATRIX_OUTPUTS = {
+    "rate": "output_rate.csv",
+    "duration": "output_req.csv",
+    "error": "output_error.csv",
+}
+RESOURCES_OUTPUT = "output.csv"
+RESOURCE_COLUMNS = ["mean_cpu_usage", "mean_memory_usage", "mean_receive_bytes", "mean_transmit_bytes"]
+# Passo (em segundos) das séries consultadas em cada intervalo
+STEP_SECONDS = 30
+
+# Carrega um dos scripts por par de um core (ex.: Free5GC/Data/getdata.py) com um nome de módulo
+# próprio (free5gc_getdata), para que os scripts homônimos dos dois cores convivam no mesmo processo
+def load_core_script(core, name):
+    path = os.path.join(REPO_ROOT, PROFILES[core]["tree"], "Data", f"{name}.py")
+    spec = importlib.util.spec_from_file_location(f"{core}_{name}", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+# Extrai os valores do DataFrame retornado, descartando NaN/Inf (passos sem amostra ou divisão por zero)
+def normalize_result(result):
+    values = np.asarray(result, dtype=float).ravel()
+    return values[np.isfinite(values)]
+
+def mean_calc(float_values):
+    if len(float_values):
+        return float(np.mean(float_values))
+    return None
+
+# Rótulos (label="valor") do nome de uma coluna do resultado
+def parse_labels(column):
+    return dict(re.findall(r'(\w+)="([^"]*)"', column))
+
+# Monta as consultas agrupadas de todas as famílias para um perfil.
+# Cada consulta traz todos os pares (ou todas as NFs) de uma vez.
+def build_queries(profile):
+    namespace = profile["namespace"]
+    prefix = profile["app_prefix"]
+    selector = f'namespace="{namespace}", reporter="destination"'
+    owner = f'namespace_workload_pod:kube_pod_owner:relabel{{cluster="", namespace="{namespace}", workload=~"{prefix}.*"}}'
+    return {
+        "rate": f'sum by (source_app, destination_app) (rate(istio_requests_total{{{selector}}}[2m0s]))',
+        # Sem agregação: cada série (response_code, pod, ...) entra na média, como no getrequest.py
+        "duration": (
+            f'increase(istio_request_duration_milliseconds_sum{{{selector}}}[1m0s])/'
+            f'increase(istio_request_duration_milliseconds_count{{{selector}}}[1m0s])'
+        ),
+        "error": f'sum by (source_app, destination_app) (rate(istio_requests_total{{{selector}, response_code!~"200|201|204"}}[2m0s]))',
+        "mean_cpu_usage": (
+            f'sum(node_namespace_pod_container:container_cpu_usage_seconds_total:sum_irate{{cluster="", namespace="{namespace}"}} '
+            f'* on(namespace,pod) group_left(workload, workload_type) {owner}) by (workload)'
+        ),
+        "mean_memory_usage": (
+            f'sum(container_memory_working_set_bytes{{job="kubelet", metrics_path="/metrics/cadvisor", cluster="", namespace="{namespace}", container!="", image!=""}} '
+            f'* on(namespace,pod) group_left(workload, workload_type) {owner}) by (workload)'
+        ),
+        "mean_receive_bytes": (
+            f'sum(rate(container_network_receive_bytes_total{{job="kubelet", metrics_path="/metrics/cadvisor", cluster="", namespace="{namespace}"}}[2m0s]) '
+            f'* on (namespace,pod) group_left(workload,workload_type) {owner}) by (workload)'
+        ),
+        "mean_transmit_bytes": (
+            f'sum(rate(container_network_transmit_bytes_total{{job="kubelet", metrics_path="/metrics/cadvisor", cluster="", namespace="{namespace}"}}[2m0s]) '
+            f'* on (namespace,pod) group_left(workload,workload_type) {owner}) by (workload)'
+        ),
+    }
+
+# Rótulos que identificam cada valor de uma família no resultado
+def family_labels(family):
+    return ("source_app", "destination_app") if family in MATRIX_OUTPUTS else ("workload",)
+
+# Consulta instantânea, avaliada em end, que calcula no próprio Prometheus a média do intervalo:
+# soma e contagem de todas as amostras finitas que o query_range com passo de 30s retornaria
+# entre start e end (inclusive), agrupadas pelos rótulos da família. As subconsultas são
+# alinhadas a múltiplos do passo, assim como start e end (ver redefine_date).
+def aggregate_query(query_string, labels, start, end, step=STEP_SECONDS):
+    window = f"{int(end - start) + step // 2}s:{step}s"
+    finite = f"(({query_string}) > -Inf < +Inf)"
+    by = f"by ({', '.join(labels)})"
+    return (f"sum {by} (sum_over_time({finite}[{window}])) / "
+            f"sum {by} (count_over_time({finite}[{window}]))")
+
+# Converte o vetor de uma consulta instantânea no formato de colunas do query_range
+def vector_to_frame(result):
+    return result.to_frame().T
+
+# Converte o valor de um label (ex.: 'open5gs-upf-1') no nome da NF usado nos CSVs
+def nf_name(value, profile):
+    name = value.removeprefix(profile["app_prefix"])
+    return profile["renames"].get(name, name)
+
+# Agrupa as colunas do resultado pelos rótulos indicados, retornando {chave: [colunas]}
+def group_columns(result, label_names, profile):
+    groups = {}
+    for column in result.columns:
+        labels = parse_labels(column)
+        key = tuple(nf_name(labels.get(name, ''), profile) for name in label_names)
+        groups.setdefault(key, []).append(column)
+    return groups
+
+# Matriz NF x NF de um intervalo: média de todos os valores de cada par (0 sem tráfego)
+def matrix_from_result(result, profile):
+    nfs = profile["nfs"]
+    data = pd.DataFrame(0.0, index=nfs, columns=nfs)
+    for (source_app, dest_app), columns in group_columns(result, ("source_app", "destination_app"), profile).items():
+        if source_app in nfs and dest_app in nfs:
+            normalized_values = normalize_result(result[columns])
+            data.at[source_app, dest_app] = mean_calc(normalized_values) if len(normalized_values) else 0
+    return data
+
+# Média por NF de uma métrica de recursos em um intervalo (0 sem dados)
+def resources_from_result(result, profile):
+    values = pd.Series(0.0, index=profile["resource_nfs"])
+    for (workload,), columns in group_columns(result, ("workload",), profile).items():
+        if workload in values.index:
+            normalized_values = normalize_result(result[columns])
+            values[workload] = mean_calc(normalized_values) if len(normalized_values) else 0
+    return values
+
+# Combina as matrizes dos intervalos: média apenas dos intervalos em que o par teve dados
+def combine_matrices(matrices, profile):
+    nfs = profile["nfs"]
+    stacked = np.stack([matrix.to_numpy(dtype=float) for matrix in matrices]) if matrices else np.zeros((0, len(nfs), len(nfs)))
+    positive = stacked > 0
+    sums = np.where(positive, stacked, 0.0).sum(axis=0)
+    counts = positive.sum(axis=0)
+    combined = pd.DataFrame(np.divide(sums, counts, out=np.zeros_like(sums), where=counts > 0), index=nfs, columns=nfs)
+
+    # NFs inexistentes no core ficam marcadas com '-'
+    masked = [nf for nf in profile["masked"] if nf in nfs]
+    if masked:
+        combined = combined.astype(object)
+        combined.loc[masked, :] = '-'
+        combined.loc[:, masked] = '-'
+    return combined
+
+# Combina os recursos dos intervalos: média por NF
+def combine_resources(intervals):
+    full_data = pd.concat(intervals)
+    return full_data.groupby(full_data.index).mean()
+
+# Coleta todas as famílias de métricas de um diretório em uma única varredura dos
+# intervalos e grava os CSVs de saída. Retorna {nome do arquivo: DataFrame}.
+# Com server_side, cada família é agregada no Prometheus e só a média do intervalo é transferida;
+# com bulk, cada família é buscada uma única vez para a janela de todas as rodadas.
+def collect_directory(directory, profile, executor, server_side=False, bulk=False):
+    start_end_timestamps = get_timestamps_from_directory(directory)
+    if bulk:
+        executor = SpanFetcher(executor, [(redefine_date(timestamp_to_datetime(start)), redefine_date(timestamp_to_datetime(end)))
+                                          for start, end in start_end_timestamps])
+    queries = build_queries(profile)
+    # Intervalos já concluídos em uma execução anterior são lidos do checkpoint
+    checkpoint = IntervalCheckpoint(f"{directory}/collector")
+
+    # Dispara as consultas de todos os intervalos de uma vez; o executor limita quantas rodam em paralelo
+    interval_futures = []
+    for start, end in start_end_timestamps:
+        start = redefine_date(timestamp_to_datetime(start))
+        end = redefine_date(timestamp_to_datetime(end))
+        saved = checkpoint.load(start, end)
+        if saved is not None:
+            futures = {}
+        elif server_side:
+            futures = {name: executor.query(aggregate_query(query_string, family_labels(name), start, end), end)
+                       for name, query_string in queries.items()}
+        else:
+            futures = {name: executor.query_range(query_string, start, end, f"{STEP_SECONDS}s")
+                       for name, query_string in queries.items()}
+        interval_futures.append((start, end, saved, futures))
+
+    matrices = {family: [] for family in MATRIX_OUTPUTS}
+    resources = []
+    for start, end, saved, futures in interval_futures:
+        if saved is None:
+            results = {name: future.result() for name, future in futures.items()}
+            if server_side:
+                results = {name: vector_to_frame(result) for name, result in results.items()}
+            saved = {family: matrix_from_result(results[family], profile) for family in MATRIX_OUTPUTS}
+            saved["resources"] = pd.DataFrame({column: resources_from_result(results[column], profile)
+                                               for column in RESOURCE_COLUMNS})
+            checkpoint.save(start, end, saved)
+        else:
+            print(f"Retomando o intervalo {int(start)}-{int(end)} do checkpoint de {directory}")
+        for family in MATRIX_OUTPUTS:
+            matrices[family].append(saved[family])
+        resources.append(saved["resources"])
+
+    outputs = {}
+    for family, filename in MATRIX_OUTPUTS.items():
+        outputs[filename] = combine_matrices(matrices[family], profile)
+    outputs[RESOURCES_OUTPUT] = combine_resources(resources)
+
+    for filename, data in outputs.items():
+        data.to_csv(f"{directory}/{filename}")
+    checkpoint.clear()
+    return outputs
+
+# Nome do heatmap de cada família, como nos scripts individuais (Heatmap_Rate_Free5GC.png, ...)
+HEATMAP_NAMES = {"rate": "Rate", "duration": "Duration", "error": "Errors"}
+
+# Gera os mesmos gráficos dos scripts individuais a partir dos CSVs coletados
+def generate_plots(directories, profile, families=MATRIX_OUTPUTS, resources=True):
+    from .plots import generate_heatmaps_for_directories, generate_stacked_barplots_per_component
+
+    for family in families:
+        generate_heatmaps_for_directories(directories, f"Heatmap_{HEATMAP_NAMES[family]}_{profile['tree']}.png", MATRIX_OUTPUTS[family])
+    if resources:
+        generate_stacked_barplots_per_component([f"{directory}/{RESOURCES_OUTPUT}" for directory in directories])
+
+# Linha de comando; as árvores Free5GC/Data e Open5GS/Data chamam main com o próprio core como padrão
+def main(argv=None, default_core=DEFAULT_CORE):
+    parser = argparse.ArgumentParser(description="Collect request rate, duration, error rate and resource metrics from Prometheus in one sweep.")
+    parser.add_argument("directories", nargs='+', type=str, help="List of directories containing the timestamps file.")
+    parser.add_argument("--core", choices=sorted(PROFILES), default=default_core, help="Core network profile (namespace, NF list, renames)")
+    parser.add_argument("--prometheus_url", type=str, default=None, help="Prometheus URL (defaults to the profile URL)")
+    parser.add_argument("--plots", action="store_true", help="Also generate the heatmaps and stacked bar plots")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--server_side", action="store_true", help="Average each interval inside Prometheus with one instant query per metric family")
+    mode.add_argument("--bulk", action="store_true", help="Fetch each metric family once for the whole experiment and slice the rounds locally")
+    add_executor_arguments(parser)
+
+    args = parser.parse_args(argv)
+
+    profile = PROFILES[args.core]
+    executor = executor_from_args(args.prometheus_url or profile["prometheus_url"], args)
+
+    # Coleta os diretórios em paralelo, compartilhando o mesmo limite de consultas
+    try:
+        run_for_directories(lambda directory: collect_directory(directory, profile, executor, args.server_side, args.bulk), args.directories, args.workers)
+    finally:
+        executor.shutdown()
+    print(f"Prometheus: {prometheus_stats}")
+    close_clients()
+
+    if args.plots:
+        generate_plots(args.directories, profile)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+import argparse
+import io
+import os
+import re
+import time
+
+import numpy as np
+import pandas as pd
+
+from .collector import PROFILES, DEFAULT_CORE, combine_matrices, generate_plots
+from .dataset_pack import listdir, open_file
+
+# Exportações do Dataset: subdiretório, sufixo dos arquivos por par de NFs e CSV gerado
+EXPORTS = {
+    "rate": ("rate", "_output_rate.csv", "output_rate.csv"),
+    "duration": ("req", "_output_request.csv", "output_req.csv"),
+    "error": ("error", "_output_error.csv", "output_error.csv"),
+}
+
+# Nome dos arquivos exportados: <origem>_<destino><sufixo>
+FILE_PATTERN = re.compile(r"^([a-z0-9-]+)_([a-z0-9-]+)(_output_\w+\.csv)$")
+
+# Lê uma exportação separada por tabulação (coluna 'Test' com a rodada e uma coluna por série,
+# com o conjunto de labels do Istio entre aspas no cabeçalho) com uma única leitura do arquivo.
+# O cabeçalho só traz as séries da primeira rodada: séries que aparecem depois ocupam colunas
+# extras sem nome, então a largura é a da maior linha. Os labels não são usados aqui.
+def read_export(path):
+    with open_file(path) as f:
+        f.readline()
+        body = f.read()
+    width = max((line.count('\t') for line in body.splitlines()), default=0) + 1
+    data = pd.read_csv(io.StringIO(body), sep='\t', header=None, names=range(width), dtype=float, engine='c')
+    rounds = data.iloc[:, 0].to_numpy()
+    values = data.iloc[:, 1:].to_numpy()
+    return rounds, values
+
+# Média de cada rodada de uma exportação, como o coletor faria sobre o Prometheus:
+# rate e error são somados entre as séries a cada passo (a consulta usa sum(...)),
+# duration usa todas as amostras de todas as séries. Retorna {rodada: média}.
+def round_means(rounds, values, family):
+    if family == "duration":
+        samples = values
+    else:
+        present = ~np.isnan(values)
+        samples = np.where(present.any(axis=1), np.nansum(values, axis=1), np.nan)[:, None]
+    finite = np.isfinite(samples)
+    keys, inverse = np.unique(rounds, return_inverse=True)
+    sums = np.bincount(inverse, weights=np.where(finite, samples, 0.0).sum(axis=1), minlength=len(keys))
+    counts = np.bincount(inverse, weights=finite.sum(axis=1), minlength=len(keys))
+    return {int(key): sums[k] / counts[k] for k, key in enumerate(keys) if counts[k] > 0}
+
+# Monta a matriz NF x NF combinada de uma família a partir das exportações de um cenário
+def load_matrix(scenario_dir, family, profile):
+    subdir, suffix, _ = EXPORTS[family]
+    nfs = profile["nfs"]
+    per_round = {}
+    for name in sorted(listdir(os.path.join(scenario_dir, subdir))):
+        match = FILE_PATTERN.match(name)
+        if not match or match.group(3) != suffix:
+            continue
+        source_app, dest_app = match.group(1), match.group(2)
+        if source_app not in nfs or dest_app not in nfs:
+            continue
+        rounds, values = read_export(os.path.join(scenario_dir, subdir, name))
+        for round_id, mean_value in round_means(rounds, values, family).items():
+            matrix = per_round.setdefault(round_id, pd.DataFrame(0.0, index=nfs, columns=nfs))
+            matrix.at[source_app, dest_app] = mean_value
+    return combine_matrices([per_round[round_id] for round_id in sorted(per_round)], profile)
+
+# Gera os CSVs de todas as famílias exportadas em um cenário. Retorna {nome do arquivo: DataFrame}.
+def build_scenario(scenario_dir, profile, output_dir=None):
+    output_dir = output_dir or scenario_dir
+    os.makedirs(output_dir, exist_ok=True)
+    outputs = {}
+    for family, (subdir, _, filename) in EXPORTS.items():
+        if os.path.isdir(os.path.join(scenario_dir, subdir)):
+            outputs[filename] = load_matrix(scenario_dir, family, profile)
+            outputs[filename].to_csv(os.path.join(output_dir, filename))
+    return outputs
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the NF x NF matrices and heatmaps from the exported Dataset CSVs, without Prometheus.")
+    parser.add_argument("directories", nargs='+', type=str, help="Dataset scenario directories (with the rate, req and error subdirectories)")
+    parser.add_argument("--core", choices=sorted(PROFILES), default=DEFAULT_CORE, help="Core network profile (NF list and masked NFs)")
+    parser.add_argument("--output_dir", type=str, default=None, help="Write the CSVs to <output_dir>/<scenario> instead of the scenario directory")
+    parser.add_argument("--no_plots", action="store_true", help="Only write the CSVs")
+    args = parser.parse_args()
+
+    profile = PROFILES[args.core]
+    inicio = time.perf_counter()
+    output_dirs = []
+    filenames = set()
+    for directory in args.directories:
+        output_dir = os.path.join(args.output_dir, os.path.basename(os.path.normpath(directory))) if args.output_dir else directory
+        filenames.update(build_scenario(directory, profile, output_dir))
+        output_dirs.append(output_dir)
+    print(f"Matrizes de {len(args.directories)} cenários geradas em {time.perf_counter() - inicio:.2f} s")
+
+    if not args.no_plots:
+        # Heatmaps das famílias disponíveis, como os do collector.py
+        generate_plots(output_dirs, profile, [family for family, (_, _, filename) in EXPORTS.items() if filename in filenames], resources=False)
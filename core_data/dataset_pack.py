@@ -0,0 +1,318 @@
+import argparse
+import bisect
+import contextlib
+import hashlib
+import io
+import mmap
+import os
+import struct
+import time
+
+# Arquivos compactados ficam ao lado do nome original: free5gc-pcf-1.log -> free5gc-pcf-1.log.zst
+PACKED_SUFFIX = ".zst"
+# Extensões compactadas pelo pack (os timestamp.txt ficam em texto, para os scripts de shell)
+PACKED_EXTENSIONS = (".log", ".csv")
+# Tamanho (descomprimido) de cada frame zstd; os frames terminam sempre em '\n'
+FRAME_SIZE = 1 << 20
+DEFAULT_LEVEL = 9
+
+# Tabela de frames do formato seekable do zstd (contrib/seekable_format): um frame "skippable"
+# no fim do arquivo com (tamanho comprimido, tamanho descomprimido) de cada frame, seguido do
+# número de frames, de um byte de flags e do magic number do formato
+SKIPPABLE_MAGIC = 0x184D2A5E
+SEEKABLE_MAGIC = 0x8F92EAB1
+ENTRY = struct.Struct("<II")
+FOOTER = struct.Struct("<IBI")
+CHECKSUM_FLAG = 0x80
+
+# Caminho do arquivo em disco: o original, se existir, ou a versão compactada
+def resolve(path):
+    if not os.path.exists(path) and os.path.exists(path + PACKED_SUFFIX):
+        return path + PACKED_SUFFIX
+    return path
+
+def is_packed(path):
+    return resolve(path).endswith(PACKED_SUFFIX)
+
+# Nomes de um diretório como se nada estivesse compactado (x.log.zst aparece como x.log)
+def listdir(directory):
+    return logical_names(os.listdir(directory))
+
+def logical_names(names):
+    return list(dict.fromkeys(name[:-len(PACKED_SUFFIX)] if name.endswith(PACKED_SUFFIX) else name for name in names))
+
+# Tamanho descomprimido (lido da tabela de frames, sem descomprimir nada)
+def getsize(path):
+    if not is_packed(path):
+        return os.path.getsize(path)
+    with open(resolve(path), "rb") as f:
+        _, sizes = read_seek_table(f)
+    return sum(sizes)
+
+def getmtime(path):
+    return os.path.getmtime(resolve(path))
+
+# Lê a tabela de frames do fim de um arquivo seekable: ([tamanhos comprimidos], [tamanhos descomprimidos])
+def read_seek_table(f):
+    f.seek(-FOOTER.size, os.SEEK_END)
+    count, flags, magic = FOOTER.unpack(f.read(FOOTER.size))
+    if magic != SEEKABLE_MAGIC:
+        raise ValueError(f"{f.name}: não é um arquivo zstd seekable")
+    entry_size = ENTRY.size + (4 if flags & CHECKSUM_FLAG else 0)
+    f.seek(-FOOTER.size - count * entry_size, os.SEEK_END)
+    table = f.read(count * entry_size)
+    entries = [ENTRY.unpack_from(table, k * entry_size) for k in range(count)]
+    return [entry[0] for entry in entries], [entry[1] for entry in entries]
+
+# Leitor de um arquivo seekable: seek() em qualquer offset descomprime só o frame que o contém
+# (o último frame lido fica em memória). Usado através de open_file, que o envolve em um
+# BufferedReader / TextIOWrapper.
+class SeekableReader(io.RawIOBase):
+    def __init__(self, path):
+        import zstandard
+
+        self.name = path
+        self._file = open(path, "rb")
+        compressed, sizes = read_seek_table(self._file)
+        self._starts = [0]        # offset comprimido de cada frame
+        self._offsets = [0]       # offset descomprimido de cada frame
+        for compressed_size, size in zip(compressed, sizes):
+            self._starts.append(self._starts[-1] + compressed_size)
+            self._offsets.append(self._offsets[-1] + size)
+        self.size = self._offsets[-1]
+        self._decompressor = zstandard.ZstdDecompressor()
+        self._position = 0
+        self._current = -1
+        self._data = b""
+
+    @property
+    def frame_count(self):
+        return len(self._offsets) - 1
+
+    # Bytes descomprimidos do frame k
+    def frame(self, k):
+        if k != self._current:
+            self._file.seek(self._starts[k])
+            self._data = self._decompressor.decompress(self._file.read(self._starts[k + 1] - self._starts[k]))
+            self._current = k
+        return self._data
+
+    # Frame que contém o offset descomprimido
+    def frame_of(self, offset):
+        return bisect.bisect_right(self._offsets, offset) - 1
+
+    def frame_offset(self, k):
+        return self._offsets[k]
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def tell(self):
+        return self._position
+
+    def seek(self, offset, whence=os.SEEK_SET):
+        if whence == os.SEEK_CUR:
+            offset += self._position
+        elif whence == os.SEEK_END:
+            offset += self.size
+        self._position = max(offset, 0)
+        return self._position
+
+    def readinto(self, buffer):
+        if self._position >= self.size:
+            return 0
+        k = self.frame_of(self._position)
+        data = self.frame(k)
+        start = self._position - self._offsets[k]
+        count = min(len(buffer), len(data) - start)
+        buffer[:count] = data[start:start + count]
+        self._position += count
+        return count
+
+    # Leitura até o fim, frame a frame (sem passar pelos blocos de 8 KiB do RawIOBase)
+    def readall(self):
+        if self._position >= self.size:
+            return b""
+        k = self.frame_of(self._position)
+        parts = [self.frame(k)[self._position - self._offsets[k]:]]
+        parts += [self.frame(j) for j in range(k + 1, self.frame_count)]
+        self._position = self.size
+        return b"".join(parts)
+
+    def close(self):
+        if not self.closed:
+            self._file.close()
+        super().close()
+
+# Abre um arquivo do Dataset compactado ou não, com a mesma interface do open() (só leitura)
+def open_file(path, mode="r", encoding=None, errors=None, newline=None):
+    if not is_packed(path):
+        return open(path, mode, encoding=encoding, errors=errors, newline=newline)
+    if "w" in mode or "a" in mode or "+" in mode:
+        raise ValueError(f"{path}: arquivos compactados são só de leitura")
+    reader = io.BufferedReader(SeekableReader(resolve(path)), buffer_size=FRAME_SIZE)
+    if "b" in mode:
+        return reader
+    return io.TextIOWrapper(reader, encoding=encoding, errors=errors, newline=newline)
+
+# pd.read_csv de um arquivo compactado ou não (o parser C do pandas lê o stream binário)
+def read_csv(path, **kwargs):
+    import pandas as pd
+
+    if not is_packed(path):
+        return pd.read_csv(path, **kwargs)
+    with open_file(path, "rb") as f:
+        return pd.read_csv(f, **kwargs)
+
+# pd.read_csv em blocos de chunksize linhas (o arquivo fica aberto até o último bloco)
+def read_csv_chunks(path, chunksize, **kwargs):
+    import pandas as pd
+
+    with open_file(path, "rb") as f, pd.read_csv(f, chunksize=chunksize, **kwargs) as reader:
+        yield from reader
+
+# Conteúdo inteiro de um arquivo para buscas com regex: mmap do original ou os bytes descomprimidos
+@contextlib.contextmanager
+def mapped(path):
+    if is_packed(path):
+        with open_file(path, "rb") as f:
+            yield f.read()
+        return
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            yield b""
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            yield data
+
+# Divide data[start:end] em blocos de ~chunk bytes terminados em '\n' (nenhum bloco corta uma linha)
+def newline_blocks(data, start, end, chunk):
+    while start < end:
+        stop = data.rfind(b"\n", start, start + chunk) + 1 if start + chunk < end else end
+        if stop <= start:  # linha maior que o bloco
+            stop = data.find(b"\n", start + chunk, end) + 1 or end
+        yield data[start:stop]
+        start = stop
+
+# Blocos de bytes de um arquivo a partir do byte start (o início de uma linha). Nos arquivos
+# compactados cada frame termina em '\n', então os blocos saem de um frame de cada vez.
+def iter_blocks(path, start=0, chunk=FRAME_SIZE):
+    if not is_packed(path):
+        with mapped(path) as data:
+            yield from newline_blocks(data, start, len(data), chunk)
+        return
+    with SeekableReader(resolve(path)) as reader:
+        k = reader.frame_of(start)
+        while 0 <= k < reader.frame_count:
+            data = reader.frame(k)
+            yield from newline_blocks(data, max(start - reader.frame_offset(k), 0), len(data), chunk)
+            k += 1
+
+# Compacta um arquivo em frames de ~frame_size bytes terminados em '\n', com a tabela de frames
+# no fim. Retorna o tamanho compactado.
+def write_seekable(source, output, level=DEFAULT_LEVEL, frame_size=FRAME_SIZE):
+    import zstandard
+
+    compressor = zstandard.ZstdCompressor(level=level)
+    entries = []
+    with open(source, "rb") as src, open(output, "wb") as dst:
+        def write_frame(data):
+            frame = compressor.compress(data)
+            dst.write(frame)
+            entries.append((len(frame), len(data)))
+
+        pending = b""
+        while block := src.read(frame_size):
+            pending += block
+            cut = pending.rfind(b"\n") + 1
+            if cut:
+                write_frame(pending[:cut])
+                pending = pending[cut:]
+        if pending:
+            write_frame(pending)
+
+        table = b"".join(ENTRY.pack(*entry) for entry in entries) + FOOTER.pack(len(entries), 0, SEEKABLE_MAGIC)
+        dst.write(struct.pack("<II", SKIPPABLE_MAGIC, len(table)) + table)
+        return dst.tell()
+
+def file_digest(f):
+    digest = hashlib.sha256()
+    while block := f.read(FRAME_SIZE):
+        digest.update(block)
+    return digest.digest()
+
+# Compacta um arquivo e, se a versão compactada descomprime para o mesmo conteúdo, remove o
+# original (a data de modificação é mantida: o ano dos logs do Open5GS depende dela).
+# Retorna (tamanho original, tamanho compactado).
+def pack_file(path, level=DEFAULT_LEVEL, frame_size=FRAME_SIZE, keep=False):
+    output = path + PACKED_SUFFIX
+    size = write_seekable(path, output + ".tmp", level, frame_size)
+    with open(path, "rb") as original, io.BufferedReader(SeekableReader(output + ".tmp"), buffer_size=FRAME_SIZE) as packed:
+        if file_digest(original) != file_digest(packed):
+            os.remove(output + ".tmp")
+            raise ValueError(f"{path}: conteúdo descompactado difere do original")
+    stat = os.stat(path)
+    os.utime(output + ".tmp", ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    os.replace(output + ".tmp", output)
+    if not keep:
+        os.remove(path)
+    return stat.st_size, size
+
+# Restaura o original de um arquivo compactado. Retorna (tamanho compactado, tamanho original).
+def unpack_file(path):
+    packed = resolve(path)
+    original = packed[:-len(PACKED_SUFFIX)]
+    with open_file(original, "rb") as src, open(original + ".tmp", "wb") as dst:
+        while block := src.read(FRAME_SIZE):
+            dst.write(block)
+    stat = os.stat(packed)
+    os.utime(original + ".tmp", ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    os.replace(original + ".tmp", original)
+    os.remove(packed)
+    return stat.st_size, os.path.getsize(original)
+
+# Arquivos sob os caminhos (arquivos ou diretórios percorridos recursivamente) que terminam em suffix
+def find_files(paths, suffixes):
+    for path in paths:
+        if os.path.isdir(path):
+            for root, _, files in os.walk(path):
+                for name in sorted(files):
+                    if name.endswith(suffixes):
+                        yield os.path.join(root, name)
+        elif path.endswith(suffixes):
+            yield path
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Pack the Dataset logs and CSVs into seekable zstd files (read transparently by the Data scripts) or unpack them.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    pack = subparsers.add_parser("pack", help="Compress every .log and .csv under the given files or directories")
+    pack.add_argument("paths", nargs='+', type=str, help="Files or directories (e.g. Free5GC/Dataset)")
+    pack.add_argument("--level", type=int, default=DEFAULT_LEVEL, help="zstd compression level")
+    pack.add_argument("--frame_size", type=int, default=FRAME_SIZE, help="Uncompressed bytes per frame (the unit of random access)")
+    pack.add_argument("--keep", action="store_true", help="Keep the original files next to the packed ones")
+
+    unpack = subparsers.add_parser("unpack", help="Restore the original files of every .zst under the given files or directories")
+    unpack.add_argument("paths", nargs='+', type=str, help="Files or directories (e.g. Free5GC/Dataset)")
+
+    args = parser.parse_args()
+
+    inicio = time.perf_counter()
+    total_original = total_packed = count = 0
+    if args.command == "pack":
+        for path in find_files(args.paths, PACKED_EXTENSIONS):
+            original_size, packed_size = pack_file(path, args.level, args.frame_size, args.keep)
+            total_original += original_size
+            total_packed += packed_size
+            count += 1
+    else:
+        for path in find_files(args.paths, PACKED_SUFFIX):
+            packed_size, original_size = unpack_file(path)
+            total_original += original_size
+            total_packed += packed_size
+            count += 1
+    print(f"{count} arquivos: {total_original / 1024 ** 2:.1f} MiB originais, {total_packed / 1024 ** 2:.1f} MiB compactados "
+          f"({total_original / max(total_packed, 1):.1f}x) em {time.perf_counter() - inicio:.1f} s")
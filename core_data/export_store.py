@@ -0,0 +1,145 @@
+import argparse
+import csv
+import os
+import re
+import time
+
+import numpy as np
+import pandas as pd
+
+from .dataset_loader import EXPORTS, FILE_PATTERN, read_export
+from .dataset_pack import getsize, listdir, open_file
+
+# Colunas fixas da tabela longa; os labels do Istio vêm depois, uma coluna por label
+BASE_COLUMNS = ["scenario", "family", "source", "destination", "round", "step", "series", "value"]
+INTEGER_COLUMNS = {"round": "int16", "step": "int32", "series": "int16"}
+
+LABEL_PATTERN = re.compile(r'(\w+)="((?:[^"\\]|\\.)*)"')
+
+# Labels de cada série do cabeçalho de uma exportação ({} nas colunas sem labels, como em rate)
+def read_labels(path):
+    with open_file(path, newline='') as f:
+        header = next(csv.reader(f, delimiter='\t'))
+    return [dict(LABEL_PATTERN.findall(column)) for column in header[1:]]
+
+# Lê uma exportação e retorna as células preenchidas: (rodada, passo, série, valor) e os
+# labels de cada série. Séries que só aparecem depois da primeira rodada não têm cabeçalho
+# e ficam sem labels.
+def read_long_export(path):
+    rounds, values = read_export(path)
+    labels = read_labels(path)
+    labels += [{}] * (values.shape[1] - len(labels))
+
+    # Posição da linha dentro da rodada (passo de 30s da consulta original)
+    steps = pd.Series(rounds).groupby(rounds).cumcount().to_numpy()
+    row, series = np.nonzero(~np.isnan(values))
+    return rounds[row], steps[row], series, values[row, series], labels
+
+# Coluna categórica com o valor de cada item repetido conforme ids (sem criar strings por linha)
+def categorical_take(item_values, ids):
+    categorical = pd.Categorical(item_values)
+    return pd.Categorical.from_codes(categorical.codes[ids], categorical.categories)
+
+# Lê todas as exportações dos cenários em uma tabela longa. Os textos (cenário, par de NFs e
+# labels do Istio) viram categorias, que o Parquet/Feather grava codificadas por dicionário.
+def convert_scenarios(directories):
+    files = []          # (cenário, família, origem, destino) de cada arquivo
+    series_labels = []  # labels de cada série de todos os arquivos
+    parts = []
+    for directory in directories:
+        scenario = os.path.basename(os.path.normpath(directory))
+        for family, (subdir, suffix, _) in EXPORTS.items():
+            path = os.path.join(directory, subdir)
+            if not os.path.isdir(path):
+                continue
+            for name in sorted(listdir(path)):
+                match = FILE_PATTERN.match(name)
+                if not match or match.group(3) != suffix:
+                    continue
+                rounds, steps, series, values, labels = read_long_export(os.path.join(path, name))
+                parts.append((np.full(len(values), len(files)), series + len(series_labels), rounds, steps, series, values))
+                files.append((scenario, family, match.group(1), match.group(2)))
+                series_labels.extend(labels)
+
+    if not parts:
+        return pd.DataFrame(columns=BASE_COLUMNS)
+    file_ids, series_ids, rounds, steps, series, values = (np.concatenate(column) for column in zip(*parts))
+    data = pd.DataFrame({name: categorical_take([item[k] for item in files], file_ids)
+                         for k, name in enumerate(["scenario", "family", "source", "destination"])})
+    data["round"] = rounds.astype(INTEGER_COLUMNS["round"])
+    data["step"] = steps.astype(INTEGER_COLUMNS["step"])
+    data["series"] = series.astype(INTEGER_COLUMNS["series"])
+    data["value"] = values
+    for name in sorted({name for labels in series_labels for name in labels}):
+        data[name] = categorical_take([labels.get(name) for labels in series_labels], series_ids)
+
+    # Ordenado para que os filtros por cenário/família/par descartem row groups inteiros
+    return data.sort_values(["scenario", "family", "source", "destination", "round", "step", "series"], ignore_index=True)
+
+# Grava a tabela longa em Parquet ou Feather (pela extensão do arquivo)
+def write_store(data, output):
+    if output.endswith(".feather"):
+        data.to_feather(output, compression="zstd", compression_level=19)
+    else:
+        data.to_parquet(output, compression="zstd", compression_level=19, index=False, row_group_size=65536)
+
+# Lê a tabela longa, aplicando os filtros de igualdade durante a leitura
+# (ex.: read_store("dataset.parquet", response_code="503", response_flags="UR")).
+# No Parquet os filtros descartam row groups pelas estatísticas antes de descomprimir;
+# no Feather são aplicados em cada bloco lido, antes da conversão para pandas.
+def read_store(path, columns=None, **predicates):
+    import pyarrow.dataset as ds
+
+    dataset = ds.dataset(path, format="feather" if path.endswith(".feather") else "parquet")
+    condition = None
+    for name, value in predicates.items():
+        expression = ds.field(name) == value
+        condition = expression if condition is None else condition & expression
+    return dataset.to_table(columns=columns, filter=condition).to_pandas()
+
+# Converte "chave=valor" da linha de comando em um filtro, com inteiros nas colunas numéricas
+def parse_predicate(text):
+    name, _, value = text.partition("=")
+    value = value.strip('"')
+    return name, int(value) if name in INTEGER_COLUMNS else value
+
+# Tamanho total dos arquivos das exportações originais
+def exports_size(directories):
+    total = 0
+    for directory in directories:
+        for subdir, _, _ in EXPORTS.values():
+            path = os.path.join(directory, subdir)
+            if os.path.isdir(path):
+                total += sum(getsize(os.path.join(path, name)) for name in listdir(path))
+    return total
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Convert the Dataset rate/req/error exports to a long Parquet/Feather table and query it.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    convert = subparsers.add_parser("convert", help="Convert the exports of one or more scenario directories")
+    convert.add_argument("directories", nargs='+', type=str, help="Dataset scenario directories (with the rate, req and error subdirectories)")
+    convert.add_argument("--output", type=str, default="dataset.parquet", help="Output file (.parquet or .feather)")
+
+    query = subparsers.add_parser("query", help="Read rows of a converted table")
+    query.add_argument("store", type=str, help="Parquet or Feather file written by convert")
+    query.add_argument("--where", nargs='*', default=[], help='Equality filters, e.g. response_code=503 response_flags=UR scenario=Division_Test')
+    query.add_argument("--columns", nargs='*', default=None, help="Columns to read (default: all)")
+    query.add_argument("--output_csv", type=str, default=None, help="Write the selected rows to this CSV instead of printing a summary")
+
+    args = parser.parse_args()
+
+    if args.command == "convert":
+        inicio = time.perf_counter()
+        data = convert_scenarios(args.directories)
+        write_store(data, args.output)
+        print(f"{len(data)} linhas gravadas em {args.output} em {time.perf_counter() - inicio:.2f} s")
+        print(f"Exportações: {exports_size(args.directories) / 1024:.0f} KiB -> {os.path.getsize(args.output) / 1024:.0f} KiB")
+    else:
+        inicio = time.perf_counter()
+        data = read_store(args.store, args.columns, **dict(parse_predicate(text) for text in args.where))
+        print(f"{len(data)} linhas lidas em {time.perf_counter() - inicio:.3f} s")
+        if args.output_csv:
+            data.to_csv(args.output_csv, index=False)
+        else:
+            print(data.head(20).to_string())
@@ -0,0 +1,397 @@
+import argparse
+import json
+import os
+import random
+import re
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+
+from .collector import PROFILES, DEFAULT_CORE
+from .dataset_loader import EXPORTS, FILE_PATTERN
+from .dataset_pack import listdir
+from .export_store import read_long_export
+from .intervals import timestamp_to_datetime, redefine_date, get_timestamps_from_file
+
+# Servidor HTTP local que imita a API do Prometheus usada pelo prometheus_pandas
+# (/api/v1/query_range e /api/v1/query) para testar e medir os scripts de coleta sem
+# acesso ao Prometheus real. Só entende as consultas que os scripts deste diretório
+# enviam: o formato da consulta define a família, os filtros e o agrupamento.
+
+DEFAULT_PORT = 37877
+STEP_SECONDS = 30
+
+# Uma série: labels e valores nos instantes em que tem amostra
+class Series:
+    def __init__(self, labels, times, values):
+        # Em instantes repetidos (fronteira entre rodadas) vale a última amostra
+        order = np.argsort(times, kind='stable')
+        times, values = np.asarray(times, dtype=float)[order], np.asarray(values, dtype=float)[order]
+        last = np.append(times[1:] != times[:-1], True)
+        self.labels = labels
+        self.times = times[last]
+        self.values = values[last]
+
+    # Valores nos instantes pedidos (NaN onde não há amostra)
+    def at(self, times):
+        result = np.full(len(times), np.nan)
+        if len(self.times):
+            positions = np.clip(np.searchsorted(self.times, times), 0, len(self.times) - 1)
+            found = self.times[positions] == times
+            result[found] = self.values[positions[found]]
+        return result
+
+# Série sintética determinística, definida em qualquer instante
+class SyntheticSeries:
+    def __init__(self, labels, base, phase, gap_every=7):
+        self.labels = labels
+        self.base = base
+        self.phase = phase
+        self.gap_every = gap_every
+
+    def at(self, times):
+        times = np.asarray(times, dtype=float)
+        values = self.base * (1 + 0.5 * np.sin(times / 300.0 + self.phase))
+        values[(times // STEP_SECONDS).astype(np.int64) % self.gap_every == 0] = np.nan  # passos sem amostra
+        return values
+
+# Limites (le, em ms) dos buckets do histograma de duração do Istio
+ISTIO_BUCKETS = [0.5, 1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000, 60000,
+                 300000, 600000, 1800000, 3600000, np.inf]
+
+# Bucket cumulativo (le) do histograma de duração de um par, derivado da série de duração média:
+# em cada passo de 30s com amostra chegam STEP_SECONDS requisições com latência exponencial
+# de média igual ao valor do passo. Só responde a increase(...[janela]) (ver evaluate).
+class BucketSeries:
+    def __init__(self, duration, le):
+        self.labels = {**duration.labels, "le": "+Inf" if np.isinf(le) else f"{le:g}"}
+        self.duration = duration
+        self.le = le
+
+    # Incremento do bucket na janela (t - window, t] de cada instante t
+    def increase(self, times, window):
+        result = np.full(len(times), np.nan)
+        for k, t in enumerate(times):
+            steps = np.arange(STEP_SECONDS * (np.floor((t - window) / STEP_SECONDS) + 1), t + STEP_SECONDS / 2, STEP_SECONDS)
+            means = self.duration.at(steps)
+            means = means[np.isfinite(means)]
+            if len(means):
+                below = 1 - np.exp(-self.le / np.where(means > 0, means, np.nan)) if np.isfinite(self.le) else np.ones(len(means))
+                result[k] = STEP_SECONDS * np.nan_to_num(below, nan=1.0).sum()
+        return result
+
+# Buckets de todas as séries de duração
+def bucket_series(durations):
+    return [BucketSeries(duration, le) for duration in durations for le in ISTIO_BUCKETS]
+
+# Nome do app de uma NF no Prometheus (inverso das renomeações do perfil, ex.: upf -> upf-1)
+def app_name(nf, profile):
+    reverse = {name: app for app, name in profile["renames"].items()}
+    return profile["app_prefix"] + reverse.get(nf, nf)
+
+# Séries sintéticas de todas as famílias, com pares de NFs sorteados a partir da semente
+class SyntheticSource:
+    def __init__(self, profile, seed=0, pair_fraction=0.25):
+        self.profile = profile
+        self.families = {}
+        rng = np.random.default_rng(seed)
+        nfs = [nf for nf in profile["nfs"] if nf not in profile["masked"]]
+        pairs = [(source, dest) for source in nfs for dest in nfs if rng.random() < pair_fraction]
+
+        def pair_labels(source, dest, **extra):
+            return dict(source_app=app_name(source, profile), destination_app=app_name(dest, profile), **extra)
+
+        for family in ("rate", "error", "duration"):
+            self.families[family] = []
+        for source, dest in pairs:
+            phase = rng.random() * 6
+            self.families["rate"].append(SyntheticSeries(pair_labels(source, dest, response_code="200"), rng.gamma(2, 10), phase))
+            self.families["duration"].append(SyntheticSeries(pair_labels(source, dest, response_code="200"), rng.gamma(2, 5), phase))
+            if rng.random() < 0.3:
+                self.families["error"].append(SyntheticSeries(pair_labels(source, dest, response_code="503", response_flags="UR"), rng.random(), phase))
+        for family, scale in (("cpu", 0.05), ("memory", 5e7), ("receive", 2e4), ("transmit", 2e4)):
+            self.families[family] = [SyntheticSeries({"workload": app_name(nf, profile)}, rng.gamma(2, scale), rng.random() * 6)
+                                     for nf in profile["resource_nfs"]]
+        self.families["bucket"] = bucket_series(self.families["duration"])
+
+    def series(self, family):
+        return self.families.get(family, [])
+
+# Séries gravadas nas exportações do Dataset de um cenário. Cada passo da rodada k é colocado
+# em start_k + 30s * passo, com start_k a k-ésima linha do timestamp.txt (arredondada como nos
+# scripts). Os buckets do histograma de duração derivam da duração média gravada; as demais
+# famílias que não existem no Dataset (recursos) vêm do fallback.
+class DatasetSource:
+    def __init__(self, scenario_dir, profile, fallback):
+        self.profile = profile
+        self.fallback = fallback
+        self.families = {}
+        starts = [redefine_date(timestamp_to_datetime(start)) for start, _ in self.read_timestamps(scenario_dir)]
+        for family, (subdir, suffix, _) in EXPORTS.items():
+            path = os.path.join(scenario_dir, subdir)
+            if not os.path.isdir(path):
+                continue
+            self.families[family] = []
+            for name in sorted(listdir(path)):
+                match = FILE_PATTERN.match(name)
+                if not match or match.group(3) != suffix:
+                    continue
+                rounds, steps, series, values, labels = read_long_export(os.path.join(path, name))
+                valid = (rounds >= 1) & (rounds <= len(starts))
+                times = np.asarray(starts)[rounds[valid].astype(int) - 1] + STEP_SECONDS * steps[valid]
+                pair = {"source_app": app_name(match.group(1), profile), "destination_app": app_name(match.group(2), profile)}
+                # O label 'series' (coluna da exportação) mantém distintas as séries sem labels no cabeçalho
+                for k in np.unique(series[valid]):
+                    selected = series[valid] == k
+                    self.families[family].append(Series({**labels[k], **pair, "series": str(k)}, times[selected], values[valid][selected]))
+
+    @staticmethod
+    def read_timestamps(scenario_dir):
+        for name in ("timestamps.txt", "timestamp.txt"):
+            path = os.path.join(scenario_dir, name)
+            if os.path.exists(path):
+                return get_timestamps_from_file(path)
+        raise FileNotFoundError(f"Nenhum arquivo de timestamps encontrado em {scenario_dir}")
+
+    def series(self, family):
+        if family == "bucket" and "duration" in self.families:
+            if "bucket" not in self.families:
+                self.families["bucket"] = bucket_series(self.families["duration"])
+            return self.families["bucket"]
+        if family in self.families:
+            return self.families[family]
+        return self.fallback.series(family)
+
+# Consulta de agregação no servidor (collector.py --server_side)
+AGGREGATE_PATTERN = re.compile(
+    r'^sum by \(([^)]*)\) \(sum_over_time\(\(\((.*)\) > -Inf < \+Inf\)\[(\d+)s:(\d+)s\]\)\) / sum by')
+MATCHER_PATTERN = re.compile(r'(\w+)\s*(=~|!~|!=|=)\s*"([^"]*)"')
+
+# Interpreta uma consulta dos scripts: família, filtros de labels e rótulos de agrupamento
+# (lista vazia = sum sem by; None = sem agregação, uma série por série de origem)
+def parse_query(query_string):
+    if "istio_request_duration_milliseconds_bucket" in query_string:
+        family = "bucket"
+    elif "istio_request_duration_milliseconds_sum" in query_string:
+        family = "duration"
+    elif "istio_requests_total" in query_string:
+        family = "error" if 'response_code!~' in query_string else "rate"
+    elif "container_cpu_usage" in query_string:
+        family = "cpu"
+    elif "container_memory_working_set" in query_string:
+        family = "memory"
+    elif "network_receive" in query_string:
+        family = "receive"
+    elif "network_transmit" in query_string:
+        family = "transmit"
+    else:
+        raise ValueError(f"Consulta não suportada: {query_string}")
+
+    by = re.search(r'sum by \(([^)]*)\)', query_string) or re.search(r'\) by \(([^)]*)\)\s*$', query_string)
+    if by:
+        group = [name.strip() for name in by.group(1).split(",")]
+    elif query_string.startswith("sum("):
+        group = []
+    else:
+        group = None
+    window = re.search(r'\[(\d+)s\]', query_string)
+    return {
+        "family": family,
+        "matchers": MATCHER_PATTERN.findall(query_string),
+        "group": group,
+        "window": int(window.group(1)) if window else None,
+    }
+
+# Verifica os filtros de labels que existem na série (os demais, como namespace, são ignorados)
+def matches(labels, matchers):
+    for name, operator, value in matchers:
+        if name not in labels:
+            continue
+        found = re.fullmatch(value, labels[name]) is not None if "~" in operator else labels[name] == value
+        if found == (operator in ("!=", "!~")):
+            return False
+    return True
+
+# Avalia uma consulta nos instantes pedidos. Retorna [(labels, valores)].
+def evaluate(source, query_string, times):
+    parsed = parse_query(query_string)
+    selected = [series for series in source.series(parsed["family"]) if matches(series.labels, parsed["matchers"])]
+    if parsed["family"] == "bucket":
+        if parsed["window"] is None:
+            raise ValueError(f"Buckets só são consultados com increase(...[Ns]): {query_string}")
+        values_at = lambda series: series.increase(times, parsed["window"])
+    else:
+        values_at = lambda series: series.at(times)
+    if parsed["group"] is None:
+        return [(series.labels, values_at(series)) for series in selected]
+
+    groups = {}
+    for series in selected:
+        key = tuple(series.labels.get(name, "") for name in parsed["group"])
+        groups.setdefault(key, []).append(values_at(series))
+    result = []
+    for key, values in groups.items():
+        stacked = np.vstack(values)
+        total = np.where(np.isnan(stacked).all(axis=0), np.nan, np.nansum(stacked, axis=0))
+        result.append((dict(zip(parsed["group"], key)), total))
+    return result
+
+# Avalia a consulta de agregação do collector.py --server_side em um instante
+def evaluate_aggregate(source, match, time_value):
+    labels = [name.strip() for name in match.group(1).split(",")]
+    window, step = int(match.group(3)), int(match.group(4))
+    first = step * np.ceil((time_value - window) / step)
+    times = np.arange(first, time_value + step / 2, step)
+    groups = {}
+    for series_labels, values in evaluate(source, match.group(2), times):
+        key = tuple(series_labels.get(name, "") for name in labels)
+        finite = values[np.isfinite(values)]
+        total, count = groups.get(key, (0.0, 0))
+        groups[key] = (total + finite.sum(), count + len(finite))
+    return [(dict(zip(labels, key)), np.array([total / count])) for key, (total, count) in groups.items() if count]
+
+# Converte o resultado no JSON da API do Prometheus, omitindo os passos sem amostra
+def to_matrix(result, times):
+    series = []
+    for labels, values in result:
+        points = [[float(t), repr(float(v))] for t, v in zip(times, values) if np.isfinite(v)]
+        if points:
+            series.append({"metric": labels, "values": points})
+    return {"resultType": "matrix", "result": series}
+
+def to_vector(result, time_value):
+    return {"resultType": "vector",
+            "result": [{"metric": labels, "value": [float(time_value), repr(float(values[0]))]}
+                       for labels, values in result if np.isfinite(values[0])]}
+
+# Contadores do servidor
+class ServerStats:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.errors = 0
+        self.bytes_sent = 0
+
+    def add(self, errors=0, bytes_sent=0):
+        with self.lock:
+            self.requests += 1
+            self.errors += errors
+            self.bytes_sent += bytes_sent
+
+    def __str__(self):
+        return f"{self.requests} requests, {self.errors} injected errors, {self.bytes_sent / 1024:.1f} KiB sent"
+
+# Handler HTTP; source, latência e erros ficam no servidor (FakePrometheusServer)
+class FakePrometheusHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        self.handle_query(url.path, parse_qs(url.query))
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0))).decode()
+        self.handle_query(url.path, {**parse_qs(url.query), **parse_qs(body)})
+
+    def handle_query(self, path, params):
+        server = self.server
+        delay = server.latency + server.jitter * server.random.random()
+        if delay:
+            time.sleep(delay)
+        if server.random.random() < server.error_rate:
+            return self.send_json(503, {"status": "error", "errorType": "unavailable", "error": "injected error"}, errors=1)
+        try:
+            query_string = params["query"][0]
+            if path == "/api/v1/query_range":
+                start, end = float(params["start"][0]), float(params["end"][0])
+                step = float(params["step"][0].rstrip("s"))
+                times = np.arange(start, end + step / 2, step)
+                data = to_matrix(evaluate(server.source, query_string, times), times)
+            elif path == "/api/v1/query":
+                time_value = float(params.get("time", [time.time()])[0])
+                aggregate = AGGREGATE_PATTERN.match(query_string)
+                if aggregate:
+                    result = evaluate_aggregate(server.source, aggregate, time_value)
+                else:
+                    result = evaluate(server.source, query_string, np.array([time_value]))
+                data = to_vector(result, time_value)
+            else:
+                return self.send_json(404, {"status": "error", "errorType": "not_found", "error": path})
+        except (KeyError, ValueError) as error:
+            return self.send_json(400, {"status": "error", "errorType": "bad_data", "error": str(error)})
+        self.send_json(200, {"status": "success", "data": data})
+
+    def send_json(self, status, payload, errors=0):
+        body = json.dumps(payload).encode()
+        if "gzip" in self.headers.get("Accept-Encoding", ""):
+            compressor = zlib.compressobj(wbits=31)
+            body = compressor.compress(body) + compressor.flush()
+            encoding = "gzip"
+        else:
+            encoding = None
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        if encoding:
+            self.send_header("Content-Encoding", encoding)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+        self.server.stats.add(errors=errors, bytes_sent=len(body))
+
+class FakePrometheusServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, source, latency=0.0, jitter=0.0, error_rate=0.0, seed=0):
+        super().__init__(address, FakePrometheusHandler)
+        self.source = source
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.random = random.Random(seed)
+        self.stats = ServerStats()
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+# Sobe o servidor em uma thread, para uso dentro de outros scripts (port=0 escolhe uma porta livre)
+def start_server(source, port=0, latency=0.0, jitter=0.0, error_rate=0.0, seed=0):
+    server = FakePrometheusServer(("127.0.0.1", port), source, latency, jitter, error_rate, seed)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+# Cria a fonte de dados: Dataset de um cenário (com séries sintéticas no que faltar) ou só sintética
+def make_source(profile, dataset=None, seed=0):
+    synthetic = SyntheticSource(profile, seed)
+    return DatasetSource(dataset, profile, synthetic) if dataset else synthetic
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local stand-in for the Prometheus HTTP API, replaying Dataset exports or synthetic series.")
+    parser.add_argument("--core", choices=sorted(PROFILES), default=DEFAULT_CORE, help="Core network profile (namespace, NF list, renames)")
+    parser.add_argument("--dataset", type=str, default=None, help="Dataset scenario directory to replay (default: synthetic series only)")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help="Port to listen on")
+    parser.add_argument("--latency_ms", type=float, default=0.0, help="Fixed latency added to every request, in ms")
+    parser.add_argument("--jitter_ms", type=float, default=0.0, help="Random extra latency (uniform, up to this value), in ms")
+    parser.add_argument("--error_rate", type=float, default=0.0, help="Fraction of requests answered with a 503 error")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the synthetic series and of the injected errors")
+    args = parser.parse_args()
+
+    source = make_source(PROFILES[args.core], args.dataset, args.seed)
+    server = FakePrometheusServer(("127.0.0.1", args.port), source, args.latency_ms / 1000, args.jitter_ms / 1000, args.error_rate, args.seed)
+    print(f"Prometheus local em {server.url} ({'Dataset ' + args.dataset if args.dataset else 'séries sintéticas'})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print(f"Servidor: {server.stats}")
@@ -0,0 +1,137 @@
+import argparse
+
+import numpy as np
+import pandas as pd
+
+from .checkpoint import IntervalCheckpoint
+from .collector import PROFILES, DEFAULT_CORE, combine_matrices, nf_name, parse_labels
+from .intervals import timestamp_to_datetime, redefine_date, get_timestamps_from_directory
+from .prometheus_pool import close_clients, stats as prometheus_stats
+from .query_executor import add_executor_arguments, executor_from_args, run_for_directories
+
+# Quantis calculados por padrão
+DEFAULT_QUANTILES = [0.5, 0.95, 0.99]
+
+# Nome de um quantil nos arquivos de saída (0.95 -> 'p95', 0.999 -> 'p99.9')
+def quantile_name(quantile):
+    return f"p{quantile * 100:g}"
+
+# Consulta instantânea, avaliada no fim do intervalo, do incremento de cada bucket do histograma
+# de duração do Istio no intervalo inteiro, somado por par de NFs (todas as requisições do intervalo,
+# não uma média de quantis calculados a cada passo)
+def bucket_query(profile, start, end):
+    selector = f'namespace="{profile["namespace"]}", reporter="destination"'
+    return (
+        f'sum by (le, source_app, destination_app) '
+        f'(increase(istio_request_duration_milliseconds_bucket{{{selector}}}[{int(end - start)}s]))'
+    )
+
+# Buckets de um intervalo em formato longo: uma linha por par e limite superior (le, inf no +Inf)
+def buckets_from_result(result, profile):
+    rows = []
+    for column, value in result.items():
+        labels = parse_labels(column)
+        if "le" in labels and np.isfinite(value):
+            rows.append((nf_name(labels.get("source_app", ""), profile), nf_name(labels.get("destination_app", ""), profile),
+                         float(labels["le"]), float(value)))
+    return pd.DataFrame(rows, columns=["source", "destination", "le", "count"])
+
+# Quantil de um histograma cumulativo com a mesma interpolação do histogram_quantile do Prometheus:
+# linear dentro do bucket, 0 como início do primeiro bucket e o maior limite finito quando o
+# quantil cai no +Inf. NaN sem observações ou sem o bucket +Inf.
+def histogram_quantile(quantile, bounds, counts):
+    order = np.argsort(bounds)
+    bounds = np.asarray(bounds, dtype=float)[order]
+    counts = np.maximum.accumulate(np.asarray(counts, dtype=float)[order])  # incrementos podem sair não monotônicos
+    if len(bounds) < 2 or not np.isinf(bounds[-1]) or counts[-1] <= 0:
+        return np.nan
+    rank = quantile * counts[-1]
+    bucket = int(np.searchsorted(counts, rank, side="left"))
+    if bucket == len(bounds) - 1:
+        return bounds[-2]
+    if bucket == 0 and bounds[0] <= 0:
+        return bounds[0]
+    lower = bounds[bucket - 1] if bucket > 0 else 0.0
+    below = counts[bucket - 1] if bucket > 0 else 0.0
+    return lower + (bounds[bucket] - lower) * (rank - below) / (counts[bucket] - below)
+
+# Matrizes de latência a partir dos buckets de todos os intervalos. Os incrementos de cada bucket
+# são somados entre as rodadas antes do quantil: o p95 de um par é o das requisições de todas as
+# rodadas juntas (rodadas com mais requisições pesam mais), não a média dos p95 de cada rodada.
+def latency_matrices(buckets, quantiles, profile):
+    nfs = profile["nfs"]
+    totals = buckets.groupby(["source", "destination", "le"])["count"].sum().reset_index() if len(buckets) else buckets
+    outputs = {}
+    for quantile in quantiles:
+        data = pd.DataFrame(0.0, index=nfs, columns=nfs)
+        for (source, destination), pair in totals.groupby(["source", "destination"]):
+            if source in nfs and destination in nfs:
+                value = histogram_quantile(quantile, pair["le"].to_numpy(), pair["count"].to_numpy())
+                data.at[source, destination] = value if np.isfinite(value) else 0
+        outputs[f"output_{quantile_name(quantile)}.csv"] = combine_matrices([data], profile)
+    return outputs
+
+# Coleta as matrizes de latência de um diretório: uma consulta por intervalo, qualquer que seja o
+# número de quantis. Cada matriz segue o formato do output_req.csv (0 nos pares sem requisições,
+# '-' nas NFs inexistentes) e é gravada em output_<quantil>.csv. Retorna {nome do arquivo: DataFrame}.
+def get_latency_matrices(directory, profile, executor, quantiles=DEFAULT_QUANTILES):
+    start_end_timestamps = get_timestamps_from_directory(directory)
+    # Intervalos já concluídos em uma execução anterior são lidos do checkpoint
+    checkpoint = IntervalCheckpoint(f"{directory}/latency")
+
+    # Dispara as consultas de todos os intervalos de uma vez; o executor limita quantas rodam em paralelo
+    interval_futures = []
+    for start, end in start_end_timestamps:
+        start = redefine_date(timestamp_to_datetime(start))
+        end = redefine_date(timestamp_to_datetime(end))
+        saved = checkpoint.load(start, end)
+        future = executor.query(bucket_query(profile, start, end), end) if saved is None else None
+        interval_futures.append((start, end, saved, future))
+
+    intervals = []
+    for start, end, saved, future in interval_futures:
+        if saved is None:
+            saved = {"buckets": buckets_from_result(future.result(), profile)}
+            checkpoint.save(start, end, saved)
+        else:
+            print(f"Retomando o intervalo {int(start)}-{int(end)} do checkpoint de {directory}")
+        intervals.append(saved["buckets"])
+
+    outputs = latency_matrices(pd.concat(intervals, ignore_index=True), quantiles, profile)
+    for filename, data in outputs.items():
+        data.to_csv(f"{directory}/{filename}")
+    checkpoint.clear()
+    return outputs
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Collect NF x NF latency quantile matrices from the Istio duration histograms.")
+    parser.add_argument("directories", nargs='+', type=str, help="List of directories containing the timestamps file.")
+    parser.add_argument("--core", choices=sorted(PROFILES), default=DEFAULT_CORE, help="Core network profile (namespace, NF list, renames)")
+    parser.add_argument("--prometheus_url", type=str, default=None, help="Prometheus URL (defaults to the profile URL)")
+    parser.add_argument("--quantiles", nargs='+', type=float, default=DEFAULT_QUANTILES, help="Quantiles to compute, between 0 and 1")
+    parser.add_argument("--no_plots", action="store_true", help="Do not generate the heatmaps")
+    add_executor_arguments(parser)
+
+    args = parser.parse_args()
+    if any(not 0 <= quantile <= 1 for quantile in args.quantiles):
+        parser.error("--quantiles must be between 0 and 1")
+
+    profile = PROFILES[args.core]
+    executor = executor_from_args(args.prometheus_url or profile["prometheus_url"], args)
+
+    # Coleta os diretórios em paralelo, compartilhando o mesmo limite de consultas
+    try:
+        run_for_directories(lambda directory: get_latency_matrices(directory, profile, executor, args.quantiles),
+                            args.directories, args.workers)
+    finally:
+        executor.shutdown()
+    print(f"Prometheus: {prometheus_stats}")
+    close_clients()
+
+    # Um heatmap por quantil, no mesmo formato do heatmap de duração média
+    if not args.no_plots:
+        from .plots import generate_heatmaps_for_directories
+
+        for quantile in args.quantiles:
+            name = quantile_name(quantile)
+            generate_heatmaps_for_directories(args.directories, f"Heatmap_{name.upper()}_{profile['tree']}.png", f"output_{name}.csv")
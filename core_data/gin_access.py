@@ -0,0 +1,160 @@
+import argparse
+import os
+import re
+import time
+
+import numpy as np
+import pandas as pd
+
+from .collector import PROFILES, STEP_SECONDS, combine_matrices
+from .dataset_pack import mapped, read_csv, resolve
+from .intervals import timestamp_to_datetime, redefine_date
+from .log_parser import ANSI_PATTERN, NS, nf_from_filename, round_windows, scenario_logs
+
+# Linha de acesso do GIN (o logger do Free5GC não registra a latência, só o status):
+# 2024-11-28T17:37:34.465715036Z [INFO][PCF][GIN] | 201 |       127.0.0.6 | POST    | /npcf-am-policy-control/v1/policies |
+GIN_PATTERN = re.compile(r"^(\d{4}-\d\d-\d\dT[\d:.]+Z) \[\w+\]\[\w+\]\[GIN\] \| (\d{3}) \|\s*(\S*)\s*\| (\w+)\s*\| (\S*)\s*\|", re.M)
+
+# Consumidor de cada serviço SBI: as requisições chegam pelo sidecar (127.0.0.6), então a
+# origem vem do serviço chamado (ou do parâmetro nf-type da consulta, quando existe)
+SERVICE_CONSUMERS = {
+    "npcf-am-policy-control": "amf",
+    "npcf-ue-policy-control": "amf",
+    "npcf-smpolicycontrol": "smf",
+    "npcf-policyauthorization": "af",
+    "npcf-bdtpolicycontrol": "nef",
+    "nnssf-nsselection": "amf",
+    "nnssf-nssaiavailability": "amf",
+}
+
+# Trechos variáveis dos caminhos (SUPI, UUID, números), trocados por {id} no endpoint
+ID_PATTERN = re.compile(r"(?<=/)(imsi-[\d-]+|[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}|\d+)(?=/|$)")
+NF_TYPE_PATTERN = re.compile(r"[?&]nf-type=(\w+)")
+
+# Endpoint (caminho sem consulta nem identificadores) e NF de origem de um caminho do GIN
+def endpoint_of(path):
+    endpoint = ID_PATTERN.sub("{id}", path.split("?", 1)[0])
+    service = endpoint.strip("/").split("/", 1)[0]
+    nf_type = NF_TYPE_PATTERN.search(path)
+    return endpoint, nf_type.group(1).lower() if nf_type else SERVICE_CONSUMERS.get(service, "unknown")
+
+# Requisições de um log do Free5GC: uma única busca do regex no texto inteiro (sem laço por
+# linha em Python) e conversão vetorizada dos horários. Os endpoints são normalizados só
+# uma vez por caminho distinto.
+def read_requests(path, nf):
+    with mapped(path) as data:
+        rows = GIN_PATTERN.findall(ANSI_PATTERN.sub("", data[:].decode("utf-8", errors="replace")))
+    if not rows:
+        return pd.DataFrame({"time": np.array([], dtype=np.int64), "nf": [], "source": [], "method": [], "endpoint": [], "status": np.array([], dtype=np.int16)})
+
+    times, statuses, _, methods, paths = zip(*rows)
+    codes, unique_paths = pd.factorize(np.array(paths, dtype=object))
+    endpoints, sources = zip(*(endpoint_of(value) for value in unique_paths))
+    return pd.DataFrame({
+        "time": pd.to_datetime(np.array(times, dtype=object), format="ISO8601").asi8,
+        "nf": nf,
+        "source": np.array(sources, dtype=object)[codes],
+        "method": np.array(methods, dtype=object),
+        "endpoint": np.array(endpoints, dtype=object)[codes],
+        "status": np.array(statuses, dtype=np.int16),
+    })
+
+# Séries de uma rodada: requisições por passo de 30s (alinhado como nas consultas ao Prometheus)
+# para cada (NF, origem, método, endpoint, status), com zeros nos passos sem requisição, e os
+# tempos entre chegadas de cada endpoint. Retorna (taxas, entre chegadas).
+def round_series(requests, start, end):
+    start = redefine_date(timestamp_to_datetime(start))
+    end = redefine_date(timestamp_to_datetime(end))
+    steps = max(int((end - start) // STEP_SECONDS), 1)
+    bins = (requests["time"].to_numpy() - int(start) * NS) // (STEP_SECONDS * NS)
+    requests = requests[(bins >= 0) & (bins < steps)].assign(step=bins[(bins >= 0) & (bins < steps)])
+
+    key_columns = ["nf", "source", "method", "endpoint", "status"]
+    keys = requests[key_columns].drop_duplicates().sort_values(key_columns, ignore_index=True)
+    key_ids = requests.merge(keys.reset_index(), on=key_columns, how="left")["index"].to_numpy()
+    counts = np.bincount(key_ids * steps + requests["step"].to_numpy(), minlength=len(keys) * steps).reshape(len(keys), steps)
+    rates = keys.loc[np.repeat(np.arange(len(keys)), steps)].reset_index(drop=True)
+    rates["time"] = pd.to_datetime(start + STEP_SECONDS * np.tile(np.arange(steps), len(keys)), unit="s", utc=True)
+    rates["requests"] = counts.ravel()
+    rates["rate"] = rates["requests"] / STEP_SECONDS
+
+    # Entre chegadas: ordena por endpoint e horário e descarta a diferença entre endpoints vizinhos
+    endpoint_columns = ["nf", "source", "method", "endpoint"]
+    ordered = requests.sort_values(endpoint_columns + ["time"], ignore_index=True)
+    group_ids = ordered.groupby(endpoint_columns, sort=False).ngroup().to_numpy()
+    gaps = np.diff(ordered["time"].to_numpy()) / 1e6
+    same = group_ids[1:] == group_ids[:-1]
+    gaps = pd.DataFrame({"group": group_ids[1:][same], "gap_ms": gaps[same]})
+    summary = gaps.groupby("group")["gap_ms"].agg(mean_ms="mean", p50_ms="median", p95_ms=lambda x: x.quantile(0.95),
+                                                   p99_ms=lambda x: x.quantile(0.99), std_ms="std")
+    interarrival = ordered.groupby(endpoint_columns, sort=False).size().rename("requests").reset_index()
+    interarrival = interarrival.join(summary)
+    interarrival["cv"] = interarrival["std_ms"] / interarrival["mean_ms"]
+    return rates, interarrival.drop(columns="std_ms")
+
+# Matriz NF x NF de uma rodada no formato do output_rate.csv: taxa média (req/s) de cada
+# origem para cada NF que registra acessos, somando endpoints e status
+def round_matrix(rates, profile):
+    nfs = profile["nfs"]
+    matrix = pd.DataFrame(0.0, index=nfs, columns=nfs)
+    means = rates.groupby(["source", "nf"])["requests"].sum() / (rates["time"].nunique() * STEP_SECONDS)
+    for (source, destination), value in means.items():
+        if source in nfs and destination in nfs:
+            matrix.at[source, destination] = value
+    return matrix
+
+# Extrai as séries do GIN de todas as rodadas de um cenário e grava gin_rate.csv,
+# gin_interarrival.csv e output_gin_rate.csv (mesmo formato do output_rate.csv).
+# Retorna (taxas, entre chegadas, matriz).
+def extract_scenario(scenario_dir, output_dir=None, profile=PROFILES["free5gc"]):
+    output_dir = output_dir or scenario_dir
+    os.makedirs(output_dir, exist_ok=True)
+    windows = round_windows(scenario_dir)
+    per_round = {}
+    for round_id, path in scenario_logs(scenario_dir):
+        if round_id in windows:
+            per_round.setdefault(round_id, []).append(read_requests(path, nf_from_filename(os.path.basename(path), profile)))
+
+    rates, interarrivals, matrices = [], [], []
+    for round_id in sorted(per_round):
+        round_rates, round_interarrival = round_series(pd.concat(per_round[round_id], ignore_index=True), *windows[round_id])
+        rates.append(round_rates.assign(round=round_id))
+        interarrivals.append(round_interarrival.assign(round=round_id))
+        matrices.append(round_matrix(round_rates, profile))
+
+    rates = pd.concat(rates, ignore_index=True) if rates else pd.DataFrame()
+    interarrivals = pd.concat(interarrivals, ignore_index=True) if interarrivals else pd.DataFrame()
+    matrix = combine_matrices(matrices, profile)
+    rates.to_csv(os.path.join(output_dir, "gin_rate.csv"), index=False)
+    interarrivals.to_csv(os.path.join(output_dir, "gin_interarrival.csv"), index=False)
+    matrix.to_csv(os.path.join(output_dir, "output_gin_rate.csv"))
+    return rates, interarrivals, matrix
+
+# Junta a matriz do GIN com a do Prometheus (output_rate.csv) nos pares em que o GIN tem
+# dados: uma linha por par, com as duas taxas e a razão GIN / Istio
+def join_rates(gin_matrix, rate_csv):
+    prometheus = read_csv(rate_csv, index_col=0).apply(pd.to_numeric, errors="coerce")
+    gin = gin_matrix.apply(pd.to_numeric, errors="coerce")
+    joined = pd.DataFrame({"gin_rate": gin.stack(), "prometheus_rate": prometheus.stack()})
+    joined.index.names = ["source", "destination"]
+    joined = joined[joined["gin_rate"] > 0].reset_index()
+    joined["ratio"] = joined["gin_rate"] / joined["prometheus_rate"].where(joined["prometheus_rate"] > 0)
+    return joined
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Extract per-endpoint request rate, status and inter-arrival series from the Free5GC GIN access logs.")
+    parser.add_argument("directories", nargs='+', type=str, help="Dataset scenario directories (with the test_N subdirectories)")
+    parser.add_argument("--output_dir", type=str, default=None, help="Write the CSVs to <output_dir>/<scenario> instead of the scenario directory")
+    parser.add_argument("--rate_csv", type=str, default="output_rate.csv", help="Prometheus rate matrix (in the scenario directory) to join against")
+    args = parser.parse_args()
+
+    for directory in args.directories:
+        output_dir = os.path.join(args.output_dir, os.path.basename(os.path.normpath(directory))) if args.output_dir else directory
+        inicio = time.perf_counter()
+        rates, interarrivals, matrix = extract_scenario(directory, output_dir)
+        print(f"{directory}: {int(rates['requests'].sum()) if len(rates) else 0} requisições em {time.perf_counter() - inicio:.2f} s")
+        rate_csv = os.path.join(directory, args.rate_csv)
+        if os.path.exists(resolve(rate_csv)):
+            joined = join_rates(matrix, rate_csv)
+            joined.to_csv(os.path.join(output_dir, "gin_vs_prometheus.csv"), index=False)
+            print(joined.to_string(index=False))
@@ -0,0 +1,102 @@
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from .collector import PROFILES
+from .dataset_pack import getsize
+from .log_parser import NS, convert_log, scenario_jobs
+
+# Core de um log pelo prefixo do arquivo (free5gc-pcf-1.log, open5gs-upf-1-3.log)
+def core_of_log(filename):
+    for core, profile in PROFILES.items():
+        if filename.startswith(profile["app_prefix"]):
+            return core
+    return None
+
+# Percorre os diretórios Dataset e lista os logs de todos os cenários:
+# [(core, cenário, rodada, caminho, início da rodada em ns)], dos maiores para os menores,
+# para que os arquivos grandes não fiquem para o fim da fila do pool
+def find_jobs(roots):
+    jobs = []
+    for root in roots:
+        for name in sorted(os.listdir(root)):
+            directory = os.path.join(root, name)
+            if not os.path.isdir(directory):
+                continue
+            for scenario, round_id, path, reference_ns in scenario_jobs(directory):
+                core = core_of_log(os.path.basename(path))
+                if core:
+                    jobs.append((core, scenario, round_id, path, reference_ns))
+    return sorted(jobs, key=lambda job: getsize(job[3]), reverse=True)
+
+# Os mesmos jobs de find_jobs, lidos do catálogo do catalog.py (sem percorrer os diretórios)
+def jobs_from_catalog(database):
+    import pandas as pd
+    from .catalog import read_catalog
+
+    logs = read_catalog(database, ["core", "scenario", "round", "round_start", "size"], kind="log").sort_values("size", ascending=False)
+    return [(core, scenario, int(round_id), path, int(round_start) * NS if pd.notna(round_start) else None)
+            for core, scenario, round_id, path, round_start in logs[["core", "scenario", "round", "path", "round_start"]].itertuples(index=False)]
+
+# Converte um log na sua partição (executado nos processos do pool). Retorna (eventos, bytes lidos).
+def ingest_file(job, output_dir):
+    core, scenario, round_id, path, reference_ns = job
+    partition = os.path.join(output_dir, f"core={core}", f"scenario={scenario}", f"round={round_id}")
+    return convert_log(path, partition, core, reference_ns), getsize(path)
+
+# Converte todos os logs, distribuídos entre processes processos (1 = no próprio processo).
+# Os arquivos de saída formam um único dataset particionado por core, cenário e rodada.
+# Retorna {"files", "events", "bytes", "wall_s"}.
+def ingest(jobs, output_dir, processes=1):
+    inicio = time.perf_counter()
+    events = 0
+    size = 0
+    if processes == 1:
+        for job in jobs:
+            file_events, file_size = ingest_file(job, output_dir)
+            events += file_events
+            size += file_size
+    else:
+        with ProcessPoolExecutor(max_workers=processes) as pool:
+            futures = [pool.submit(ingest_file, job, output_dir) for job in jobs]
+            for future in as_completed(futures):
+                file_events, file_size = future.result()
+                events += file_events
+                size += file_size
+    return {"files": len(jobs), "events": events, "bytes": size, "wall_s": time.perf_counter() - inicio}
+
+# Junta as partições em um único arquivo Parquet (com as colunas core, scenario e round),
+# lendo um row group de cada vez
+def merge_dataset(output_dir, merged):
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+
+    dataset = ds.dataset(output_dir, format="parquet", partitioning="hive")
+    rows = 0
+    with pq.ParquetWriter(merged, dataset.schema, compression="zstd") as writer:
+        for batch in dataset.to_batches():
+            if batch.num_rows:
+                writer.write_batch(batch)
+                rows += batch.num_rows
+    return rows
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Parse the NF logs of every test_N directory of the Dataset trees in parallel.")
+    parser.add_argument("roots", nargs='*', type=str, help="Dataset directories to walk (e.g. Free5GC/Dataset Open5GS/Dataset)")
+    parser.add_argument("--catalog", type=str, default=None, help="Take the logs from this catalog (catalog.py build) instead of walking the roots")
+    parser.add_argument("--output_dir", type=str, default="logs_parquet", help="Root of the partitioned Parquet dataset")
+    parser.add_argument("--processes", type=int, default=os.cpu_count(), help="Number of worker processes")
+    parser.add_argument("--merged", type=str, default=None, help="Also merge the partitions into this single Parquet file")
+    args = parser.parse_args()
+
+    if not args.roots and not args.catalog:
+        parser.error("give the Dataset directories or --catalog")
+    jobs = jobs_from_catalog(args.catalog) if args.catalog else find_jobs(args.roots)
+    result = ingest(jobs, args.output_dir, args.processes)
+    mib = result["bytes"] / 1024 ** 2
+    print(f"{result['files']} logs ({mib:.1f} MiB), {result['events']} eventos em {result['wall_s']:.1f} s "
+          f"com {args.processes} processos ({mib / result['wall_s']:.1f} MiB/s)")
+    if args.merged:
+        rows = merge_dataset(args.output_dir, args.merged)
+        print(f"{rows} eventos reunidos em {args.merged}")
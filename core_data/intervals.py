@@ -0,0 +1,34 @@
+import os
+import re
+from datetime import datetime
+
+# Função para converter timestamps UNIX em formato de data legível
+def timestamp_to_datetime(timestamp):
+    return datetime.fromtimestamp(timestamp).strftime("%Y-%m-%d %H:%M:%S")
+
+# Função para arredondar a data ao passo de 30s e converter para UNIX timestamp
+def redefine_date(date_str):
+    dt = datetime.strptime(date_str, "%Y-%m-%d %H:%M:%S")
+    if dt.second >= 30:
+        dt = dt.replace(second=30, microsecond=0)
+    else:
+        dt = dt.replace(second=0, microsecond=0)
+    return dt.timestamp()
+
+def get_timestamps_from_file(filepath):
+    start_end_timestamps = []
+    with open(filepath, 'r') as f:
+        for line in f:
+            # Cada linha deve estar no formato "timestamp_inicial-timestamp_final"
+            match = re.match(r"(\d+)-(\d+)", line.strip())
+            if match:
+                start_end_timestamps.append((int(match.group(1)), int(match.group(2))))
+    return start_end_timestamps
+
+def get_timestamps_from_directory(directory):
+    # O connection_test.sh (e o Dataset) usa timestamp.txt; timestamps.txt é o nome que os scripts sempre procuraram
+    for filename in ('timestamps.txt', 'timestamp.txt'):
+        filepath = os.path.join(directory, filename)
+        if os.path.exists(filepath):
+            return get_timestamps_from_file(filepath)
+    raise FileNotFoundError(f"Nenhum arquivo 'timestamps.txt' ou 'timestamp.txt' foi encontrado no diretório: {directory}")
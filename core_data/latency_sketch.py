@@ -0,0 +1,260 @@
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from .catalog import parse_tester_filename
+from .dataset_pack import listdir
+from .rate_engine import tester_chunks
+from .tester_loader import load_tester_csv
+
+# Colunas do tester resumidas (ms entre o timestamp do UE e o estado; vazias se o UE não chegou lá)
+LATENCY_COLUMNS = ["MM5G_REGISTERED", "DataPlaneReady"]
+QUANTILES = [0.5, 0.9, 0.99, 0.999]
+# Bits do sub-intervalo linear de cada potência de 2: 2^(SUB_BITS-1) intervalos por oitava, erro
+# relativo de no máximo 2^-SUB_BITS (0,8%) no valor representativo (o meio do intervalo)
+SUB_BITS = 7
+# Resolução dos valores no histograma: 1 µs
+UNIT_MS = 1e-3
+# Campos do nome do CSV que identificam o cenário (a repetição é a rodada)
+SCENARIO_FIELDS = ["core", "test", "num_ue", "delay", "factor", "interval"]
+
+# Intervalo de cada valor inteiro (µs) no histograma log-linear (estilo HDR): valores abaixo de
+# 2^SUB_BITS têm intervalo próprio; acima, cada potência de 2 é dividida em 2^(SUB_BITS-1) partes iguais
+def bucket_index(values, sub_bits=SUB_BITS):
+    values = np.asarray(values, dtype=np.int64)
+    magnitude = np.maximum(np.frexp(values.astype(np.float64))[1] - sub_bits, 0)
+    return (magnitude << (sub_bits - 1)) + (values >> magnitude)
+
+# Início e largura (µs) dos intervalos
+def bucket_bounds(indexes, sub_bits=SUB_BITS):
+    indexes = np.asarray(indexes, dtype=np.int64)
+    magnitude = np.maximum((indexes >> (sub_bits - 1)) - 1, 0)
+    width = np.left_shift(1, magnitude)
+    return (indexes - (magnitude << (sub_bits - 1))) * width, width
+
+# Histograma de latências com intervalos de largura relativa fixa: memória proporcional ao
+# número de oitavas (não ao de amostras) e união de rodadas/réplicas somando as contagens.
+# Amostras vazias (UE que não chegou ao estado) são contadas à parte em missing.
+class LatencyHistogram:
+    def __init__(self, sub_bits=SUB_BITS):
+        self.sub_bits = sub_bits
+        self.counts = np.zeros(0, dtype=np.int64)
+        self.missing = 0
+        self.total = 0
+        self.sum_ms = 0.0
+        self.min_ms = np.inf
+        self.max_ms = -np.inf
+
+    def _grow(self, length):
+        if length > len(self.counts):
+            self.counts = np.concatenate([self.counts, np.zeros(length - len(self.counts), dtype=np.int64)])
+
+    def add(self, values_ms):
+        values_ms = np.asarray(values_ms, dtype=np.float64)
+        finite = np.isfinite(values_ms)
+        self.missing += int((~finite).sum())
+        values_ms = np.maximum(values_ms[finite], 0.0)
+        if not len(values_ms):
+            return self
+        added = np.bincount(bucket_index(np.rint(values_ms / UNIT_MS), self.sub_bits))
+        self._grow(len(added))
+        self.counts[:len(added)] += added
+        self.total += len(values_ms)
+        self.sum_ms += float(values_ms.sum())
+        self.min_ms = min(self.min_ms, float(values_ms.min()))
+        self.max_ms = max(self.max_ms, float(values_ms.max()))
+        return self
+
+    def merge(self, other):
+        if other.sub_bits != self.sub_bits:
+            raise ValueError(f"Histogramas com resoluções diferentes: {self.sub_bits} e {other.sub_bits} bits")
+        self._grow(len(other.counts))
+        self.counts[:len(other.counts)] += other.counts
+        self.missing += other.missing
+        self.total += other.total
+        self.sum_ms += other.sum_ms
+        self.min_ms = min(self.min_ms, other.min_ms)
+        self.max_ms = max(self.max_ms, other.max_ms)
+        return self
+
+    def mean(self):
+        return self.sum_ms / self.total if self.total else np.nan
+
+    # Quantis pela posição (menor valor com pelo menos q*total amostras até ele), com o meio do
+    # intervalo como valor, limitado ao mínimo e ao máximo observados
+    def quantiles(self, qs):
+        qs = np.asarray(qs, dtype=np.float64)
+        if not self.total:
+            return np.full(qs.shape, np.nan)
+        ranks = np.maximum(np.ceil(qs * self.total), 1)
+        indexes = np.searchsorted(np.cumsum(self.counts), ranks, side="left")
+        starts, widths = bucket_bounds(indexes, self.sub_bits)
+        return np.clip((starts + (widths - 1) / 2) * UNIT_MS, self.min_ms, self.max_ms)
+
+    # CDF nos intervalos ocupados: fração das amostras até o fim de cada intervalo
+    def cdf(self):
+        indexes = np.flatnonzero(self.counts)
+        starts, widths = bucket_bounds(indexes, self.sub_bits)
+        return pd.DataFrame({"latency_ms": np.minimum((starts + widths) * UNIT_MS, self.max_ms),
+                             "cdf": np.cumsum(self.counts[indexes]) / max(self.total, 1)})
+
+    # Forma serializável (só os intervalos ocupados)
+    def to_dict(self):
+        indexes = np.flatnonzero(self.counts)
+        return {"sub_bits": self.sub_bits, "missing": self.missing, "total": self.total, "sum_ms": self.sum_ms,
+                "min_ms": self.min_ms if self.total else None, "max_ms": self.max_ms if self.total else None,
+                "index": indexes.tolist(), "count": self.counts[indexes].tolist()}
+
+    @classmethod
+    def from_dict(cls, data):
+        histogram = cls(data["sub_bits"])
+        histogram._grow(max(data["index"], default=-1) + 1)
+        histogram.counts[data["index"]] = data["count"]
+        histogram.missing, histogram.total, histogram.sum_ms = data["missing"], data["total"], data["sum_ms"]
+        if data["total"]:
+            histogram.min_ms, histogram.max_ms = data["min_ms"], data["max_ms"]
+        return histogram
+
+# Ordem das chaves (cenário, rodada, coluna): rodadas em ordem numérica, "all" depois delas
+def sketch_order(key):
+    scenario, round_id, column = key
+    return scenario, round_id == "all", round_id if round_id != "all" else 0, column
+
+# Cenário e rodada de um CSV do tester pelo nome; nomes fora do padrão viram um cenário próprio
+def scenario_of(path):
+    params = parse_tester_filename(path)
+    if not params:
+        return os.path.splitext(os.path.basename(path))[0], 0
+    return "_".join(str(params[field]) for field in SCENARIO_FIELDS if params[field] is not None), params["repetition"]
+
+# CSVs do tester nos caminhos (arquivos ou diretórios)
+def find_tester_csvs(paths):
+    for path in paths:
+        if os.path.isdir(path):
+            for name in sorted(listdir(path)):
+                if name.endswith(".csv") and parse_tester_filename(name):
+                    yield os.path.join(path, name)
+        else:
+            yield path
+
+# Histogramas de um CSV, um por coluna, lendo um bloco de cada vez (stream) ou pelo cache do tester_loader
+def sketch_file(path, columns=LATENCY_COLUMNS, stream=False, sub_bits=SUB_BITS):
+    histograms = {column: LatencyHistogram(sub_bits) for column in columns}
+    chunks = tester_chunks(path, columns) if stream else [load_tester_csv(path, columns)]
+    for chunk in chunks:
+        for column in columns:
+            histograms[column].add(chunk[column].to_numpy())
+    return histograms
+
+# Histogramas por (cenário, rodada, coluna) de vários CSVs; CSVs da mesma rodada (réplicas) são somados
+def sketch_files(paths, columns=LATENCY_COLUMNS, stream=False, sub_bits=SUB_BITS):
+    sketches = {}
+    for path in paths:
+        scenario, round_id = scenario_of(path)
+        for column, histogram in sketch_file(path, columns, stream, sub_bits).items():
+            key = (scenario, round_id, column)
+            sketches[key] = sketches[key].merge(histogram) if key in sketches else histogram
+    return sketches
+
+# Soma histogramas de outros conjuntos (ex.: lidos com load_sketches de outras máquinas)
+def merge_sketches(sketches, other):
+    for key, histogram in other.items():
+        sketches[key] = sketches[key].merge(histogram) if key in sketches else LatencyHistogram(histogram.sub_bits).merge(histogram)
+    return sketches
+
+# Histogramas de cada cenário inteiro (todas as rodadas somadas), com rodada "all"
+def scenario_totals(sketches):
+    totals = {}
+    for (scenario, round_id, column), histogram in sketches.items():
+        key = (scenario, "all", column)
+        totals[key] = totals.setdefault(key, LatencyHistogram(histogram.sub_bits)).merge(histogram)
+    return totals
+
+def save_sketches(sketches, output):
+    with open(output, "w") as f:
+        json.dump([{"scenario": scenario, "round": round_id, "column": column, "sketch": histogram.to_dict()}
+                   for (scenario, round_id, column), histogram in sorted(sketches.items(), key=lambda item: sketch_order(item[0]))], f)
+
+def load_sketches(path):
+    with open(path) as f:
+        return {(item["scenario"], item["round"], item["column"]): LatencyHistogram.from_dict(item["sketch"]) for item in json.load(f)}
+
+# Uma linha por (cenário, rodada, coluna) com contagens, média e quantis em ms
+def summary_table(sketches, quantiles=QUANTILES):
+    rows = []
+    for (scenario, round_id, column), histogram in sorted(sketches.items(), key=lambda item: sketch_order(item[0])):
+        row = {"scenario": scenario, "round": round_id, "column": column, "count": histogram.total, "missing": histogram.missing,
+               "mean_ms": histogram.mean(), "min_ms": histogram.min_ms if histogram.total else np.nan}
+        row.update({f"p{q * 100:g}_ms": value for q, value in zip(quantiles, histogram.quantiles(quantiles))})
+        row["max_ms"] = histogram.max_ms if histogram.total else np.nan
+        rows.append(row)
+    return pd.DataFrame(rows)
+
+# CDFs de todos os histogramas em formato longo
+def cdf_table(sketches):
+    tables = [histogram.cdf().assign(scenario=scenario, round=round_id, column=column)
+              for (scenario, round_id, column), histogram in sorted(sketches.items(), key=lambda item: sketch_order(item[0]))]
+    if not tables:
+        return pd.DataFrame(columns=["scenario", "round", "column", "latency_ms", "cdf"])
+    return pd.concat(tables, ignore_index=True)[["scenario", "round", "column", "latency_ms", "cdf"]]
+
+# Um gráfico por cenário, um subplot por coluna: CDF de cada rodada e do cenário inteiro
+def plot_cdfs(sketches, totals, output_prefix, columns=LATENCY_COLUMNS):
+    import matplotlib.pyplot as plt
+
+    outputs = []
+    for scenario in sorted({scenario for scenario, _, _ in totals}):
+        fig, axs = plt.subplots(1, len(columns), figsize=(6 * len(columns), 5), squeeze=False)
+        for ax, column in zip(axs[0], columns):
+            rounds = sorted(round_id for s, round_id, c in sketches if s == scenario and c == column)
+            for round_id in rounds:
+                cdf = sketches[(scenario, round_id, column)].cdf()
+                ax.step(cdf["latency_ms"], cdf["cdf"], where="post", linewidth=1, alpha=0.6, label=f"Round {round_id}")
+            if (scenario, "all", column) in totals:
+                cdf = totals[(scenario, "all", column)].cdf()
+                ax.step(cdf["latency_ms"], cdf["cdf"], where="post", color="black", linewidth=2, label="All rounds")
+            ax.set_xscale("log")
+            ax.set_title(column)
+            ax.set_xlabel("Time to Connection (ms)")
+            ax.set_ylabel("CDF")
+            ax.grid(True)
+            ax.legend(fontsize=8)
+        fig.suptitle(scenario)
+        fig.tight_layout()
+        output = f"{output_prefix}_cdf_{scenario}.png"
+        fig.savefig(output, dpi=300, bbox_inches="tight")
+        plt.close(fig)
+        outputs.append(output)
+    return outputs
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Per-round and per-scenario latency quantiles and CDFs of the my5G-RANTester CSVs, from mergeable log-linear histograms.")
+    parser.add_argument("paths", nargs='*', type=str, help="Tester CSV files or directories")
+    parser.add_argument("--columns", nargs='+', default=LATENCY_COLUMNS, help="Latency columns to summarize")
+    parser.add_argument("--merge", nargs='*', default=[], help="Sketch files (from --output) to merge with the CSVs")
+    parser.add_argument("--sub_bits", type=int, default=SUB_BITS, help="Linear sub-buckets per power of two = 2^(sub_bits-1)")
+    parser.add_argument("--stream", action="store_true", help="Read the CSVs in chunks instead of through the tester_loader Feather cache")
+    parser.add_argument("--output", type=str, default="latency", help="Prefix of the output files")
+    parser.add_argument("--plot", action="store_true", help="Save a CDF plot per scenario")
+    args = parser.parse_args()
+
+    inicio = time.perf_counter()
+    sketches = sketch_files(find_tester_csvs(args.paths), args.columns, args.stream, args.sub_bits)
+    for path in args.merge:
+        merge_sketches(sketches, load_sketches(path))
+    totals = scenario_totals(sketches)
+
+    save_sketches(sketches, f"{args.output}_sketches.json")
+    summary = summary_table({**sketches, **totals})
+    summary.to_csv(f"{args.output}_summary.csv", index=False)
+    cdf_table({**sketches, **totals}).to_csv(f"{args.output}_cdf.csv", index=False)
+    print(summary.to_string(index=False))
+    print(f"{len(sketches)} histogramas ({len(totals)} cenário/coluna) em {time.perf_counter() - inicio:.2f} s -> "
+          f"{args.output}_summary.csv, {args.output}_cdf.csv, {args.output}_sketches.json")
+    if args.plot:
+        for output in plot_cdfs(sketches, totals, args.output, args.columns):
+            print(f"Gráfico salvo como: {output}")
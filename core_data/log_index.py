@@ -0,0 +1,190 @@
+import argparse
+import collections
+import json
+import os
+import re
+import time
+
+import numpy as np
+
+from .collector import PROFILES
+from .dataset_pack import logical_names, mapped, resolve
+from .ingest_logs import core_of_log
+from .log_parser import ANSI_PATTERN, NS, default_reference, iter_records, nf_from_filename, parse_free5gc, parse_open5gs
+
+# Uma entrada do índice a cada EVERY linhas com horário
+DEFAULT_EVERY = 256
+INDEX_VERSION = 2
+# Maior desordem esperada entre os horários de linhas vizinhas (threads escrevendo no mesmo log)
+SLACK_NS = 1 * NS
+# Bloco lido a partir do offset do índice: janelas curtas decodificam só o necessário
+RANGE_CHUNK = 1 << 16
+
+# Início das linhas com horário, nos bytes do arquivo (com os códigos ANSI do Open5GS)
+LINE_START_PATTERNS = {
+    "free5gc": re.compile(rb"^\d{4}-\d\d-\d\dT\d\d:\d\d:\d\d", re.M),
+    "open5gs": re.compile(rb"^(?:\x1b\[[0-9;]*m)?\d\d/\d\d \d\d:\d\d:\d\d\.\d{3}(?:\x1b\[[0-9;]*m)?: \[", re.M),
+}
+
+def index_path(path):
+    return f"{path}.idx"
+
+# Horário (ns) de uma linha com horário, com o mesmo parser dos eventos (None se a data é inválida)
+def line_timestamp(line, core, nf, reference_ns):
+    parse = parse_open5gs([line], nf, reference_ns) if core == "open5gs" else parse_free5gc([line], nf)
+    try:
+        return next(parse).timestamp
+    except ValueError:
+        return None
+
+# Monta o índice esparso de um log: (horário, byte, número da linha) de uma a cada every linhas
+# com horário; linhas que casam com o padrão mas que o parser não consegue datar são puladas.
+# Linhas de continuação (banner de versão, dumps de configuração) nunca são indexadas, então
+# cada offset é o início de um evento completo. Nos logs compactados pelo dataset_pack.py os
+# offsets são os do texto descompactado. O cabeçalho guarda também o horário da primeira e da
+# última linha com horário (o intervalo coberto pelo log). Com write=False o índice só é
+# devolvido, sem gravar o arquivo .idx ao lado do log.
+def build_index(path, core=None, every=DEFAULT_EVERY, reference_ns=None, write=True):
+    core = core or core_of_log(os.path.basename(path))
+    nf = nf_from_filename(os.path.basename(path), PROFILES[core])
+    # Só o Open5GS precisa da referência (o ano não está no log)
+    if reference_ns is None and core == "open5gs":
+        reference_ns = default_reference(path)
+    def timestamp_at(data, offset):
+        end = data.find(b"\n", offset)
+        raw = data[offset:end if end >= 0 else len(data)].decode("utf-8", errors="replace")
+        return line_timestamp(ANSI_PATTERN.sub("", raw), core, nf, reference_ns)
+
+    entries = []
+    last_ns = None
+    stat = os.stat(resolve(path))
+    with mapped(path) as data:
+        line_number = 1
+        previous = 0
+        next_k = 0
+        # Inícios das últimas linhas, para achar a última com horário no fim do arquivo
+        recent = collections.deque(maxlen=every)
+        for k, match in enumerate(LINE_START_PATTERNS[core].finditer(data)):
+            recent.append(match.start())
+            if k < next_k:
+                continue
+            offset = match.start()
+            timestamp = timestamp_at(data, offset)
+            if timestamp is None:  # casa com o padrão mas o parser não obtém o horário: tenta a linha seguinte
+                continue
+            line_number += data[previous:offset].count(b"\n")
+            previous = offset
+            entries.append((timestamp, offset, line_number))
+            next_k = k + every
+        for offset in reversed(recent):
+            last_ns = timestamp_at(data, offset)
+            if last_ns is not None:
+                break
+        else:
+            # Nenhuma das últimas linhas tem horário: fica o da última entrada do índice
+            last_ns = entries[-1][0] if entries else None
+
+    header = {"version": INDEX_VERSION, "core": core, "every": every, "reference_ns": reference_ns,
+              "size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "entries": len(entries),
+              "first_ns": entries[0][0] if entries else None, "last_ns": last_ns}
+    table = np.array(entries, dtype=np.int64).reshape(-1, 3)
+    if not write:
+        return header, table
+    with open(index_path(path) + ".tmp", "wb") as f:
+        f.write(json.dumps(header).encode() + b"\n")
+        f.write(table.astype("<i8").tobytes())
+    os.replace(index_path(path) + ".tmp", index_path(path))
+    return header, table
+
+# Lê o índice de um log, reconstruindo-o se não existir ou se o log mudou desde então
+# (o índice reconstruído só é gravado com write=True)
+def load_index(path, core=None, every=DEFAULT_EVERY, reference_ns=None, write=True):
+    try:
+        with open(index_path(path), "rb") as f:
+            header = json.loads(f.readline())
+            table = np.frombuffer(f.read(), dtype="<i8").reshape(-1, 3)
+        stat = os.stat(resolve(path))
+        if (header["version"] == INDEX_VERSION and header["size"] == stat.st_size and header["mtime_ns"] == stat.st_mtime_ns
+                and (reference_ns is None or header["reference_ns"] == reference_ns)):
+            return header, table
+    except (OSError, ValueError, KeyError):
+        pass
+    return build_index(path, core, every, reference_ns, write)
+
+# Horário (ns) da primeira e da última linha com horário de um log (None, None se não há nenhuma).
+# Usa o .idx se ele estiver em dia; senão lê o log e só grava o índice com write=True.
+def log_span(path, core=None, reference_ns=None, write=False):
+    header, _ = load_index(path, core, reference_ns=reference_ns, write=write)
+    return header["first_ns"], header["last_ns"]
+
+# Eventos de um log com t0 <= horário <= t1 (em segundos desde a época, como no timestamp.txt).
+# A leitura começa na entrada do índice anterior a t0 e para no primeiro evento depois de t1,
+# ambos com a folga SLACK_NS para linhas fora de ordem.
+def read_range(path, t0, t1, core=None, reference_ns=None):
+    header, table = load_index(path, core, reference_ns=reference_ns)
+    t0_ns, t1_ns = int(t0 * NS), int(t1 * NS)
+    records = []
+    if not len(table):
+        return records
+    # Máximo acumulado: a busca continua válida mesmo com horários fora de ordem no índice
+    position = max(int(np.searchsorted(np.maximum.accumulate(table[:, 0]), t0_ns - SLACK_NS, side="left")) - 1, 0)
+    _, offset, line_number = table[position]
+    for record in iter_records(path, header["core"], header["reference_ns"], int(offset), int(line_number), RANGE_CHUNK):
+        if record.timestamp is None:
+            continue
+        if record.timestamp > t1_ns + SLACK_NS:
+            break
+        if t0_ns <= record.timestamp <= t1_ns:
+            records.append(record)
+    return records
+
+# Logs .log dentro dos caminhos (arquivos ou diretórios, percorridos recursivamente)
+def find_logs(paths):
+    for path in paths:
+        if os.path.isdir(path):
+            for root, _, files in os.walk(path):
+                for name in sorted(logical_names(files)):
+                    if name.endswith(".log") and core_of_log(name):
+                        yield os.path.join(root, name)
+        else:
+            yield path
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build sparse timestamp indexes (.log.idx) for the NF logs and read time windows through them.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    build = subparsers.add_parser("build", help="Index every .log under the given files or directories")
+    build.add_argument("paths", nargs='+', type=str, help="Log files or directories (e.g. Free5GC/Dataset)")
+    build.add_argument("--every", type=int, default=DEFAULT_EVERY, help="Index one of every N timestamped lines")
+    build.add_argument("--reference", type=int, help="Round start (epoch seconds) giving the year of Open5GS logs outside a scenario with timestamp.txt")
+
+    query = subparsers.add_parser("query", help="Read the events of a log between two epoch timestamps")
+    query.add_argument("path", type=str, help="Log file")
+    query.add_argument("t0", type=float, help="Window start (epoch seconds)")
+    query.add_argument("t1", type=float, help="Window end (epoch seconds)")
+    query.add_argument("--compare", action="store_true", help="Also time a full scan of the log and check that both give the same events")
+    query.add_argument("--reference", type=int, help="Round start (epoch seconds) giving the year of Open5GS logs outside a scenario with timestamp.txt")
+
+    args = parser.parse_args()
+    reference_ns = args.reference * NS if args.reference is not None else None
+
+    if args.command == "build":
+        inicio = time.perf_counter()
+        count = 0
+        for path in find_logs(args.paths):
+            build_index(path, every=args.every, reference_ns=reference_ns)
+            count += 1
+        print(f"{count} índices gerados em {time.perf_counter() - inicio:.2f} s")
+    else:
+        inicio = time.perf_counter()
+        records = read_range(args.path, args.t0, args.t1, reference_ns=reference_ns)
+        elapsed = time.perf_counter() - inicio
+        print(f"{len(records)} eventos entre {args.t0:.0f} e {args.t1:.0f} lidos pelo índice em {elapsed * 1e3:.1f} ms")
+        if args.compare:
+            header, _ = load_index(args.path, reference_ns=reference_ns)
+            inicio = time.perf_counter()
+            scanned = [record for record in iter_records(args.path, header["core"], header["reference_ns"])
+                       if record.timestamp is not None and args.t0 * NS <= record.timestamp <= args.t1 * NS]
+            elapsed_scan = time.perf_counter() - inicio
+            print(f"Leitura completa: {len(scanned)} eventos em {elapsed_scan * 1e3:.1f} ms "
+                  f"({elapsed_scan / elapsed:.0f}x); eventos {'iguais' if scanned == records else 'DIFERENTES'}")
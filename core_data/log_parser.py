@@ -0,0 +1,266 @@
+import argparse
+import calendar
+import os
+import re
+import time
+from collections import namedtuple
+
+from .collector import PROFILES, DEFAULT_CORE
+from .dataset_pack import getsize, iter_blocks, listdir
+
+# Evento de log: timestamp em ns desde a época (UTC, None nas linhas sem horário), NF, nível,
+# componente, mensagem (linhas de continuação incluídas, separadas por '\n'), local no código
+# fonte (só no Open5GS, 'arquivo.c:linha') e número da linha no arquivo
+LogRecord = namedtuple("LogRecord", ["timestamp", "nf", "level", "component", "message", "source", "line"])
+
+ANSI_PATTERN = re.compile(r"\x1b\[[0-9;]*m")
+
+# Free5GC: 2024-11-28T17:37:34.465715036Z [INFO][PCF][GIN] mensagem
+# (o logrus remove os zeros finais da fração, então ela pode ter menos de 9 dígitos)
+FREE5GC_PATTERN = re.compile(r"^(\d{4}-\d\d-\d\dT\d\d:\d\d):(\d\d)(?:\.(\d+))?Z\s*\[(\w+)\]\[[^\]]*\]\[([^\]]*)\] ?(.*)$")
+# Rotas registradas pelo GIN na inicialização, sem horário: [GIN-debug] mensagem
+GIN_DEBUG_PATTERN = re.compile(r"^\[GIN-debug\] (.*)$")
+# Open5GS: 12/08 17:50:23.548: [sbi] INFO: mensagem (../lib/sbi/context.c:1841)
+# (o local no código é separado da mensagem depois, por rpartition: no regex, a mensagem
+# não gulosa com o grupo opcional no fim custava várias vezes mais que o resto da linha)
+OPEN5GS_PATTERN = re.compile(r"^(\d\d/\d\d \d\d:\d\d):(\d\d)\.(\d{3}): \[([^\]]*)\] (\w+): (.*)$")
+
+# Níveis do logrus (abreviados em 4 letras) com os nomes usados pelo Open5GS
+LEVELS = {"INFO": "INFO", "WARN": "WARNING", "ERRO": "ERROR", "DEBU": "DEBUG", "TRAC": "TRACE", "FATA": "FATAL", "PANI": "PANIC"}
+
+# Nome dos logs de cada rodada: <prefixo><nf>-<n>.log (ex.: open5gs-upf-1-3.log)
+LOG_FILE_PATTERN = re.compile(r"^(.+)-(\d+)\.log$")
+ROUND_DIR_PATTERN = re.compile(r"^test_(\d+)$")
+
+# Bloco decodificado de cada vez: os códigos ANSI são removidos do bloco inteiro, não linha a linha
+READ_CHUNK = 1 << 20
+
+# Linhas por row group nos arquivos Parquet (limita a memória usada por arquivo)
+BATCH_ROWS = 65536
+
+NS = 1_000_000_000
+HALF_YEAR = 183 * 86400 * NS
+# Fator de cada tamanho de fração de segundo para nanossegundos ('4657' -> 465700000 ns)
+FRACTION_SCALE = [10 ** (9 - digits) for digits in range(10)]
+
+# NF de um arquivo de log (ex.: 'open5gs-upf-1-3.log' -> 'upf'), com as renomeações do perfil
+def nf_from_filename(filename, profile):
+    match = LOG_FILE_PATTERN.match(filename)
+    name = match.group(1) if match else os.path.splitext(filename)[0]
+    name = name.removeprefix(profile["app_prefix"])
+    return profile["renames"].get(name, name)
+
+# Lê as linhas de um log sem os códigos de cor ANSI. O arquivo (original ou compactado pelo
+# dataset_pack.py) é decodificado em blocos de ~READ_CHUNK bytes terminados em '\n', então
+# nenhum bloco corta uma linha, um caractere UTF-8 ou um código ANSI. start é o byte onde a
+# leitura começa (o início de uma linha, como os offsets do log_index.py).
+def clean_lines(path, start=0, chunk=READ_CHUNK):
+    for block in iter_blocks(path, start, chunk):
+        text = block.decode("utf-8", errors="replace")
+        lines = ANSI_PATTERN.sub("", text).split("\n")
+        if text.endswith("\n"):
+            lines.pop()
+        yield from lines
+
+# Eventos de um log do Free5GC. As linhas sem horário que não são do GIN (dumps de
+# configuração, versão) continuam a mensagem do evento anterior; as rotas do GIN-debug
+# viram eventos DEBUG com o horário do evento anterior.
+def parse_free5gc(lines, nf, first_line=1):
+    minutes = {}  # época de cada minuto ('2024-11-28T17:37'), calculada uma vez
+    pending = None
+    timestamp = None
+    for number, line in enumerate(lines, first_line):
+        match = FREE5GC_PATTERN.match(line)
+        if match:
+            if pending:
+                yield LogRecord(*pending)
+            minute, second, fraction, level, component, message = match.groups()
+            base = minutes.get(minute)
+            if base is None:
+                base = minutes[minute] = calendar.timegm((int(minute[:4]), int(minute[5:7]), int(minute[8:10]),
+                                                          int(minute[11:13]), int(minute[14:16]), 0))
+            timestamp = (base + int(second)) * NS + (int(fraction[:9]) * FRACTION_SCALE[min(len(fraction), 9)] if fraction else 0)
+            pending = [timestamp, nf, LEVELS.get(level, level), component, message, None, number]
+            continue
+        match = GIN_DEBUG_PATTERN.match(line)
+        if match:
+            if pending:
+                yield LogRecord(*pending)
+            pending = [timestamp, nf, "DEBUG", "GIN", match.group(1), None, number]
+        elif pending:
+            if line:
+                pending[4] += "\n" + line
+        elif line:
+            pending = [None, nf, None, None, line, None, number]
+    if pending:
+        yield LogRecord(*pending)
+
+# Eventos de um log do Open5GS. O log não traz o ano: ele vem de reference_ns (início da
+# rodada), escolhendo o ano que deixa o evento a menos de meio ano da referência.
+def parse_open5gs(lines, nf, reference_ns, first_line=1):
+    reference_year = time.gmtime(reference_ns // NS).tm_year
+    minutes = {}  # época de cada minuto ('12/08 17:50'), calculada uma vez
+    pending = None
+    for number, line in enumerate(lines, first_line):
+        match = OPEN5GS_PATTERN.match(line)
+        if match:
+            if pending:
+                yield LogRecord(*pending)
+            minute, second, millis, component, level, message = match.groups()
+            source = None
+            if message.endswith(")"):
+                text, _, location = message[:-1].rpartition(" (")
+                if location.rpartition(":")[2].isdigit() and " " not in location:
+                    message, source = text, location
+            base = minutes.get(minute)
+            if base is None:
+                fields = (int(minute[:2]), int(minute[3:5]), int(minute[6:8]), int(minute[9:11]), 0)
+                base = calendar.timegm((reference_year, *fields)) * NS
+                if base - reference_ns > HALF_YEAR:
+                    base = calendar.timegm((reference_year - 1, *fields)) * NS
+                elif reference_ns - base > HALF_YEAR:
+                    base = calendar.timegm((reference_year + 1, *fields)) * NS
+                minutes[minute] = base
+            timestamp = base + int(second) * NS + int(millis) * 1_000_000
+            pending = [timestamp, nf, level, component, message, source, number]
+        elif pending:
+            if line:
+                pending[4] += "\n" + line
+        elif line:
+            pending = [None, nf, None, None, line, None, number]  # cabeçalho do entrypoint, antes do primeiro evento
+    if pending:
+        yield LogRecord(*pending)
+
+# Gerador de eventos de um arquivo de log do core. reference_ns (início da rodada, em ns)
+# só é usado no Open5GS, para completar o ano (padrão: default_reference). start/first_line permitem começar no meio
+# do arquivo, no byte e no número de uma linha com horário.
+def iter_records(path, core=DEFAULT_CORE, reference_ns=None, start=0, first_line=1, chunk=READ_CHUNK):
+    profile = PROFILES[core]
+    nf = nf_from_filename(os.path.basename(path), profile)
+    lines = clean_lines(path, start, chunk)
+    if core == "open5gs":
+        return parse_open5gs(lines, nf, reference_ns if reference_ns is not None else default_reference(path), first_line)
+    return parse_free5gc(lines, nf, first_line)
+
+# Referência para o ano dos logs do Open5GS: início da rodada (em ns) no arquivo de timestamps do
+# cenário (<cenário>/test_N/<log>). A data de modificação do arquivo não serve (muda com um clone
+# ou uma cópia), então sem o arquivo de timestamps a referência tem de ser passada explicitamente
+def default_reference(path):
+    round_dir = os.path.dirname(os.path.abspath(path))
+    match = ROUND_DIR_PATTERN.match(os.path.basename(round_dir))
+    if match:
+        start = round_starts(os.path.dirname(round_dir)).get(int(match.group(1)))
+        if start is not None:
+            return start * NS
+    raise ValueError(f"Sem referência para o ano do log do Open5GS {path}: o cenário não tem a rodada no "
+                     f"timestamps.txt/timestamp.txt; informe reference_ns (início da rodada em ns)")
+
+# Início e fim de cada rodada (em s) a partir do arquivo de timestamps do cenário ({rodada: (início, fim)})
+def round_windows(scenario_dir):
+    for name in ("timestamps.txt", "timestamp.txt"):
+        path = os.path.join(scenario_dir, name)
+        if os.path.exists(path):
+            with open(path) as f:
+                matches = [re.match(r"(\d+)-(\d+)", line.strip()) for line in f]
+            return {k: (int(match.group(1)), int(match.group(2))) for k, match in enumerate((m for m in matches if m), 1)}
+    return {}
+
+# Início de cada rodada (em s) ({rodada: início})
+def round_starts(scenario_dir):
+    return {round_id: start for round_id, (start, _) in round_windows(scenario_dir).items()}
+
+# Logs de um cenário: [(rodada, caminho)], na ordem das rodadas
+def scenario_logs(scenario_dir):
+    logs = []
+    for name in os.listdir(scenario_dir):
+        match = ROUND_DIR_PATTERN.match(name)
+        if match and os.path.isdir(os.path.join(scenario_dir, name)):
+            round_dir = os.path.join(scenario_dir, name)
+            logs += [(int(match.group(1)), os.path.join(round_dir, log)) for log in sorted(listdir(round_dir)) if log.endswith(".log")]
+    return sorted(logs)
+
+def event_schema():
+    import pyarrow as pa
+
+    return pa.schema([
+        ("timestamp", pa.timestamp("ns", tz="UTC")),
+        ("nf", pa.dictionary(pa.int8(), pa.string())),
+        ("level", pa.dictionary(pa.int8(), pa.string())),
+        ("component", pa.dictionary(pa.int16(), pa.string())),
+        ("message", pa.string()),
+        ("source", pa.dictionary(pa.int32(), pa.string())),
+        ("line", pa.int32()),
+    ])
+
+# Grava os eventos de um log em Parquet, em row groups de BATCH_ROWS linhas:
+# só um lote fica em memória, qualquer que seja o tamanho do log. Retorna o número de eventos.
+def write_events(records, output, schema=None):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = schema or event_schema()
+    total = 0
+    with pq.ParquetWriter(output, schema, compression="zstd") as writer:
+        batch = []
+        for record in records:
+            batch.append(record)
+            if len(batch) == BATCH_ROWS:
+                writer.write_table(pa.Table.from_arrays([pa.array(column, type=field.type) for column, field in zip(zip(*batch), schema)], schema=schema))
+                total += len(batch)
+                batch = []
+        if batch or not total:
+            columns = zip(*batch) if batch else [[] for _ in schema]
+            writer.write_table(pa.Table.from_arrays([pa.array(list(column), type=field.type) for column, field in zip(columns, schema)], schema=schema))
+            total += len(batch)
+    return total
+
+# Logs de um cenário com a partição de cada um: [(cenário, rodada, caminho, início da rodada em ns)]
+def scenario_jobs(directory):
+    scenario = os.path.basename(os.path.normpath(directory))
+    starts = round_starts(directory)
+    return [(scenario, round_id, path, starts[round_id] * NS if round_id in starts else None)
+            for round_id, path in scenario_logs(directory)]
+
+# Converte um log em <partition>/<nome do log>.parquet. Retorna o número de eventos.
+def convert_log(path, partition, core=DEFAULT_CORE, reference_ns=None, schema=None):
+    os.makedirs(partition, exist_ok=True)
+    output = os.path.join(partition, os.path.splitext(os.path.basename(path))[0] + ".parquet")
+    return write_events(iter_records(path, core, reference_ns), output, schema)
+
+# Converte os logs dos cenários em <output_dir>/scenario=<cenário>/round=<rodada>/<nf>.parquet.
+# Retorna (eventos, bytes lidos).
+def convert_scenarios(directories, output_dir, core=DEFAULT_CORE):
+    schema = event_schema()
+    events = 0
+    size = 0
+    for directory in directories:
+        for scenario, round_id, path, reference_ns in scenario_jobs(directory):
+            partition = os.path.join(output_dir, f"scenario={scenario}", f"round={round_id}")
+            events += convert_log(path, partition, core, reference_ns, schema)
+            size += getsize(path)
+    return events, size
+
+# Lê os eventos convertidos, com filtros de igualdade aplicados durante a leitura
+# (ex.: read_events("logs", scenario="Parallel_Test_100", round=3, level="ERROR"))
+def read_events(path, columns=None, **predicates):
+    import pyarrow.dataset as ds
+
+    dataset = ds.dataset(path, format="parquet", partitioning="hive")
+    condition = None
+    for name, value in predicates.items():
+        expression = ds.field(name) == value
+        condition = expression if condition is None else condition & expression
+    return dataset.to_table(columns=columns, filter=condition).to_pandas()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Parse the NF logs of the Dataset scenarios into partitioned Parquet event tables.")
+    parser.add_argument("directories", nargs='+', type=str, help="Dataset scenario directories (with the test_N subdirectories)")
+    parser.add_argument("--core", choices=sorted(PROFILES), default=DEFAULT_CORE, help="Core network profile (log format, NF names)")
+    parser.add_argument("--output_dir", type=str, default="logs_parquet", help="Root of the partitioned Parquet dataset")
+    args = parser.parse_args()
+
+    inicio = time.perf_counter()
+    events, size = convert_scenarios(args.directories, args.output_dir, args.core)
+    elapsed = time.perf_counter() - inicio
+    print(f"{events} eventos de {size / 1024 ** 2:.1f} MiB de logs gravados em {args.output_dir} "
+          f"em {elapsed:.1f} s ({size / 1024 ** 2 / elapsed:.1f} MiB/s)")
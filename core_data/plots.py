@@ -0,0 +1,123 @@
+import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
+import seaborn as sns
+
+from .dataset_pack import read_csv
+
+# Heatmaps NF x NF de um CSV de saída (output_rate.csv, output_req.csv, ...) de até 4 diretórios,
+# com a mesma escala de cores. As células '-' (NFs que não existem no core) ficam em cinza.
+def generate_heatmaps_for_directories(directories, output_image, csv_name):
+    fig, axs = plt.subplots(2, 2, figsize=(10, 10), squeeze=False)  # 2 linhas, 2 colunas
+    titles = ['Scenario 1', 'Scenario 2', 'Scenario 3', 'Scenario 4']
+
+    all_data = []
+    for directory in directories:
+        data = read_csv(f"{directory}/{csv_name}", index_col=0)
+        # Converte os valores '-' para NaN para o heatmap principal e guarda a máscara deles
+        all_data.append((data.replace('-', np.nan).astype(float), data == '-'))
+
+    # Limites vmin e vmax com base em todos os dados
+    combined_data = pd.concat([data_numeric for data_numeric, _ in all_data])
+    vmin = combined_data.min().min()
+    vmax = combined_data.max().max()
+
+    lighter_palette = sns.light_palette("orange", as_cmap=True)
+
+    for idx, (data_numeric, mask) in enumerate(all_data):
+        sns.set_theme(style="whitegrid")
+        ax = axs[idx // 2, idx % 2]
+
+        # Heatmap dos dados numéricos sem a barra de cores
+        sns.heatmap(data_numeric, annot=True, cmap=lighter_palette, fmt='.2f', linewidths=.5,
+                    ax=ax, vmin=vmin, vmax=vmax, annot_kws={"size": 9, "color": "black"}, cbar=False)
+        # Sobrepõe a máscara cinza para os valores '-'
+        if mask.to_numpy().any():
+            sns.heatmap(mask, mask=~mask, cmap=["lightgray"], cbar=False, ax=ax, linewidths=.5)
+
+        ax.set_title(f'{titles[idx]}', fontsize=14)
+        ax.tick_params(axis='y', rotation=0, labelsize=12)
+        ax.tick_params(axis='x', labelsize=12)
+
+    # Barra de cores geral à direita de todos os subplots
+    cbar_ax = fig.add_axes([0.92, 0.3, 0.02, 0.4])
+    sm = plt.cm.ScalarMappable(cmap=lighter_palette, norm=plt.Normalize(vmin=vmin, vmax=vmax))
+    sm.set_array([])
+    fig.colorbar(sm, cax=cbar_ax)
+
+    fig.text(0.5, 0.01, 'Destination Function', ha='center', fontsize=14)
+    fig.text(0.01, 0.5, 'Source Function', va='center', rotation='vertical', fontsize=14)
+
+    # Deixa espaço para a barra de cores
+    plt.tight_layout(rect=[0.03, 0.03, 0.9, 1.0])
+    plt.savefig(output_image, dpi=300)
+    plt.close(fig)
+
+# Cores de cada NF nos gráficos de recursos
+COMPONENT_COLORS = {
+    "amf": (0.12156862745098039, 0.4666666666666667, 0.7058823529411765, 1.0),
+    "ausf": (1.0, 0.4980392156862745, 0.054901960784313725, 1.0),
+    "bsf": (0.5803921568627451, 0.403921568627451, 0.7411764705882353, 1.0),
+    "nrf": (0.17254901960784313, 0.6274509803921569, 0.17254901960784313, 1.0),
+    "nssf": (0.8392156862745098, 0.15294117647058825, 0.1568627450980392, 1.0),
+    "pcf": (0.5490196078431373, 0.33725490196078434, 0.29411764705882354, 1.0),
+    "smf": (0.8901960784313725, 0.4666666666666667, 0.7607843137254902, 1.0),
+    "udm": (0.4980392156862745, 0.4980392156862745, 0.4980392156862745, 1.0),
+    "udr": (0.7372549019607844, 0.7411764705882353, 0.13333333333333333, 1.0),
+    "upf": (0.09019607843137255, 0.7450980392156863, 0.8117647058823529, 1.0),
+}
+
+# Barras empilhadas por NF (CPU, memória, recepção e transmissão) de um output.csv por cenário
+def generate_stacked_barplots_per_component(csv_files, output_image="stacked_barplots.png"):
+    titles = ['CPU Usage', 'Memory Usage', 'Receive Bandwidth', 'Transmit Bandwidth']
+    y_axis = ['mCores', 'MB', 'Kbits/s', 'Kbits/s']
+
+    frames = []
+    scenarios = []
+    for index, csv_file in enumerate(csv_files):
+        scenario_name = f'Scenario {index + 1}'
+        frames.append(read_csv(csv_file, index_col=0).assign(Scenario=scenario_name))
+        scenarios.append(scenario_name)
+    df_combined = pd.concat(frames, axis=0)
+    metrics = df_combined.columns[:-1]  # Exclui a coluna de Cenário
+    # Só as NFs presentes nos CSVs (o Free5GC não tem BSF)
+    components = [component for component in COMPONENT_COLORS if component in df_combined.index]
+
+    fig, axes = plt.subplots(nrows=2, ncols=2, figsize=(12, 10))
+    max_y3_4 = 0  # Máximo dos gráficos 3 e 4, que ficam na mesma escala
+    handles = []
+
+    for i, (ax, metric) in enumerate(zip(axes.flatten(), metrics)):
+        bottom = np.zeros(len(scenarios))  # Base do empilhamento, uma barra por cenário
+
+        # Conversão de unidades (MB para o gráfico 2, Kbits para os gráficos 3 e 4)
+        if i == 1:
+            df_combined[metric] = df_combined[metric] / (1024 * 1024)
+        elif i in [2, 3]:
+            df_combined[metric] = 8 * df_combined[metric] / 1024
+
+        for component in components:
+            values = df_combined[df_combined.index == component].groupby('Scenario')[metric].sum()
+            for k, scenario in enumerate(scenarios):
+                if scenario in values.index:
+                    bar = ax.bar(scenario, values[scenario], bottom=bottom[k], color=COMPONENT_COLORS[component],
+                                 label=component if k == 0 else "")
+                    bottom[k] += values[scenario]
+            if i == 0:
+                handles.append(bar)
+
+        if i in [2, 3]:
+            max_y3_4 = max(max_y3_4, bottom.max())
+
+        ax.set_title(f'{titles[i]}', fontsize=14)
+        ax.set_ylabel(y_axis[i], fontsize=14)
+        ax.tick_params(axis='both', which='major', labelsize=14)
+
+    axes[1, 0].set_ylim(0, max_y3_4 * 1.05)
+    axes[1, 1].set_ylim(0, max_y3_4 * 1.05)
+
+    # Legenda única compartilhada por todos os gráficos
+    fig.legend(handles, components, loc='upper center', fontsize=12, ncol=len(components), bbox_to_anchor=(0.5, 1.00))
+    plt.tight_layout(rect=[0, 0, 1, 0.96])
+    plt.savefig(output_image, format='png', dpi=300)
+    plt.close(fig)
@@ -0,0 +1,118 @@
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from prometheus_pandas import query
+from .query_cache import CachedPrometheus
+
+# Valores padrão da camada de conexão com o Prometheus
+DEFAULT_TIMEOUT = 60
+DEFAULT_POOL_SIZE = 8
+
+# Contadores de conexões TCP abertas, requisições e bytes trafegados
+class ConnectionStats:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.cache = None
+        self.reset()
+
+    def reset(self):
+        self.connections = 0
+        self.requests = 0
+        self.bytes_received = 0
+
+    def add(self, connections=0, requests=0, bytes_received=0):
+        with self.lock:
+            self.connections += connections
+            self.requests += requests
+            self.bytes_received += bytes_received
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                "connections": self.connections,
+                "requests": self.requests,
+                "bytes_received": self.bytes_received,
+            }
+
+    def __str__(self):
+        data = self.snapshot()
+        summary = (f"{data['requests']} requests over {data['connections']} connections, "
+                   f"{data['bytes_received'] / 1024:.1f} KiB received")
+        if self.cache is not None:
+            summary += f"; {self.cache}"
+        return summary
+
+# Contadores compartilhados por todos os clientes do processo
+stats = ConnectionStats()
+
+# Pools do urllib3 que contam cada nova conexão aberta
+class CountingHTTPConnectionPool(HTTPConnectionPool):
+    def _new_conn(self):
+        stats.add(connections=1)
+        return super()._new_conn()
+
+class CountingHTTPSConnectionPool(HTTPSConnectionPool):
+    def _new_conn(self):
+        stats.add(connections=1)
+        return super()._new_conn()
+
+# Adapter HTTP com keep-alive e pool de conexões limitado
+class PooledAdapter(HTTPAdapter):
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": CountingHTTPConnectionPool,
+            "https": CountingHTTPSConnectionPool,
+        }
+
+# Sessão HTTP reutilizável com timeout padrão e contagem de bytes recebidos
+class PooledSession(requests.Session):
+    def __init__(self, timeout=DEFAULT_TIMEOUT, pool_size=DEFAULT_POOL_SIZE):
+        super().__init__()
+        self.timeout = timeout
+        adapter = PooledAdapter(pool_connections=1, pool_maxsize=pool_size, pool_block=True)
+        self.mount("http://", adapter)
+        self.mount("https://", adapter)
+        self.hooks["response"].append(self._count_response)
+
+    def request(self, method, url, **kwargs):
+        kwargs.setdefault("timeout", self.timeout)
+        return super().request(method, url, **kwargs)
+
+    @staticmethod
+    def _count_response(response, *args, **kwargs):
+        # tell() retorna os bytes lidos da rede (antes da descompressão gzip)
+        body = response.content
+        wire_bytes = response.raw.tell() if response.raw is not None else 0
+        stats.add(requests=1, bytes_received=wire_bytes or len(body))
+
+_clients = {}
+_clients_lock = threading.Lock()
+_cache = None
+
+# Define o cache em disco usado pelos clientes criados a partir de agora (None desativa)
+def configure_cache(cache):
+    global _cache
+    _cache = cache
+    stats.cache = cache
+
+# Retorna o cliente Prometheus compartilhado para a URL, criando-o na primeira chamada. Clientes
+# com timeout, tamanho do pool ou cache diferentes são separados, então as opções de cada chamada
+# (e um cache configurado depois) sempre valem.
+def get_client(prometheus_url, timeout=DEFAULT_TIMEOUT, pool_size=DEFAULT_POOL_SIZE):
+    key = (prometheus_url, timeout, pool_size, id(_cache))
+    with _clients_lock:
+        if key not in _clients:
+            session = PooledSession(timeout=timeout, pool_size=pool_size)
+            client = query.Prometheus(prometheus_url, http=session)
+            _clients[key] = CachedPrometheus(client, _cache) if _cache is not None else client
+        return _clients[key]
+
+# Fecha todas as conexões abertas pelos clientes compartilhados
+def close_clients():
+    with _clients_lock:
+        for client in _clients.values():
+            client.http.close()
+        _clients.clear()
@@ -0,0 +1,162 @@
+import hashlib
+import importlib.util
+import json
+import os
+import threading
+import time
+
+import pandas as pd
+
+# Valores padrão do cache de consultas
+DEFAULT_CACHE_DIR = ".prometheus_cache"
+DEFAULT_CACHE_MAX_MB = 1024
+# Janelas que terminaram há menos que isso ainda podem mudar e não são guardadas
+HISTORICAL_MARGIN = 300
+# Passo usado na chave do cache para as consultas instantâneas
+INSTANT_STEP = "instant"
+
+# Erro levantado no modo offline quando a consulta não está no cache
+class CacheMissError(LookupError):
+    pass
+
+# Cache em disco dos resultados de query_range, endereçado pelo conteúdo da consulta
+# (servidor, query, start, end, step) e armazenado em Parquet, com remoção dos arquivos
+# menos usados quando o tamanho total passa do limite
+class QueryCache:
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_CACHE_MAX_MB * 1024 * 1024, offline=False):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.offline = offline
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(cache_dir, exist_ok=True)
+        self.total_bytes = sum(size for _, _, size in self._entries())
+
+    # Chave do cache: hash SHA-256 dos parâmetros da consulta e do namespace (a URL do servidor,
+    # para que Prometheus diferentes não compartilhem resultados)
+    @staticmethod
+    def key(query_string, start, end, step, namespace=""):
+        payload = json.dumps([namespace, query_string, float(start), float(end), str(step)])
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key[:2], f"{key}.parquet")
+
+    # Lista (caminho, último acesso, tamanho) de todas as entradas do cache
+    def _entries(self):
+        for root, _, files in os.walk(self.cache_dir):
+            for name in files:
+                if name.endswith(".parquet"):
+                    path = os.path.join(root, name)
+                    stat = os.stat(path)
+                    yield path, stat.st_mtime, stat.st_size
+
+    def get(self, query_string, start, end, step, namespace=""):
+        path = self._path(self.key(query_string, start, end, step, namespace))
+        try:
+            result = pd.read_parquet(path)
+        except FileNotFoundError:
+            with self.lock:
+                self.misses += 1
+            return None
+        # Atualiza o horário de acesso para a política LRU
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            pass
+        with self.lock:
+            self.hits += 1
+        return result
+
+    def put(self, query_string, start, end, step, result, namespace=""):
+        # Só guarda janelas históricas, cujos dados não mudam mais
+        if float(end) > time.time() - HISTORICAL_MARGIN:
+            return
+        path = self._path(self.key(query_string, start, end, step, namespace))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        result.to_parquet(tmp_path)
+        size = os.path.getsize(tmp_path)
+        with self.lock:
+            # Uma entrada regravada só soma a diferença de tamanho
+            try:
+                size -= os.path.getsize(path)
+            except FileNotFoundError:
+                pass
+            os.replace(tmp_path, path)
+            self.total_bytes += size
+            if self.total_bytes > self.max_bytes:
+                self._evict()
+
+    # Remove as entradas acessadas há mais tempo até voltar abaixo do limite
+    def _evict(self):
+        entries = sorted(self._entries(), key=lambda entry: entry[1])
+        self.total_bytes = sum(size for _, _, size in entries)
+        for path, _, size in entries:
+            if self.total_bytes <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            self.total_bytes -= size
+
+    def __str__(self):
+        return (f"cache {self.hits} hits, {self.misses} misses, "
+                f"{self.total_bytes / (1024 * 1024):.1f} MiB in {self.cache_dir}")
+
+# Cliente Prometheus que consulta o cache antes de ir ao servidor. As entradas ficam no
+# namespace da URL do servidor, a menos que outro seja informado.
+class CachedPrometheus:
+    def __init__(self, prometheus, cache, namespace=None):
+        self.prometheus = prometheus
+        self.cache = cache
+        self.http = prometheus.http
+        self.namespace = namespace if namespace is not None else prometheus.api_url.rstrip("/")
+
+    def query_range(self, query_string, start, end, step, timeout=None):
+        result = self.cache.get(query_string, start, end, step, self.namespace)
+        if result is not None:
+            return result
+        if self.cache.offline:
+            raise CacheMissError(f"Consulta fora do cache no modo offline: {query_string} [{start}, {end}]")
+        result = self.prometheus.query_range(query_string, start, end, step, timeout)
+        self.cache.put(query_string, start, end, step, result, self.namespace)
+        return result
+
+    # Consultas instantâneas são guardadas como uma janela de largura zero em time
+    def query(self, query_string, time=None, timeout=None):
+        if time is None:
+            if self.cache.offline:
+                raise CacheMissError(f"Consulta instantânea sem horário no modo offline: {query_string}")
+            return self.prometheus.query(query_string, time, timeout)
+        result = self.cache.get(query_string, time, time, INSTANT_STEP, self.namespace)
+        if result is not None:
+            return result["value"]
+        if self.cache.offline:
+            raise CacheMissError(f"Consulta fora do cache no modo offline: {query_string} [{time}]")
+        result = self.prometheus.query(query_string, time, timeout)
+        if isinstance(result, pd.Series):
+            self.cache.put(query_string, time, time, INSTANT_STEP, result.to_frame("value"), self.namespace)
+        return result
+
+# Adiciona as opções do cache ao parser de argumentos dos scripts
+def add_cache_arguments(parser):
+    parser.add_argument("--cache_dir", type=str, default=DEFAULT_CACHE_DIR, help="Directory of the on-disk Prometheus query cache")
+    parser.add_argument("--cache_max_mb", type=int, default=DEFAULT_CACHE_MAX_MB, help="Maximum size of the query cache in MB")
+    parser.add_argument("--no_cache", action="store_true", help="Do not read or write the query cache")
+    parser.add_argument("--offline", action="store_true", help="Serve queries only from the cache, without contacting Prometheus")
+
+# Cria o cache a partir dos argumentos da linha de comando (None se desativado)
+def cache_from_args(args):
+    if args.no_cache:
+        if args.offline:
+            raise ValueError("--offline requires the query cache")
+        return None
+    if importlib.util.find_spec("pyarrow") is None:
+        if args.offline:
+            raise ImportError("--offline requires pyarrow to read the query cache")
+        print("pyarrow não está instalado; cache de consultas desativado")
+        return None
+    return QueryCache(args.cache_dir, args.cache_max_mb * 1024 * 1024, args.offline)
@@ -0,0 +1,97 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from .prometheus_pool import configure_cache, get_client
+from .query_cache import CacheMissError, add_cache_arguments, cache_from_args
+
+# Valores padrão usados pelos scripts de coleta
+DEFAULT_WORKERS = 8
+DEFAULT_MAX_IN_FLIGHT = 8
+DEFAULT_TIMEOUT = 60
+DEFAULT_RETRIES = 3
+DEFAULT_BACKOFF = 1.0
+
+# Erros que valem uma nova tentativa (rede, timeout ou Prometheus sobrecarregado)
+def is_retryable(error):
+    if isinstance(error, CacheMissError):
+        return False
+    if isinstance(error, requests.RequestException):
+        return True
+    # prometheus_pandas levanta RuntimeError("errorType: error"); consultas inválidas não melhoram com retry
+    return isinstance(error, RuntimeError) and not str(error).startswith('bad_data')
+
+# Executor de consultas ao Prometheus com pool de threads, timeout por consulta,
+# retry com backoff exponencial e limite global de consultas simultâneas
+class QueryExecutor:
+    def __init__(self, prometheus_url, max_workers=DEFAULT_WORKERS, max_in_flight=DEFAULT_MAX_IN_FLIGHT,
+                 timeout=DEFAULT_TIMEOUT, retries=DEFAULT_RETRIES, backoff=DEFAULT_BACKOFF):
+        # Cliente compartilhado: as threads reaproveitam as conexões keep-alive do pool
+        self.prometheus = get_client(prometheus_url, timeout=timeout, pool_size=max_in_flight)
+        self.max_workers = max_workers
+        self.pool = ThreadPoolExecutor(max_workers=max_workers)
+        self.in_flight = threading.BoundedSemaphore(max_in_flight)
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.shutdown()
+
+    def _run(self, fn, *args):
+        for attempt in range(self.retries + 1):
+            try:
+                with self.in_flight:
+                    return fn(*args)
+            except Exception as error:
+                if attempt == self.retries or not is_retryable(error):
+                    raise
+                time.sleep(self.backoff * 2 ** attempt)
+
+    # Agenda fn(*args) no pool e retorna um Future
+    def submit(self, fn, *args):
+        return self.pool.submit(self._run, fn, *args)
+
+    # Agenda um query_range e retorna um Future com o DataFrame do resultado
+    def query_range(self, query_string, start, end, step="30s"):
+        return self.submit(self.prometheus.query_range, query_string, start, end, step, self.timeout)
+
+    # Agenda uma consulta instantânea avaliada em time e retorna um Future com a Series do resultado
+    def query(self, query_string, time):
+        return self.submit(self.prometheus.query, query_string, time, self.timeout)
+
+    # Executa fn para cada item em paralelo e retorna os resultados na ordem de entrada.
+    # Roda em um pool separado (como run_for_directories): fn pode agendar consultas neste executor
+    # e esperar por elas sem ocupar as threads nem as vagas de max_in_flight das consultas
+    def map(self, fn, items):
+        items = list(items)
+        if not items:
+            return []
+        with ThreadPoolExecutor(max_workers=max(1, min(self.max_workers, len(items)))) as pool:
+            return list(pool.map(fn, items))
+
+    def shutdown(self):
+        self.pool.shutdown(wait=True)
+
+# Processa os diretórios em paralelo (pool separado, para não bloquear as consultas)
+def run_for_directories(fn, directories, max_workers=DEFAULT_WORKERS):
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(directories)))) as pool:
+        return list(pool.map(fn, directories))
+
+# Adiciona as opções do executor ao parser de argumentos dos scripts
+def add_executor_arguments(parser):
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="Number of threads used to run Prometheus queries")
+    parser.add_argument("--max_in_flight", type=int, default=DEFAULT_MAX_IN_FLIGHT, help="Maximum number of queries sent to Prometheus at the same time")
+    parser.add_argument("--timeout", type=float, default=DEFAULT_TIMEOUT, help="Timeout in seconds for each query")
+    parser.add_argument("--retries", type=int, default=DEFAULT_RETRIES, help="Number of retries for a failed query")
+    add_cache_arguments(parser)
+
+# Cria o executor (e o cache de consultas) a partir dos argumentos da linha de comando
+def executor_from_args(prometheus_url, args):
+    configure_cache(cache_from_args(args))
+    return QueryExecutor(prometheus_url, max_workers=args.workers, max_in_flight=args.max_in_flight,
+                         timeout=args.timeout, retries=args.retries)
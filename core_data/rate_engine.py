@@ -0,0 +1,144 @@
+import argparse
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from .dataset_pack import read_csv_chunks
+from .tester_loader import CHUNK_ROWS, TESTER_DTYPES, load_tester_csv
+
+NS = 1_000_000_000
+
+# Colunas do tester que marcam a conclusão de cada etapa (ms depois do timestamp do UE)
+COMPLETION_COLUMNS = {"registered": "MM5G_REGISTERED", "completed": "DataPlaneReady"}
+
+# Contagem de eventos de várias séries em intervalos de bin_s segundos com a mesma origem
+# (o primeiro timestamp recebido, em ns inteiros). Os eventos chegam em blocos: cada bloco é
+# somado com np.bincount e a grade cresce para os dois lados quando preciso, então intervalos
+# sem eventos existem com contagem zero.
+class RateAccumulator:
+    def __init__(self, names, bin_s=1.0, origin_ns=None):
+        self.bin_ns = int(round(bin_s * NS))
+        self.origin_ns = origin_ns
+        self.counts = {name: np.zeros(0, dtype=np.int64) for name in names}
+
+    def _resize(self, before, length):
+        for name, counts in self.counts.items():
+            self.counts[name] = np.concatenate([np.zeros(before, dtype=np.int64), counts,
+                                                np.zeros(max(length - before - len(counts), 0), dtype=np.int64)])
+
+    def add(self, name, timestamps_ns):
+        timestamps_ns = np.asarray(timestamps_ns, dtype=np.int64)
+        if not len(timestamps_ns):
+            return
+        if self.origin_ns is None:
+            self.origin_ns = int(timestamps_ns[0])
+        bins = (timestamps_ns - self.origin_ns) // self.bin_ns
+        first = int(bins.min())
+        if first < 0:  # evento anterior à origem: a grade ganha intervalos à esquerda
+            self._resize(-first, len(self.counts[name]) - first)
+            self.origin_ns += first * self.bin_ns
+            bins -= first
+        added = np.bincount(bins)
+        if len(added) > len(self.counts[name]):
+            self._resize(0, len(added))
+        self.counts[name][:len(added)] += added
+
+    # Taxa (eventos/s) de cada série por intervalo, com o início do intervalo em segundos desde a origem
+    def frame(self):
+        length = max((len(counts) for counts in self.counts.values()), default=0)
+        self._resize(0, length)
+        bin_s = self.bin_ns / NS
+        data = pd.DataFrame({"time_s": np.arange(length) * bin_s})
+        for name, counts in self.counts.items():
+            data[name] = counts / bin_s
+        return data
+
+# Média móvel de window_bins intervalos terminando em cada intervalo (janelas incompletas no início)
+def sliding_mean(values, window_bins):
+    window_bins = max(int(window_bins), 1)
+    cumulative = np.concatenate([[0.0], np.cumsum(values, dtype=float)])
+    ends = np.arange(1, len(values) + 1)
+    starts = np.maximum(ends - window_bins, 0)
+    return (cumulative[ends] - cumulative[starts]) / (ends - starts)
+
+# Média móvel exponencial com meia-vida de half_life_bins intervalos
+def ewma(values, half_life_bins):
+    return pd.Series(values, dtype=float).ewm(halflife=max(half_life_bins, 1e-9), adjust=False).mean().to_numpy()
+
+# Blocos de um CSV do tester com as colunas pedidas (e os tipos do tester_loader), sem cache
+def tester_chunks(path, columns, chunk_rows=CHUNK_ROWS):
+    return read_csv_chunks(path, chunk_rows, usecols=columns, dtype={column: TESTER_DTYPES[column] for column in columns})
+
+# Taxas oferecida (UEs iniciados, pelo timestamp) e de conclusão de cada etapa (timestamp +
+# tempo até a etapa, nos UEs que chegaram a ela) de uma sequência de blocos de um teste.
+# window_s e ewma_s acrescentam as versões suavizadas de cada série (<série>_sliding, <série>_ewma).
+def connection_rates(chunks, bin_s=1.0, window_s=None, ewma_s=None, origin_ns=None):
+    accumulator = None
+    for chunk in chunks:
+        if accumulator is None:
+            names = ["offered"] + [name for name, column in COMPLETION_COLUMNS.items() if column in chunk]
+            accumulator = RateAccumulator(names, bin_s, origin_ns)
+        timestamps = chunk["timestamp"].to_numpy(dtype=np.int64)
+        accumulator.add("offered", timestamps)
+        for name, column in COMPLETION_COLUMNS.items():
+            if name in accumulator.counts:
+                delays = chunk[column].to_numpy(dtype=np.float64)
+                finite = np.isfinite(delays)
+                accumulator.add(name, timestamps[finite] + np.rint(delays[finite] * 1e6).astype(np.int64))
+    if accumulator is None:
+        return pd.DataFrame({"time_s": [], "offered": []})
+
+    rates = accumulator.frame()
+    for name in list(accumulator.counts):
+        if window_s:
+            rates[f"{name}_sliding"] = sliding_mean(rates[name].to_numpy(), window_s / bin_s)
+        if ewma_s:
+            rates[f"{name}_ewma"] = ewma(rates[name].to_numpy(), ewma_s / bin_s)
+    rates.attrs["origin_ns"] = accumulator.origin_ns
+    return rates
+
+# Curvas oferecida x concluída de um teste
+def plot_rates(rates, output, title=None):
+    import matplotlib.pyplot as plt
+
+    fig, ax = plt.subplots(figsize=(10, 6))
+    for name, color in (("offered", "tab:blue"), ("registered", "tab:orange"), ("completed", "tab:green")):
+        if name not in rates:
+            continue
+        smooth = next((f"{name}_{kind}" for kind in ("sliding", "ewma") if f"{name}_{kind}" in rates), None)
+        ax.plot(rates["time_s"], rates[name], color=color, linewidth=1, alpha=0.35 if smooth else 1.0, label=name)
+        if smooth:
+            ax.plot(rates["time_s"], rates[smooth], color=color, linewidth=2, label=smooth)
+    ax.set_xlabel("Experiment Time (s)")
+    ax.set_ylabel("Connections per second")
+    if title:
+        ax.set_title(title)
+    ax.grid(True)
+    ax.legend()
+    fig.tight_layout()
+    fig.savefig(output, dpi=300, bbox_inches="tight")
+    plt.close(fig)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Offered vs completed connection rates of my5G-RANTester CSVs (integer-ns bins, zero-filled).")
+    parser.add_argument("files", nargs='+', type=str, help="Tester CSV files")
+    parser.add_argument("--bin_s", type=float, default=1.0, help="Bin width in seconds")
+    parser.add_argument("--window_s", type=float, default=None, help="Also compute a trailing sliding mean over this many seconds")
+    parser.add_argument("--ewma_s", type=float, default=None, help="Also compute an EWMA with this half-life in seconds")
+    parser.add_argument("--stream", action="store_true", help="Read the CSVs in chunks instead of through the tester_loader Feather cache")
+    parser.add_argument("--plot", action="store_true", help="Save a rates_<file>.png per file")
+    args = parser.parse_args()
+
+    columns = ["timestamp"] + list(COMPLETION_COLUMNS.values())
+    for path in args.files:
+        inicio = time.perf_counter()
+        chunks = tester_chunks(path, columns) if args.stream else [load_tester_csv(path, columns)]
+        rates = connection_rates(chunks, args.bin_s, args.window_s, args.ewma_s)
+        elapsed = time.perf_counter() - inicio
+        output = f"rates_{os.path.splitext(os.path.basename(path))[0]}"
+        rates.to_csv(f"{output}.csv", index=False)
+        print(f"{path}: {len(rates)} intervalos de {args.bin_s:g} s em {elapsed:.3f} s -> {output}.csv")
+        if args.plot:
+            plot_rates(rates, f"{output}.png", title=os.path.basename(path))
@@ -0,0 +1,72 @@
+import threading
+
+import pandas as pd
+
+# Maior número de pontos por série que o Prometheus aceita em um query_range
+MAX_POINTS = 11000
+
+# Resultado do query_range da janela inteira do experimento, que pode ter sido
+# dividido em blocos de até MAX_POINTS passos
+class SpanResult:
+    def __init__(self, futures):
+        self.futures = futures
+        self.lock = threading.Lock()
+        self.data = None
+
+    def result(self):
+        with self.lock:
+            if self.data is None:
+                frames = [future.result() for future in self.futures]
+                self.data = pd.concat(frames) if len(frames) > 1 else frames[0]
+            return self.data
+
+# Future de uma rodada: recorta a janela [start, end] do resultado compartilhado
+class RoundFuture:
+    def __init__(self, span, start, end):
+        self.span = span
+        self.start = start
+        self.end = end
+
+    def result(self):
+        return slice_round(self.span.result(), self.start, self.end)
+
+# Recorta as linhas com start <= instante <= end por busca binária no índice de tempo.
+# As rodadas são contíguas, então o instante de fronteira entra nas duas, como nas consultas por rodada.
+def slice_round(result, start, end):
+    if result.empty:
+        return result
+    first = result.index.searchsorted(pd.Timestamp(start, unit='s'), side='left')
+    last = result.index.searchsorted(pd.Timestamp(end, unit='s'), side='right')
+    return result.iloc[first:last]
+
+# Substituto do QueryExecutor para o modo bulk: cada consulta é feita uma única vez
+# para a janela que cobre todas as rodadas, e cada rodada recebe o seu recorte.
+# Como start e end são alinhados ao passo (redefine_date), os pontos de cada rodada
+# são exatamente os mesmos de uma consulta feita só para ela. Intervalos entre
+# rodadas não contíguas também são buscados, mas ficam fora de todos os recortes.
+class SpanFetcher:
+    def __init__(self, executor, rounds):
+        self.executor = executor
+        self.start = min(start for start, _ in rounds)
+        self.end = max(end for _, end in rounds)
+        self.spans = {}
+        self.lock = threading.Lock()
+
+    # Dispara os blocos do query_range da janela inteira
+    def _submit_span(self, query_string, step):
+        step_seconds = pd.Timedelta(step).total_seconds()
+        futures = []
+        chunk_start = self.start
+        while chunk_start <= self.end:
+            chunk_end = min(chunk_start + (MAX_POINTS - 1) * step_seconds, self.end)
+            futures.append(self.executor.query_range(query_string, chunk_start, chunk_end, step))
+            chunk_start = chunk_end + step_seconds
+        return SpanResult(futures)
+
+    # Mesma interface do QueryExecutor.query_range
+    def query_range(self, query_string, start, end, step="30s"):
+        with self.lock:
+            key = (query_string, step)
+            if key not in self.spans:
+                self.spans[key] = self._submit_span(query_string, step)
+            return RoundFuture(self.spans[key], start, end)
@@ -0,0 +1,109 @@
+import argparse
+import hashlib
+import json
+import os
+import time
+
+from .dataset_pack import read_csv, read_csv_chunks, resolve
+
+# Colunas dos CSVs do my5G-RANTester usadas nos gráficos e seus tipos: o timestamp (ns) é
+# inteiro e os tempos até cada estado (ms, vazios quando o UE não chegou ao estado) são float32
+TESTER_DTYPES = {
+    "timestamp": "int64",
+    "MM5G_REGISTERED_INITIATED": "float32",
+    "MM5G_REGISTERED": "float32",
+    "DataPlaneReady": "float32",
+}
+TESTER_COLUMNS = list(TESTER_DTYPES)
+
+DEFAULT_CACHE_DIR = ".tester_cache"
+# Linhas lidas do CSV de cada vez: só um bloco fica em memória durante a conversão
+CHUNK_ROWS = 1_000_000
+
+# Hash SHA-256 do conteúdo do arquivo (o compactado, se for o caso), lido em blocos
+def file_hash(path):
+    digest = hashlib.sha256()
+    with open(resolve(path), "rb") as f:
+        while block := f.read(1 << 24):
+            digest.update(block)
+    return digest.hexdigest()
+
+# Hash do arquivo reaproveitado enquanto o tamanho e a data de modificação não mudam
+# (cache_dir/hashes.json), para que a leitura do cache não precise percorrer o CSV inteiro
+def cached_file_hash(path, cache_dir):
+    stored = os.path.abspath(resolve(path))
+    stat = os.stat(stored)
+    hashes_path = os.path.join(cache_dir, "hashes.json")
+    try:
+        with open(hashes_path) as f:
+            hashes = json.load(f)
+    except (OSError, ValueError):
+        hashes = {}
+    size, mtime_ns, digest = hashes.get(stored, (None, None, None))
+    if (size, mtime_ns) != (stat.st_size, stat.st_mtime_ns):
+        digest = file_hash(path)
+        hashes[stored] = (stat.st_size, stat.st_mtime_ns, digest)
+        os.makedirs(cache_dir, exist_ok=True)
+        tmp_path = f"{hashes_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(hashes, f)
+        os.replace(tmp_path, hashes_path)
+    return digest
+
+# Chave do cache: conteúdo do arquivo e colunas/tipos pedidos
+def cache_key(digest, columns):
+    payload = json.dumps([digest, [(column, TESTER_DTYPES.get(column)) for column in columns]])
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+# Converte o CSV para Feather lendo só as colunas pedidas, com tipos explícitos, em blocos de
+# CHUNK_ROWS linhas gravados um a um no arquivo
+def convert_tester_csv(path, output, columns):
+    import pyarrow as pa
+
+    dtypes = {column: TESTER_DTYPES[column] for column in columns if column in TESTER_DTYPES}
+    writer = None
+    tmp_path = f"{output}.{os.getpid()}.tmp"
+    try:
+        for chunk in read_csv_chunks(path, CHUNK_ROWS, usecols=columns, dtype=dtypes, engine="c"):
+            table = pa.Table.from_pandas(chunk[columns], preserve_index=False)
+            if writer is None:
+                writer = pa.ipc.new_file(tmp_path, table.schema, options=pa.ipc.IpcWriteOptions(compression="zstd"))
+            writer.write_table(table)
+        if writer is None:  # CSV só com o cabeçalho
+            read_csv(path, usecols=columns, dtype=dtypes, nrows=0)[columns].to_feather(tmp_path)
+        else:
+            writer.close()
+            writer = None
+        os.replace(tmp_path, output)
+    finally:
+        if writer is not None:
+            writer.close()
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+# Lê um CSV do tester (original ou compactado pelo dataset_pack.py) com as colunas pedidas.
+# A primeira leitura grava uma cópia Feather em cache_dir, endereçada pelo hash do arquivo;
+# as seguintes só leem a cópia (o CSV não é mais interpretado enquanto não mudar).
+def load_tester_csv(path, columns=TESTER_COLUMNS, cache_dir=DEFAULT_CACHE_DIR):
+    import pandas as pd
+
+    columns = list(columns)
+    key = cache_key(cached_file_hash(path, cache_dir), columns)
+    cached = os.path.join(cache_dir, key[:2], f"{key}.feather")
+    if not os.path.exists(cached):
+        os.makedirs(os.path.dirname(cached), exist_ok=True)
+        convert_tester_csv(path, cached, columns)
+    return pd.read_feather(cached, columns=columns)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load my5G-RANTester result CSVs with typed columns and cache them as Feather.")
+    parser.add_argument("files", nargs='+', type=str, help="Tester CSV files")
+    parser.add_argument("--columns", nargs='*', default=TESTER_COLUMNS, help="Columns to load")
+    parser.add_argument("--cache_dir", type=str, default=DEFAULT_CACHE_DIR, help="Directory of the Feather copies")
+    args = parser.parse_args()
+
+    for path in args.files:
+        inicio = time.perf_counter()
+        data = load_tester_csv(path, args.columns, args.cache_dir)
+        print(f"{path}: {len(data)} linhas, {data.memory_usage(deep=True).sum() / 1024 ** 2:.1f} MiB em memória, "
+              f"lidas em {time.perf_counter() - inicio:.3f} s")
@@ -0,0 +1,243 @@
+import argparse
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from .latency_sketch import find_tester_csvs
+from .rate_engine import NS, RateAccumulator
+from .tester_loader import TESTER_COLUMNS, load_tester_csv
+
+# Tempo máximo de uma conexão (ms): o T3510 do NAS, depois do qual o UE desiste da tentativa de
+# registro. Conexões concluídas depois dele contam como timeout; UEs que não concluíram ocupam
+# o core até esse tempo.
+DEFAULT_TIMEOUT_MS = 15_000
+# Janela das verificações da lei de Little
+DEFAULT_WINDOW_S = 10.0
+OUTCOMES = ["success", "timeout", "failure"]
+# Último estado alcançado pelo UE, em ordem
+STAGES = ["none", "MM5G_REGISTERED_INITIATED", "MM5G_REGISTERED", "DataPlaneReady"]
+# Vazão acima desta fração da máxima: as janelas em que o core está saturado; abaixo de
+# UNLOADED_FRACTION: as janelas em que o core ainda não forma fila
+SATURATION_FRACTION = 0.95
+UNLOADED_FRACTION = 0.5
+
+# Linha do tempo de cada UE (uma linha do CSV do tester): início (timestamp, ns), instante de cada
+# estado alcançado (ns), último estado e resultado. success: DataPlaneReady até timeout_ms;
+# timeout: DataPlaneReady depois de timeout_ms; failure: o UE nunca chegou ao DataPlaneReady.
+def ue_timelines(data, timeout_ms=DEFAULT_TIMEOUT_MS):
+    start = data["timestamp"].to_numpy(dtype=np.int64)
+    reached = {}
+    for column in ["MM5G_REGISTERED_INITIATED", "MM5G_REGISTERED", "DataPlaneReady"]:
+        delays = data[column].to_numpy(dtype=np.float64) if column in data else np.full(len(data), np.nan)
+        finite = np.isfinite(delays)
+        reached[column] = finite
+        data_ns = np.full(len(data), -1, dtype=np.int64)
+        data_ns[finite] = start[finite] + np.rint(delays[finite] * 1e6).astype(np.int64)
+        reached[f"{column}_ns"] = data_ns
+    ready = reached["DataPlaneReady"]
+    timeout_ns = int(timeout_ms * 1e6)
+    duration = np.where(ready, reached["DataPlaneReady_ns"] - start, timeout_ns)
+    # Estado e resultado como categorias (códigos inteiros): comparações rápidas em milhões de UEs
+    stage = pd.Categorical.from_codes(np.select([ready, reached["MM5G_REGISTERED"], reached["MM5G_REGISTERED_INITIATED"]], [3, 2, 1], 0),
+                                      STAGES)
+    outcome = pd.Categorical.from_codes(np.select([ready & (duration <= timeout_ns), ready], [0, 1], 2), OUTCOMES)
+    # Registro em andamento: do início da tentativa (ou do timestamp) até o MM5G_REGISTERED
+    registering_start = np.where(reached["MM5G_REGISTERED_INITIATED"], reached["MM5G_REGISTERED_INITIATED_ns"], start)
+    registering_end = np.where(reached["MM5G_REGISTERED"], reached["MM5G_REGISTERED_ns"], start + timeout_ns)
+    return pd.DataFrame({
+        "start_ns": start,
+        "initiated_ns": reached["MM5G_REGISTERED_INITIATED_ns"],
+        "registered_ns": reached["MM5G_REGISTERED_ns"],
+        "ready_ns": reached["DataPlaneReady_ns"],
+        "end_ns": start + duration,
+        "registering_start_ns": registering_start,
+        "registering_end_ns": np.maximum(registering_end, registering_start),
+        "stage": stage,
+        "outcome": outcome,
+    })
+
+# Varredura dos intervalos [início, fim): instantes dos eventos (ns) e número de intervalos abertos
+# depois de cada um. Cada evento vira uma chave 2*t + (1 se início), então uma única ordenação põe
+# os eventos em ordem com os fins antes dos inícios no mesmo instante.
+def sweep(starts_ns, ends_ns, origin_ns):
+    keys = np.concatenate([(np.asarray(starts_ns, dtype=np.int64) - origin_ns) * 2 + 1,
+                           (np.asarray(ends_ns, dtype=np.int64) - origin_ns) * 2])
+    keys.sort()
+    return keys >> 1, np.cumsum(np.where(keys & 1, 1, -1))
+
+# Média no tempo e máximo do número de intervalos abertos em cada intervalo de bin_ns desde a origem
+def sample_levels(times, levels, bin_ns, length):
+    edges = np.arange(length + 1, dtype=np.int64) * bin_ns
+    if not len(times):
+        return np.zeros(length), np.zeros(length, dtype=np.int64)
+    # Área acumulada (intervalos x s) em cada evento: linear entre eventos, então np.interp é exato
+    area = np.concatenate([[0.0], np.cumsum(levels[:-1] * (np.diff(times) / NS))])
+    mean = np.diff(np.interp(edges, times, area)) / (bin_ns / NS)
+    before = np.searchsorted(times, edges[:-1], side="left")
+    entering = np.where(before > 0, levels[np.maximum(before - 1, 0)], 0)
+    inside = np.searchsorted(times, edges[1:], side="left") > before
+    peak = entering.copy()
+    if inside.any():
+        covered = levels[:np.searchsorted(times, edges[-1], side="left")]
+        peak[inside] = np.maximum(entering[inside], np.maximum.reduceat(covered, before[inside]))
+    return mean, peak
+
+# Série por intervalo de bin_s: UEs em andamento (conexão inteira e só o registro, média e máximo),
+# taxas oferecida e de conclusão e a fração de cada resultado entre os UEs iniciados no intervalo
+def concurrency_series(timelines, bin_s=1.0, origin_ns=None):
+    origin_ns = int(timelines["start_ns"].min()) if origin_ns is None else origin_ns
+    accumulator = RateAccumulator(["offered"] + OUTCOMES + ["completed"], bin_s, origin_ns)
+    accumulator.add("offered", timelines["start_ns"].to_numpy())
+    codes = timelines["outcome"].cat.codes.to_numpy()
+    for code, outcome in enumerate(OUTCOMES):
+        accumulator.add(outcome, timelines["start_ns"].to_numpy()[codes == code])
+    accumulator.add("completed", timelines["ready_ns"].to_numpy()[timelines["ready_ns"].to_numpy() >= 0])
+    series = accumulator.frame()
+    origin_ns = accumulator.origin_ns
+
+    length = max(len(series), int(np.ceil((timelines["end_ns"].max() - origin_ns) / accumulator.bin_ns)))
+    if length > len(series):
+        series = series.reindex(range(length), fill_value=0.0)
+        series["time_s"] = np.arange(length) * (accumulator.bin_ns / NS)
+    for name, (start, end) in {"in_flight": ("start_ns", "end_ns"), "registering": ("registering_start_ns", "registering_end_ns")}.items():
+        times, levels = sweep(timelines[start].to_numpy(), timelines[end].to_numpy(), origin_ns)
+        series[f"{name}_mean"], series[f"{name}_max"] = sample_levels(times, levels, accumulator.bin_ns, length)
+    offered = series["offered"].to_numpy()
+    for outcome in OUTCOMES:
+        series[f"{outcome}_ratio"] = np.divide(series[outcome].to_numpy(), offered, out=np.full(length, np.nan), where=offered > 0)
+    series.attrs["origin_ns"] = origin_ns
+    return series
+
+# Lei de Little (L = λW) em janelas de window_s: L é a média no tempo dos UEs em andamento, λ a
+# taxa de chegada e W o tempo médio no sistema dos UEs que chegaram na janela. A razão L/(λW) se
+# afasta de 1 quando W é comparável à janela ou o sistema não está em regime. A tabela traz também
+# a vazão de conclusão e o tempo médio só das conexões com sucesso de cada janela.
+def littles_law(timelines, series, window_s=DEFAULT_WINDOW_S):
+    bin_s = series["time_s"].iloc[1] - series["time_s"].iloc[0] if len(series) > 1 else 1.0
+    bins = max(int(round(window_s / bin_s)), 1)
+    window = np.arange(len(series)) // bins
+    windows = window.max() + 1
+    arrivals = (timelines["start_ns"].to_numpy() - series.attrs["origin_ns"]) // int(round(bin_s * NS)) // bins
+    sojourn_s = (timelines["end_ns"] - timelines["start_ns"]).to_numpy() / NS
+    success = timelines["outcome"].cat.codes.to_numpy() == OUTCOMES.index("success")
+    table = pd.DataFrame({
+        "start_s": series["time_s"].groupby(window).min(),
+        "duration_s": series["time_s"].groupby(window).size() * bin_s,
+        "L": series["in_flight_mean"].groupby(window).mean(),
+        "arrivals": np.bincount(arrivals, minlength=windows)[:windows],
+        "throughput_per_s": series["completed"].groupby(window).mean(),
+    })
+    table["lambda_per_s"] = table["arrivals"] / table["duration_s"]
+    table["W_s"] = mean_by_window(arrivals, sojourn_s, windows)
+    table["lambda_W"] = table["lambda_per_s"] * table["W_s"]
+    table["ratio"] = table["L"] / table["lambda_W"]
+    table["success_W_s"] = mean_by_window(arrivals[success], sojourn_s[success], windows)
+    return table.reset_index(drop=True)
+
+# Média dos valores de cada janela (NaN nas janelas sem valores)
+def mean_by_window(windows_of, values, windows):
+    counts = np.bincount(windows_of, minlength=windows)[:windows]
+    sums = np.bincount(windows_of, weights=values, minlength=windows)[:windows]
+    return np.divide(sums, counts, out=np.full(windows, np.nan), where=counts > 0)
+
+# Resumo de um teste: resultados, tempos e concorrência. No teste inteiro L = λW por construção
+# (a área dos UEs em andamento é a soma dos tempos no sistema), então a verificação de Little fica
+# só nas janelas de littles_law.
+# O limite de concorrência efetivo do core é o joelho das leis operacionais, N* = X_max · R0: a
+# maior vazão de conclusão de uma janela vezes o tempo de uma conexão com sucesso sem fila (a
+# mediana do tempo médio das janelas com vazão abaixo de UNLOADED_FRACTION de X_max, ou o menor
+# tempo médio se todas estão acima). Acima de N* UEs em andamento, os UEs a mais só esperam.
+# in_flight_at_saturation é o menor L das janelas com vazão acima de SATURATION_FRACTION de X_max.
+def summarize(timelines, series, little):
+    total = len(timelines)
+    counts = timelines["outcome"].value_counts()
+    span_s = (timelines["end_ns"].max() - timelines["start_ns"].min()) / NS
+    sojourn_s = (timelines["end_ns"] - timelines["start_ns"]).to_numpy() / NS
+    bin_s = series["time_s"].iloc[1] - series["time_s"].iloc[0] if len(series) > 1 else 1.0
+    peak_throughput = little["throughput_per_s"].max()
+    saturated = little["throughput_per_s"] >= SATURATION_FRACTION * peak_throughput
+    unloaded = little.loc[little["throughput_per_s"] < UNLOADED_FRACTION * peak_throughput, "success_W_s"].dropna()
+    summary = {"ues": total}
+    summary.update({f"{outcome}_ratio": counts.get(outcome, 0) / total for outcome in OUTCOMES})
+    summary.update({
+        "mean_W_s": sojourn_s.mean(), "span_s": span_s,
+        "mean_in_flight": series["in_flight_mean"].sum() * bin_s / span_s,
+        "peak_in_flight": int(series["in_flight_max"].max()), "peak_registering": int(series["registering_max"].max()),
+        "peak_throughput_per_s": peak_throughput, "unloaded_success_W_s": unloaded.median() if len(unloaded) else little["success_W_s"].min(),
+        "in_flight_at_saturation": little.loc[saturated, "L"].min(),
+    })
+    summary["effective_concurrency"] = peak_throughput * summary["unloaded_success_W_s"]
+    return summary
+
+# UEs em andamento e taxas ao longo do teste, e vazão x concorrência (o joelho é o limite do core,
+# marcado em knee quando informado)
+def plot_concurrency(series, output, title=None, knee=None):
+    import matplotlib.pyplot as plt
+
+    fig, (ax, ax_knee) = plt.subplots(1, 2, figsize=(14, 5), gridspec_kw={"width_ratios": [2, 1]})
+    ax.plot(series["time_s"], series["in_flight_mean"], color="tab:blue", linewidth=1.5, label="In flight (mean)")
+    ax.plot(series["time_s"], series["registering_mean"], color="tab:purple", linewidth=1, label="Registering (mean)")
+    ax.set_xlabel("Experiment Time (s)")
+    ax.set_ylabel("UEs in flight")
+    rates = ax.twinx()
+    rates.plot(series["time_s"], series["offered"], color="tab:orange", linewidth=1, alpha=0.7, label="Offered / s")
+    rates.plot(series["time_s"], series["completed"], color="tab:green", linewidth=1, alpha=0.7, label="Completed / s")
+    rates.set_ylabel("Connections per second")
+    handles = ax.get_legend_handles_labels()[0] + rates.get_legend_handles_labels()[0]
+    ax.legend(handles, [handle.get_label() for handle in handles], fontsize=8, loc="upper left")
+    ax.grid(True)
+
+    ax_knee.scatter(series["in_flight_mean"], series["completed"], s=5, alpha=0.5)
+    if knee is not None and np.isfinite(knee):
+        ax_knee.axvline(knee, color="black", linestyle="--", linewidth=1, label=f"N* = {knee:.0f}")
+        ax_knee.legend(fontsize=8)
+    ax_knee.set_xscale("symlog")
+    ax_knee.set_xlim(left=0)
+    ax_knee.set_xlabel("UEs in flight (mean)")
+    ax_knee.set_ylabel("Completed per second")
+    ax_knee.grid(True)
+    if title:
+        fig.suptitle(title)
+    fig.tight_layout()
+    fig.savefig(output, dpi=300, bbox_inches="tight")
+    plt.close(fig)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rebuild each UE's timeline from my5G-RANTester CSVs and report in-flight concurrency, outcome ratios per second and Little's-law checks.")
+    parser.add_argument("paths", nargs='+', type=str, help="Tester CSV files or directories")
+    parser.add_argument("--bin_s", type=float, default=1.0, help="Bin width in seconds")
+    parser.add_argument("--window_s", type=float, default=DEFAULT_WINDOW_S, help="Window of the Little's-law checks in seconds")
+    parser.add_argument("--timeout_ms", type=float, default=DEFAULT_TIMEOUT_MS, help="Connections slower than this are timeouts; unfinished UEs stay in flight this long")
+    parser.add_argument("--timelines", action="store_true", help="Also save the per-UE timelines (timeline_<file>.feather)")
+    parser.add_argument("--plot", action="store_true", help="Save a concurrency_<file>.png per file")
+    parser.add_argument("--output", type=str, default="concurrency_summary.csv", help="Summary table of every file")
+    args = parser.parse_args()
+
+    summaries = []
+    for path in find_tester_csvs(args.paths):
+        inicio = time.perf_counter()
+        timelines = ue_timelines(load_tester_csv(path, TESTER_COLUMNS), args.timeout_ms)
+        if timelines.empty:
+            print(f"{path}: sem UEs")
+            continue
+        series = concurrency_series(timelines, args.bin_s)
+        little = littles_law(timelines, series, args.window_s)
+        summary = summarize(timelines, series, little)
+        elapsed = time.perf_counter() - inicio
+
+        name = os.path.splitext(os.path.basename(path))[0]
+        series.to_csv(f"concurrency_{name}.csv", index=False)
+        little.to_csv(f"little_{name}.csv", index=False)
+        if args.timelines:
+            timelines.to_feather(f"timeline_{name}.feather")
+        if args.plot:
+            plot_concurrency(series, f"concurrency_{name}.png", title=os.path.basename(path), knee=summary["effective_concurrency"])
+        summaries.append(dict({"file": os.path.basename(path)}, **summary))
+        print(f"{path}: {len(timelines)} UEs em {elapsed:.2f} s, pico de {summary['peak_in_flight']} em andamento, "
+              f"concorrência efetiva {summary['effective_concurrency']:.1f}, média de {summary['mean_in_flight']:.1f} em andamento")
+
+    if summaries:
+        pd.DataFrame(summaries).to_csv(args.output, index=False)
+        print(f"Resumo salvo em {args.output}")
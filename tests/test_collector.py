@@ -0,0 +1,123 @@
+import os
+
+import pandas as pd
+import pytest
+
+from core_data.collector import MATRIX_OUTPUTS, PROFILES, REPO_ROOT, RESOURCES_OUTPUT, collect_directory, combine_matrices, load_core_script
+from core_data.dataset_loader import EXPORTS, FILE_PATTERN, read_export, round_means
+from core_data.fake_prometheus import make_source, start_server
+from core_data.intervals import get_timestamps_from_directory
+from core_data.prometheus_pool import close_clients, configure_cache
+from core_data.query_executor import QueryExecutor
+
+# Cenário do Dataset reproduzido pelo Prometheus local (as exportações são as respostas gravadas
+# do Prometheus real para as consultas por par)
+SCENARIO = "Parallel_Test_100"
+# Rodadas coletadas na comparação com os scripts por par: as últimas do timestamp.txt. Na comparação
+# com as exportações só a última é coletada: ela não divide o instante final com uma rodada seguinte
+# (que no Prometheus local fica com a amostra da rodada seguinte), então cada passo dela é o da exportação
+ROUNDS = 2
+# Diferença relativa aceita: só a ordem das somas em ponto flutuante muda entre as implementações
+TOLERANCE = 1e-9
+# Scripts por par de cada core (a referência do coletor), a função de coleta e o CSV de cada um
+BASELINE_SCRIPTS = [
+    ("getdata", "get_receive_bytes", "output_rate.csv"),
+    ("getrequest", "get_receive_bytes", "output_req.csv"),
+    ("geterrors", "get_receive_bytes", "output_error.csv"),
+    ("resources", "get_combined_metrics_data", RESOURCES_OUTPUT),
+]
+
+@pytest.fixture(scope="module", params=sorted(PROFILES))
+def core(request):
+    scenario = os.path.join(REPO_ROOT, PROFILES[request.param]["tree"], "Dataset", SCENARIO)
+    if not os.path.isdir(scenario):
+        pytest.skip(f"Cenário não encontrado: {scenario}")
+    server = start_server(make_source(PROFILES[request.param], scenario))
+    yield request.param, scenario, server.url
+    server.shutdown()
+    server.server_close()
+
+# Grava em directory as últimas rodadas do arquivo de timestamps
+def write_timestamps(directory, source, rounds):
+    os.makedirs(directory, exist_ok=True)
+    with open(source) as f:
+        lines = [line for line in f if line.strip()]
+    with open(os.path.join(directory, "timestamps.txt"), "w") as f:
+        f.writelines(lines[-rounds:])
+    return len(lines)
+
+# Roda fn(executor) com um executor novo para prometheus_url, sem cache de consultas
+def with_executor(prometheus_url, fn):
+    configure_cache(None)
+    executor = QueryExecutor(prometheus_url, max_workers=4, max_in_flight=4)
+    try:
+        return fn(executor)
+    finally:
+        executor.shutdown()
+        close_clients()
+
+# Coleta o diretório com o collector e devolve os CSVs gravados
+def collect(directory, name, prometheus_url, server_side=False):
+    with_executor(prometheus_url, lambda executor: collect_directory(str(directory), PROFILES[name], executor, server_side=server_side))
+    return {filename: pd.read_csv(os.path.join(directory, filename), index_col=0)
+            for filename in list(MATRIX_OUTPUTS.values()) + [RESOURCES_OUTPUT]}
+
+# Valores numéricos das células (as marcas sem valor, como "-", viram NaN)
+def numeric(frame):
+    return frame.apply(pd.to_numeric, errors="coerce").astype(float)
+
+# Mesmas células sem valor e os valores iguais dentro da tolerância
+def assert_same(result, expected):
+    assert numeric(expected).notna().to_numpy().any()
+    pd.testing.assert_frame_equal(result.where(numeric(result).isna()), expected.where(numeric(expected).isna()), check_dtype=False)
+    pd.testing.assert_frame_equal(numeric(result), numeric(expected), check_exact=False, rtol=TOLERANCE, atol=0)
+
+# Matriz de uma família calculada direto das exportações do cenário, só com a rodada round_id
+def export_matrix(scenario, family, profile, round_id):
+    subdir, suffix, _ = EXPORTS[family]
+    nfs = profile["nfs"]
+    data = pd.DataFrame(0.0, index=nfs, columns=nfs)
+    for name in sorted(os.listdir(os.path.join(scenario, subdir))):
+        match = FILE_PATTERN.match(name)
+        if match and match.group(3) == suffix and match.group(1) in nfs and match.group(2) in nfs:
+            means = round_means(*read_export(os.path.join(scenario, subdir, name)), family)
+            data.at[match.group(1), match.group(2)] = means.get(round_id, 0.0)
+    return combine_matrices([data], profile)
+
+def test_default_matches_exports(tmp_path, core):
+    name, scenario, prometheus_url = core
+    rounds = write_timestamps(tmp_path, os.path.join(scenario, "timestamp.txt"), 1)
+    result = collect(tmp_path, name, prometheus_url)
+    for family, (subdir, _, filename) in EXPORTS.items():
+        if os.path.isdir(os.path.join(scenario, subdir)):
+            assert_same(result[filename], export_matrix(scenario, family, PROFILES[name], rounds))
+
+def test_default_matches_baseline_scripts(tmp_path, core):
+    name, scenario, prometheus_url = core
+    write_timestamps(tmp_path, os.path.join(scenario, "timestamp.txt"), ROUNDS)
+    result = collect(tmp_path, name, prometheus_url)
+    start_end_timestamps = get_timestamps_from_directory(str(tmp_path))
+    for script, function, filename in BASELINE_SCRIPTS:
+        output_csv = os.path.join(tmp_path, f"baseline_{filename}")
+        module = load_core_script(name, script)
+        with_executor(prometheus_url, lambda executor: getattr(module, function)(start_end_timestamps, output_csv, executor))
+        expected = pd.read_csv(output_csv, index_col=0)
+        # O resources.py do Open5GS deixa uma linha vazia para upf-1 (os valores vão para upf)
+        extra = expected.index.difference(result[filename].index)
+        assert numeric(expected.loc[extra]).isna().to_numpy().all()
+        assert_same(result[filename], expected.drop(extra))
+
+# --server_side só é comparado com um Prometheus real: PROMETHEUS_URL, PROMETHEUS_TIMESTAMPS (arquivo de
+# timestamps de um experimento guardado nele) e PROMETHEUS_CORE (free5gc por padrão). O Prometheus local
+# não serve de referência aqui, porque ele interpreta a consulta agregada do próprio collector.
+@pytest.mark.skipif(not (os.environ.get("PROMETHEUS_URL") and os.environ.get("PROMETHEUS_TIMESTAMPS")),
+                    reason="PROMETHEUS_URL e PROMETHEUS_TIMESTAMPS não definidos")
+def test_server_side_matches_default(tmp_path):
+    name = os.environ.get("PROMETHEUS_CORE", "free5gc")
+    prometheus_url = os.environ["PROMETHEUS_URL"]
+    for mode in ("default", "server_side"):
+        write_timestamps(tmp_path / mode, os.environ["PROMETHEUS_TIMESTAMPS"], ROUNDS)
+    default = collect(tmp_path / "default", name, prometheus_url)
+    server_side = collect(tmp_path / "server_side", name, prometheus_url, server_side=True)
+    for filename, expected in default.items():
+        assert_same(server_side[filename], expected)